@@ -1,7 +1,7 @@
 import os
 from app import create_app
 
-app = create_app()
+app = create_app(os.getenv("APP_CONFIG", "config.Config"))
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
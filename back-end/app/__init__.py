@@ -7,7 +7,9 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
-db = SQLAlchemy()
+from app.utils.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 
@@ -18,6 +20,19 @@ def create_app(config_class="config.Config"):
 
     _configure_logging(app)
 
+    hops = app.config.get("TRUSTED_PROXY_HOPS", 0)
+    if hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Registered before the response layer so its after_request hook runs
+    # last and the recorded latency includes compression.
+    from app.utils.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    from app.utils.responses import init_response_layer
+    init_response_layer(app)
+
     CORS(
         app,
         resources={r"/api/*": {"origins": app.config["ALLOWED_ORIGINS"]}},
@@ -31,16 +46,30 @@ def create_app(config_class="config.Config"):
     app.config["UPLOAD_FOLDER"] = upload_folder
     os.makedirs(upload_folder, exist_ok=True)
 
-    db.init_app(app)
+    from app.utils.database import init_database
+    init_database(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
 
+    from app.services.data_versions import init_data_versions
+    init_data_versions(app)
+
+    from app.services.rate_limit import init_rate_limits
+    init_rate_limits(app)
+
+    from app.services.token_denylist import init_token_denylist
+    init_token_denylist(app, jwt)
+
+    from app.services.contact_ingest import init_contact_ingest
+    init_contact_ingest(app)
+
     from app.auth.routes import auth_bp
     from app.candidate.routes import candidate_bp
     from app.admin.routes import admin_bp
     from app.evaluateur.routes import evaluateur_bp
     from app.routes.upload_routes import uploads_bp
     from app.routes.contact_routes import contact_bp
+    from app.routes.metrics_routes import metrics_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(candidate_bp, url_prefix="/api/candidate")
@@ -48,6 +77,8 @@ def create_app(config_class="config.Config"):
     app.register_blueprint(evaluateur_bp, url_prefix="/api/evaluateur")
     app.register_blueprint(uploads_bp)
     app.register_blueprint(contact_bp)
+    if app.config.get("METRICS_ENABLED", False):
+        app.register_blueprint(metrics_bp)
 
     return app
 
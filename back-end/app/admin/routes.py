@@ -1,20 +1,29 @@
 import logging
 import re
 
-import pandas as pd
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy import func, or_
 from sqlalchemy.exc import IntegrityError
 
 from app import db
-from app.models.settings_models import GlobalSettings
+from app.models.settings_models import ContactMessage
 from app.models.user_models import (
     Candidat, Documents, Evaluateur, FinalScore,
     Filiere, NoteEvaluateur, Role, ScoreAI, User,
 )
-from app.services.ml_service import get_pipeline
-from app.utils.decorators import role_required
-from app.utils.helpers import hash_password
+from app.services import contact_inbox, evaluator_analytics
+from app.services.assignment_service import assign_candidates, release_evaluator, release_uncovered
+from app.services.feature_store import feature_rows
+from app.services.ml_service import cache_stats, clamp_score, predict_scores
+from app.services.formula import VARIABLES as FORMULA_VARIABLES
+from app.services.formula import FormulaError, compile_formula, weights_formula
+from app.services.scoring_service import MAX_SCENARIOS, simulate, store_final_scores
+from app.services.settings_service import (
+    get_settings, get_weights, update_expression, update_weights,
+)
+from app.services.token_denylist import revoke_user
+from app.utils.decorators import replica_reads, role_required, versioned_etag
+from app.utils.helpers import USER_UNIQUE_MESSAGES, duplicate_field, hash_password, normalize_email
 
 logger = logging.getLogger(__name__)
 
@@ -39,66 +48,41 @@ def admin_ai_score():
     
     Results stored in ScoreAI table.
     """
-    filiere_name_by_id = {f.id: f.nom_filiere for f in Filiere.query.all()}
-    candidates = Candidat.query.filter(Candidat.filiere_id.isnot(None)).all()
-
-    pipe = get_pipeline()
-    scored = missing_fields = 0
-
+    # Complete profiles come straight from the feature store; the rest are
+    # candidates with a filiere but a missing input.
+    rows = feature_rows()
+    with_filiere = Candidat.query.filter(Candidat.filiere_id.isnot(None)).count()
+    missing_fields = with_filiere - len(rows)
+
+    to_score = [r[0] for r in rows]
+    features = [r[1:] for r in rows]
     existing_ai = {
         r.candidat_id: r
-        for r in ScoreAI.query.filter(
-            ScoreAI.candidat_id.in_([c.id for c in candidates])
-        ).all()
-    }
+        for r in ScoreAI.query.filter(ScoreAI.candidat_id.in_(to_score)).all()
+    } if to_score else {}
 
-    for c in candidates:
-        if not all([c.t_diplome, c.branche_diplome, c.bac_type, c.filiere_id]):
-            missing_fields += 1
-            continue
-        if any(v is None for v in [c.m_s1, c.m_s2, c.m_s3, c.m_s4]):
-            missing_fields += 1
-            continue
+    # One deduplicated, memoized predict call for the whole cohort
+    predictions = predict_scores(features) if features else []
 
-        # All candidates can be scored (no avg < 10 rejection)
-        filiere_name = filiere_name_by_id.get(c.filiere_id)
-        if not filiere_name:
-            missing_fields += 1
-            continue
+    for cid, predicted_score in zip(to_score, predictions):
+        note_ai = clamp_score(predicted_score)
 
-        X = pd.DataFrame([{
-            "t_diplome": c.t_diplome,
-            "branche_diplome": c.branche_diplome,
-            "bac_type": c.bac_type,
-            "filiere": filiere_name,
-            "moy_bac": float(c.moy_bac) if c.moy_bac is not None else 0.0,
-            "m_s1": float(c.m_s1),
-            "m_s2": float(c.m_s2),
-            "m_s3": float(c.m_s3),
-            "m_s4": float(c.m_s4),
-        }])
-        
-        # Use regressor to predict student performance score (0-20 scale)
-        predicted_score = pipe.predict(X)[0]
-        # Clamp to valid range [0, 20]
-        note_ai = round(max(0.0, min(20.0, predicted_score)), 2)
-
-        row = existing_ai.get(c.id)
+        row = existing_ai.get(cid)
         if not row:
-            row = ScoreAI(candidat_id=c.id, note_ai=note_ai)
+            row = ScoreAI(candidat_id=cid, note_ai=note_ai)
             db.session.add(row)
-            existing_ai[c.id] = row
+            existing_ai[cid] = row
         else:
             row.note_ai = note_ai
 
-        scored += 1
-
+    scored = len(to_score)
     db.session.commit()
     logger.info("AI scoring: scored=%d, skipped=%d", scored, missing_fields)
     return jsonify(
         msg="AI scoring: All candidates scored using RandomForestRegressor",
         scored=scored,
         skipped_missing_fields=missing_fields,
+        cache=cache_stats(),
         note="Model now predicts student performance (0-20) instead of selection probability"
     ), 200
 
@@ -110,80 +94,106 @@ def admin_ai_score():
 @admin_bp.route("/final-scores/compute", methods=["POST"])
 @role_required('ADMIN')
 def compute_final_scores():
-    # Read weights from GlobalSettings; fall back to 60/40 if not yet configured
-    settings = GlobalSettings.query.first()
-    if settings:
-        W_JURY = settings.human_weight / 100.0
-        W_AI = settings.ai_weight / 100.0
-    else:
-        W_JURY = 0.60
-        W_AI = 0.40
-        logger.warning("GlobalSettings not found — using default weights (60/40)")
+    try:
+        result = store_final_scores()
+    except FormulaError as e:
+        db.session.rollback()
+        return jsonify(msg=f"Formule enregistrée invalide: {e}"), 409
 
-    candidates = Candidat.query.filter(Candidat.filiere_id.isnot(None)).all()
-    candidate_ids = [c.id for c in candidates]
+    return jsonify(msg="Final scores calculés", **result), 200
 
-    ai_map = {
-        r.candidat_id: r
-        for r in ScoreAI.query.filter(ScoreAI.candidat_id.in_(candidate_ids)).all()
-    }
-    fs_map = {
-        r.candidat_id: r
-        for r in FinalScore.query.filter(FinalScore.candidat_id.in_(candidate_ids)).all()
-    }
-    jury_avgs = dict(
-        db.session.query(
-            NoteEvaluateur.candidat_id,
-            func.avg(NoteEvaluateur.note_eval),
-        )
-        .filter(NoteEvaluateur.candidat_id.in_(candidate_ids))
-        .group_by(NoteEvaluateur.candidat_id)
-        .all()
-    )
 
-    updated = skipped = ai_missing = 0
+# ---------------------------------------------------------------------------
+# Evaluator assignments
+# ---------------------------------------------------------------------------
 
-    for c in candidates:
-        jury_avg = jury_avgs.get(c.id)
-        if jury_avg is None:
-            skipped += 1
-            continue
+@admin_bp.route("/assignments/compute", methods=["POST"])
+@role_required('ADMIN')
+def compute_assignments():
+    """Fill missing assignments so each submitted candidate has K evaluators."""
+    data = request.get_json(silent=True) or {}
+    k = data.get("k", current_app.config["JURY_NOTES_PER_CANDIDATE"])
+    try:
+        k = int(k)
+    except (ValueError, TypeError):
+        return jsonify(msg="k doit être un entier"), 400
+    if k < 1:
+        return jsonify(msg="k doit être supérieur ou égal à 1"), 400
 
-        jury_avg = float(jury_avg)
-        ai_row = ai_map.get(c.id)
+    result = assign_candidates(k)
+    db.session.commit()
+    return jsonify(
+        msg="Affectations calculées",
+        k=k,
+        candidates=result["candidates"],
+        created=result["created"],
+        understaffed=result["understaffed"],
+        load={str(ev_id): n for ev_id, n in result["load"].items()},
+    ), 200
 
-        if not ai_row or ai_row.note_ai is None:
-            ai_missing += 1
-            ai_note = 0.0
-        else:
-            ai_note = float(ai_row.note_ai)
 
-        final_note = round((W_JURY * jury_avg) + (W_AI * ai_note), 2)
+@admin_bp.route("/evaluateurs/<int:evaluateur_id>", methods=["PUT"])
+@role_required('ADMIN')
+def update_evaluateur(evaluateur_id):
+    """Set an evaluator's filiere specialities and/or active flag.
 
-        fs = fs_map.get(c.id)
-        if not fs:
-            fs = FinalScore(
-                candidat_id=c.id,
-                note_ai=ai_note,
-                note_jury=round(jury_avg, 2),
-                note_final=final_note,
-            )
-            db.session.add(fs)
-            fs_map[c.id] = fs
+    Deactivating goes through ``release_evaluator`` and narrowing the
+    specialities through ``release_uncovered``, so no ungraded candidate
+    stays assigned to someone who can no longer grade it.
+    """
+    ev = db.session.get(Evaluateur, evaluateur_id)
+    if not ev:
+        return jsonify(msg="Évaluateur introuvable"), 404
+
+    data = request.get_json() or {}
+    k = current_app.config["JURY_NOTES_PER_CANDIDATE"]
+    deactivate = "is_active" in data and not data["is_active"] and ev.is_active
+
+    if "filiere_ids" in data:
+        ids = data["filiere_ids"] or []
+        if not isinstance(ids, list):
+            return jsonify(msg="filiere_ids doit être une liste"), 400
+        filieres = Filiere.query.filter(Filiere.id.in_(ids)).all() if ids else []
+        if len(filieres) != len(set(ids)):
+            return jsonify(msg="Filière invalide"), 400
+        ev.filieres = filieres
+
+    if deactivate:
+        result = release_evaluator(ev, k)
+    else:
+        if "is_active" in data:
+            ev.is_active = bool(data["is_active"])
+        if "filiere_ids" in data:
+            result = release_uncovered(ev, k)
         else:
-            fs.note_ai = ai_note
-            fs.note_jury = round(jury_avg, 2)
-            fs.note_final = final_note
+            result = {"released": 0, "created": 0, "understaffed": 0}
 
-        updated += 1
+    db.session.commit()
+    return jsonify(
+        msg="Évaluateur mis à jour",
+        filiere_ids=[f.id for f in ev.filieres],
+        is_active=ev.is_active,
+        released=result["released"],
+        created=result["created"],
+        understaffed=result["understaffed"],
+    ), 200
+
+
+@admin_bp.route("/evaluateurs/<int:evaluateur_id>/release", methods=["POST"])
+@role_required('ADMIN')
+def release_evaluateur(evaluateur_id):
+    """Deactivate an evaluator and reassign their ungraded candidates."""
+    ev = db.session.get(Evaluateur, evaluateur_id)
+    if not ev:
+        return jsonify(msg="Évaluateur introuvable"), 404
 
+    result = release_evaluator(ev, current_app.config["JURY_NOTES_PER_CANDIDATE"])
     db.session.commit()
     return jsonify(
-        msg="Final scores calculés",
-        updated=updated,
-        skipped_no_jury_notes=skipped,
-        ai_missing=ai_missing,
-        weights={"jury": W_JURY, "ai": W_AI},
+        msg="Évaluateur retiré et candidats réaffectés",
+        released=result["released"],
+        created=result["created"],
+        understaffed=result["understaffed"],
     ), 200
 
 
@@ -274,16 +284,11 @@ def create_user():
         if not data.get(k):
             return jsonify(msg=f"Champ requis manquant: {k}"), 400
 
-    email = data["email"].strip().lower()
+    email = normalize_email(data["email"])
     cin = str(data["cin"]).strip()
     phone = str(data["phone_num"]).strip()
     role_name = str(data["role"]).strip().upper()
 
-    if User.query.filter(
-        (User.email == email) | (User.cin == cin) | (User.phone_num == phone)
-    ).first():
-        return jsonify(msg="Email / CIN / Téléphone déjà utilisé"), 400
-
     role = Role.query.filter_by(role_name=role_name).first()
     if not role:
         return jsonify(msg="Rôle invalide"), 400
@@ -297,13 +302,20 @@ def create_user():
         phone_num=phone,
         role_id=role.id,
     )
-    db.session.add(user)
-    db.session.flush()
 
     if role.role_name == "EVALUATEUR":
-        db.session.add(Evaluateur(user_id=user.id, formule="DEFAULT"))
+        user.evaluateur = Evaluateur(formule="DEFAULT")
 
-    db.session.commit()
+    # Duplicates are caught by the unique indexes in the same round trip
+    db.session.add(user)
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        field = duplicate_field(e, USER_UNIQUE_MESSAGES)
+        if field is None:
+            raise
+        return jsonify(msg=USER_UNIQUE_MESSAGES[field], field=field), 400
     return jsonify(msg="Utilisateur créé avec succès", user_id=user.id), 201
 
 
@@ -315,9 +327,10 @@ def update_user(user_id):
         return jsonify(msg="Utilisateur introuvable"), 404
 
     data = request.get_json() or {}
+    role_changed = False
 
     if "email" in data and data["email"]:
-        new_email = data["email"].strip().lower()
+        new_email = normalize_email(data["email"])
         if new_email != user.email:
             if User.query.filter(User.email == new_email, User.id != user.id).first():
                 return jsonify(msg="Email déjà utilisé"), 400
@@ -366,8 +379,12 @@ def update_user(user_id):
 
             if new_role.role_name == "EVALUATEUR" and not getattr(user, "evaluateur", None):
                 db.session.add(Evaluateur(user_id=user.id, formule="DEFAULT"))
+            role_changed = True
 
     db.session.commit()
+    # Tokens carry the role claim; force a new login with the new role
+    if role_changed:
+        revoke_user(user.id)
     return jsonify(msg="Utilisateur mis à jour avec succès"), 200
 
 
@@ -381,6 +398,7 @@ def delete_user(user_id):
     try:
         db.session.delete(user)
         db.session.commit()
+        revoke_user(user_id)
         return jsonify(msg="Utilisateur supprimé avec succès"), 200
     except IntegrityError:
         db.session.rollback()
@@ -393,6 +411,7 @@ def delete_user(user_id):
 
 @admin_bp.route("/stats/overview", methods=["GET"])
 @role_required('ADMIN')
+@replica_reads("users", "candidats", "documents", "final_scores")
 def stats_overview():
     return jsonify({
         "total_users": User.query.count(),
@@ -405,6 +424,8 @@ def stats_overview():
 
 @admin_bp.route("/stats/filieres", methods=["GET"])
 @role_required('ADMIN')
+@versioned_etag("filieres", "candidats", "score_ai", "final_scores")
+@replica_reads("filieres", "candidats", "score_ai", "final_scores")
 def stats_filieres():
     results = (
         db.session.query(
@@ -431,8 +452,28 @@ def stats_filieres():
     ]), 200
 
 
+@admin_bp.route("/stats/evaluateurs", methods=["GET"])
+@role_required('ADMIN')
+@versioned_etag("evaluateurs", "users", "affectations", "note_evaluateur")
+@replica_reads("evaluateurs", "users", "affectations", "note_evaluateur")
+def stats_evaluateurs():
+    """Grading progress and agreement of the evaluators, read from the note
+    summaries. ``min_shared`` hides pairs sharing fewer candidates; ``min_std``
+    and ``limit`` filter the disputed candidates (most spread-out notes first)."""
+    min_shared = max(request.args.get("min_shared", 1, type=int), 1)
+    min_std = max(request.args.get("min_std", 0.0, type=float), 0.0)
+    limit = max(1, min(request.args.get("limit", 50, type=int), 500))
+    return jsonify(evaluator_analytics.report(min_shared, min_std, limit)), 200
+
+
 @admin_bp.route("/final-scores", methods=["GET"])
 @role_required('ADMIN')
+@versioned_etag(
+    "candidats", "users", "filieres", "score_ai", "note_evaluateur", "final_scores",
+)
+@replica_reads(
+    "candidats", "users", "filieres", "score_ai", "note_evaluateur", "final_scores",
+)
 def get_final_scores():
     rows = (
         db.session.query(
@@ -479,19 +520,35 @@ def get_final_scores():
 
 @admin_bp.route("/formule", methods=["GET"])
 @role_required('ADMIN')
+@versioned_etag("global_settings")
 def get_global_formule():
-    row = GlobalSettings.query.first()
-    if not row:
-        row = GlobalSettings(human_weight=70, ai_weight=30)
-        db.session.add(row)
-        db.session.commit()
-    return jsonify(human=row.human_weight, ai=row.ai_weight), 200
+    settings = get_settings()
+    return jsonify(
+        human=settings.weights.human,
+        ai=settings.weights.ai,
+        expression=settings.expression,
+        variables=FORMULA_VARIABLES,
+    ), 200
 
 
 @admin_bp.route("/formule", methods=["PUT"])
 @role_required('ADMIN')
 def update_global_formule():
+    """Either weights (see ``_parse_formule``) or ``{"expression": "..."}``;
+    an empty expression goes back to the weights."""
     data = request.get_json() or {}
+    if "expression" in data:
+        try:
+            if data["expression"]:
+                formula = update_expression(data["expression"])
+                return jsonify(msg="Formule globale mise à jour", expression=formula.source), 200
+            weights = update_weights(*get_weights())
+            return jsonify(msg="Formule globale mise à jour", human=weights.human, ai=weights.ai,
+                           expression=None), 200
+        except FormulaError as e:
+            db.session.rollback()
+            return jsonify(msg=str(e)), 400
+
     try:
         human, ai = _parse_formule(data)
 
@@ -500,15 +557,7 @@ def update_global_formule():
         if abs((human + ai) - 100.0) > 0.001:
             return jsonify(msg="La somme doit être 100"), 400
 
-        row = GlobalSettings.query.first()
-        if not row:
-            row = GlobalSettings(human_weight=human, ai_weight=ai)
-            db.session.add(row)
-        else:
-            row.human_weight = human
-            row.ai_weight = ai
-
-        db.session.commit()
+        update_weights(human, ai)
         return jsonify(msg="Formule globale mise à jour", human=human, ai=ai), 200
 
     except Exception as e:
@@ -516,6 +565,102 @@ def update_global_formule():
         return jsonify(msg=str(e)), 400
 
 
+@admin_bp.route("/formule/simulate", methods=["POST"])
+@role_required('ADMIN')
+@replica_reads("candidats", "filieres", "score_ai", "note_evaluateur", "global_settings")
+def simulate_formule():
+    """What-if run of several formulas against the current one; nothing is
+    written. Body::
+
+        {"scenarios": [{"human": 60, "ai": 40}, "50*human 50*AI",
+                       {"expression": "clamp(jury_median + trend, 0, 20)"}],
+         "places": 30 | {"Bachelor ISITW": 30},   # admitted = top N per filière
+         "threshold": 10}                          # used when places is absent
+    """
+    data = request.get_json() or {}
+    raw = data.get("scenarios")
+    if not isinstance(raw, list) or not raw:
+        return jsonify(msg="scenarios doit être une liste non vide"), 400
+    if len(raw) > MAX_SCENARIOS:
+        return jsonify(msg=f"Au plus {MAX_SCENARIOS} scénarios"), 400
+
+    scenarios = []
+    for item in raw:
+        if isinstance(item, dict) and "expression" in item:
+            try:
+                scenarios.append(({}, compile_formula(item["expression"])))
+            except FormulaError as e:
+                return jsonify(msg=f"Scénario invalide ({item['expression']}): {e}"), 400
+            continue
+        try:
+            human, ai = _parse_formule({"formule": item})
+        except (TypeError, ValueError) as e:
+            return jsonify(msg=f"Scénario invalide ({item}): {e}"), 400
+        if not (0 <= human <= 100) or not (0 <= ai <= 100) or abs((human + ai) - 100.0) > 0.001:
+            return jsonify(msg=f"Scénario invalide ({item}): poids entre 0 et 100, somme 100"), 400
+        scenarios.append(({"human": human, "ai": ai}, weights_formula(human, ai)))
+
+    places = data.get("places")
+    try:
+        if isinstance(places, dict):
+            places = {str(k): int(v) for k, v in places.items()}
+        elif places is not None:
+            places = int(places)
+        threshold = float(data.get("threshold", 10))
+    except (TypeError, ValueError):
+        return jsonify(msg="places doit être un entier (ou un entier par filière), threshold un nombre"), 400
+
+    return jsonify(simulate(scenarios, places=places, threshold=threshold)), 200
+
+
+# ---------------------------------------------------------------------------
+# Contact messages
+# ---------------------------------------------------------------------------
+
+@admin_bp.route("/contact-messages", methods=["GET"])
+@role_required('ADMIN')
+def list_contact_messages():
+    """Newest first; pass the returned ``next_cursor`` as ``cursor`` to get
+    the following page. ``unread=1`` lists unread messages only."""
+    limit = max(1, min(request.args.get("limit", 50, type=int), 200))
+    unread_only = request.args.get("unread", "0") in ("1", "true")
+    try:
+        rows, next_cursor = contact_inbox.page(request.args.get("cursor"), limit, unread_only)
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
+
+    return jsonify(
+        messages=[_contact_dict(m) for m in rows],
+        next_cursor=next_cursor,
+        unread=contact_inbox.unread_count(),
+    ), 200
+
+
+@admin_bp.route("/contact-messages/unread-count", methods=["GET"])
+@role_required('ADMIN')
+@versioned_etag("contact_messages")
+def contact_unread_count():
+    return jsonify(unread=contact_inbox.unread_count()), 200
+
+
+@admin_bp.route("/contact-messages/read", methods=["POST"])
+@role_required('ADMIN')
+def mark_contact_messages_read():
+    """Body: ``{"from_id": 10, "to_id": 42, "is_read": true}`` (bounds
+    inclusive; ``is_read`` defaults to true, false marks them unread)."""
+    data = request.get_json() or {}
+    try:
+        from_id = int(data["from_id"])
+        to_id = int(data.get("to_id", from_id))
+    except (KeyError, TypeError, ValueError):
+        return jsonify(msg="from_id et to_id doivent être des entiers"), 400
+    if from_id > to_id:
+        return jsonify(msg="from_id doit être inférieur ou égal à to_id"), 400
+
+    updated = contact_inbox.mark_read(from_id, to_id, bool(data.get("is_read", True)))
+    return jsonify(updated=updated, unread=contact_inbox.unread_count()), 200
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -532,6 +677,17 @@ def _user_dict(u: User) -> dict:
     }
 
 
+def _contact_dict(m: ContactMessage) -> dict:
+    return {
+        "id": m.id,
+        "name": m.name,
+        "email": m.email,
+        "message": m.message,
+        "created_at": m.created_at.isoformat() if m.created_at else None,
+        "is_read": m.is_read,
+    }
+
+
 def _parse_formule(payload: dict) -> tuple[float, float]:
     """
     Accept either:
@@ -0,0 +1,234 @@
+"""
+ASGI deployment path for the Flask app.
+
+``create_asgi_app`` wraps ``create_app`` so the API can run under an ASGI
+server (``uvicorn asgi:application``, see back-end/asgi.py):
+
+  - Request bodies are received on the event loop and spooled (in memory
+    up to ``ASGI_SPOOL_MAX_MEMORY``, then to disk) before a worker thread
+    is involved, so a slow client uploading documents no longer holds a
+    thread. Bodies above ``MAX_CONTENT_LENGTH`` are rejected with 413 while
+    streaming.
+  - The blueprints run unchanged on a thread pool of ``ASGI_THREADS``
+    threads. The thread is released as soon as the view returns; the
+    response is written to the client from the event loop.
+  - ``GET /uploads/<path>`` is served natively: the file is read in chunks
+    off the loop and streamed asynchronously, so slow downloads hold no
+    thread either. Missing files fall through to Flask for the usual 404.
+
+Flask-SQLAlchemy stays synchronous. Database calls run on the pool
+threads, whose count also bounds the connections a process can check
+out, so keep ``ASGI_THREADS`` at or below ``DB_POOL_SIZE`` + ``DB_MAX_OVERFLOW``.
+Uploads served natively do not go through the request hooks and are not
+counted in /metrics.
+"""
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from tempfile import SpooledTemporaryFile
+
+from werkzeug.security import safe_join
+
+from app import create_app
+
+
+UPLOADS_PREFIX = "/uploads/"
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class AsgiApp:
+    """ASGI front for a Flask app: native uploads, everything else bridged."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.threads = flask_app.config.get("ASGI_THREADS", 16)
+        self.spool_max_memory = flask_app.config.get("ASGI_SPOOL_MAX_MEMORY", 1024 * 1024)
+        self.max_body = flask_app.config.get("MAX_CONTENT_LENGTH")
+        self.upload_folder = flask_app.config["UPLOAD_FOLDER"]
+        self.executor = ThreadPoolExecutor(self.threads, thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            if scope["method"] in ("GET", "HEAD") and scope["path"].startswith(UPLOADS_PREFIX):
+                if await self._serve_upload(scope, send):
+                    return
+            await self._call_wsgi(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ------------------------------------------------------------------
+    # Bridged Flask requests
+    # ------------------------------------------------------------------
+
+    async def _call_wsgi(self, scope, receive, send):
+        with SpooledTemporaryFile(max_size=self.spool_max_memory) as body:
+            try:
+                if not await self._receive_body(receive, body):
+                    return  # client went away
+            except BodyTooLarge:
+                await _send_simple(send, 413, b"Request Entity Too Large")
+                return
+            body.seek(0)
+
+            loop = asyncio.get_running_loop()
+            status, headers, chunks = await loop.run_in_executor(
+                self.executor, self._run_wsgi, scope, body
+            )
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+    async def _receive_body(self, receive, body) -> bool:
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return False
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if self.max_body is not None and size > self.max_body:
+                raise BodyTooLarge()
+            body.write(chunk)
+            if not message.get("more_body", False):
+                return True
+
+    def _run_wsgi(self, scope, body):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+
+        result = self.flask_app(_build_environ(scope, body), start_response)
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        if scope["method"] == "HEAD":
+            chunks = []
+        return response["status"], response["headers"], chunks
+
+    # ------------------------------------------------------------------
+    # Native upload serving
+    # ------------------------------------------------------------------
+
+    async def _serve_upload(self, scope, send) -> bool:
+        """Stream an uploaded file; False when Flask should answer instead."""
+        filename = scope["path"][len(UPLOADS_PREFIX):]
+        path = safe_join(self.upload_folder, filename)
+        if path is None or not os.path.isfile(path):
+            return False
+
+        loop = asyncio.get_running_loop()
+        stat = os.stat(path)
+        headers = [
+            (b"content-type", b"application/pdf"),
+            (b"content-length", str(stat.st_size).encode()),
+            (b"last-modified", formatdate(stat.st_mtime, usegmt=True).encode()),
+            (b"cache-control", b"no-cache"),
+        ]
+
+        since = _header(scope, b"if-modified-since")
+        if since and _not_modified(since, stat.st_mtime):
+            await send({"type": "http.response.start", "status": 304, "headers": headers[2:]})
+            await send({"type": "http.response.body", "body": b""})
+            return True
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return True
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, FILE_CHUNK_SIZE)
+                more = len(chunk) == FILE_CHUNK_SIZE
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+                if not more:
+                    break
+        return True
+
+
+def create_asgi_app(config_class="config.Config") -> AsgiApp:
+    return AsgiApp(create_app(config_class))
+
+
+def _build_environ(scope, body) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1")
+        value = value.decode("latin-1")
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name == "content-length":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _not_modified(since: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+async def _send_simple(send, status: int, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,9 +1,24 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token
+import logging
+import math
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, get_jwt, get_jwt_identity,
+    jwt_required,
+)
+from jwt.exceptions import PyJWTError
+from sqlalchemy.exc import IntegrityError
 
 from app import db
 from app.models.user_models import Role, User
-from app.utils.helpers import hash_password, verify_password
+from app.services import rate_limit
+from app.services.auth_service import authenticate
+from app.services.token_denylist import revoke_token, revoke_user
+from app.utils.helpers import (
+    USER_UNIQUE_MESSAGES, client_ip, duplicate_field, hash_password, normalize_email,
+)
+
+logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -27,34 +42,36 @@ def register():
     if len(data["password"]) < 8:
         return jsonify(msg="Mot de passe trop court (min 8 caractères)."), 400
 
-    if User.query.filter(
-        (User.email == data["email"]) |
-        (User.cin == data["cin"]) |
-        (User.phone_num == data["phone_num"])
-    ).first():
-        return jsonify(msg="Email, CIN ou téléphone déjà utilisé."), 400
+    user = User(
+        nom=data["nom"].strip(),
+        prenom=data["prenom"].strip(),
+        email=normalize_email(data["email"]),
+        password=hash_password(data["password"]),
+        cin=data["cin"],
+        phone_num=data["phone_num"],
+        role_id=role.id
+    )
 
+    # The unique indexes are the duplicate check: correct under concurrent
+    # registrations and one round trip instead of two.
     try:
-        user = User(
-            nom=data["nom"].strip(),
-            prenom=data["prenom"].strip(),
-            email=data["email"].lower(),
-            password=hash_password(data["password"]),
-            cin=data["cin"],
-            phone_num=data["phone_num"],
-            role_id=role.id
-        )
-
         db.session.add(user)
         db.session.commit()
-
         return jsonify(msg="Utilisateur enregistré avec succès."), 201
 
+    except IntegrityError as e:
+        db.session.rollback()
+        field = duplicate_field(e, USER_UNIQUE_MESSAGES)
+        if field:
+            return jsonify(msg=f"{USER_UNIQUE_MESSAGES[field]}.", field=field), 400
+        logger.exception("Registration failed")
+        return jsonify(msg="Erreur lors de l'enregistrement."), 500
+
     except Exception:
         db.session.rollback()
+        logger.exception("Registration failed")
         return jsonify(msg="Erreur lors de l'enregistrement."), 500
 
-    
 
 @auth_bp.route("/login", methods=["POST"])
 def login():
@@ -63,25 +80,78 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
-    if not email or not password:
+    if not email or not password or not isinstance(email, str) or not isinstance(password, str):
         return jsonify(msg="Email et mot de passe requis."), 400
+    email = normalize_email(email)
+
+    # Limits are checked before any hashing so floods stay cheap. The
+    # email bucket is per (email, IP) and only charged on a wrong password,
+    # so guessing from elsewhere cannot lock the account owner out.
+    cfg = current_app.config
+    ip = client_ip()
+    email_limit = ("login_email", f"{email}|{ip}",
+                   cfg.get("LOGIN_EMAIL_BURST", 5), cfg.get("LOGIN_EMAIL_PER_MINUTE", 3))
+    wait = max(
+        rate_limit.hit("login_ip", ip,
+                       cfg.get("LOGIN_IP_BURST", 0), cfg.get("LOGIN_IP_PER_MINUTE", 60)),
+        rate_limit.check(*email_limit),
+    )
+    if wait:
+        response = jsonify(msg="Trop de tentatives de connexion. Réessayez plus tard.")
+        response.headers["Retry-After"] = str(math.ceil(wait))
+        return response, 429
 
-    user = User.query.filter_by(email=email).first()
+    user = authenticate(email, password)
 
-    if not user or not verify_password(password, user.password):
+    if not user:
+        rate_limit.hit(*email_limit)
         return jsonify(msg="Identifiants invalides."), 401
 
-    access_token = create_access_token(
-        identity=str(user.id),
-        additional_claims={
-            "role": user.role.role_name,
-            "nom": user.nom,
-            "prenom": user.prenom
-        }
-    )
-
+    claims = {"role": user.role_name, "nom": user.nom, "prenom": user.prenom}
     return jsonify(
-        access_token=access_token,
-        role=user.role.role_name,
+        access_token=create_access_token(identity=str(user.id), additional_claims=claims),
+        refresh_token=create_refresh_token(identity=str(user.id), additional_claims=claims),
+        role=user.role_name,
         msg="Connexion réussie."
     ), 200
+
+
+@auth_bp.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    """Exchange a refresh token for a new access/refresh pair (rotation).
+
+    Claims are carried over from the refresh token, so renewal needs no
+    database query or password hash. Role changes revoke the user's tokens.
+    """
+    payload = get_jwt()
+    identity = get_jwt_identity()
+
+    # Two concurrent uses of the same refresh token: only one may rotate it
+    if not revoke_token(payload):
+        revoke_user(identity)
+        return jsonify(msg="Session expirée, veuillez vous reconnecter."), 401
+
+    claims = {k: payload[k] for k in ("role", "nom", "prenom") if k in payload}
+    return jsonify(
+        access_token=create_access_token(identity=identity, additional_claims=claims),
+        refresh_token=create_refresh_token(identity=identity, additional_claims=claims),
+        role=claims.get("role"),
+    ), 200
+
+
+@auth_bp.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    revoke_token(get_jwt())
+
+    refresh_token = (request.get_json(silent=True) or {}).get("refresh_token")
+    if refresh_token:
+        try:
+            refresh_payload = decode_token(refresh_token, allow_expired=True)
+        except PyJWTError:
+            refresh_payload = None
+        if refresh_payload and refresh_payload.get("sub") == get_jwt_identity():
+            revoke_token(refresh_payload)
+
+    return jsonify(msg="Déconnexion réussie."), 200
@@ -6,7 +6,8 @@ from flask_jwt_extended import get_jwt_identity
 
 from app import db
 from app.models.user_models import Candidat, Documents, Eligibilite, Filiere, FinalScore
-from app.utils.decorators import role_required
+from app.services.ml_service import submit_for_scoring
+from app.utils.decorators import role_required, versioned_etag
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +54,7 @@ def apply():
 
 @candidate_bp.route("/eligible-programs", methods=["GET"])
 @role_required('CANDIDAT')
+@versioned_etag("candidats", "eligibilites", "filieres", per_user=True)
 def eligible_programs():
     user_id = get_jwt_identity()
 
@@ -97,6 +99,9 @@ def select_filiere():
     candidat.filiere_id = data["filiere_id"]
     candidat.status = "SUBMITTED"
     db.session.commit()
+
+    if current_app.config.get("ML_REALTIME_SCORING"):
+        submit_for_scoring(candidat.id)
     return jsonify(msg="Filière sélectionnée avec succès")
 
 
@@ -5,14 +5,18 @@ from flask_jwt_extended import get_jwt_identity
 
 from app import db
 from app.models.user_models import (
-    Candidat, Documents, Evaluateur, Filiere, NoteEvaluateur, User,
+    Affectation, Candidat, Documents, Evaluateur, Filiere, NoteEvaluateur, User,
 )
-from app.utils.decorators import role_required
+from app.services.assignment_service import assigned_among, queues_enabled
+from app.utils.decorators import replica_reads, role_required
 
 logger = logging.getLogger(__name__)
 
 evaluateur_bp = Blueprint("evaluateur", __name__, url_prefix="/api/evaluateur")
 
+MAX_BATCH_NOTES = 500
+NOT_ASSIGNED = "Ce candidat ne vous est pas affecté"
+
 
 @evaluateur_bp.route("/candidates/<int:candidat_id>", methods=["GET"])
 @role_required('EVALUATEUR')
@@ -24,6 +28,8 @@ def get_candidate_details(candidat_id):
     c = Candidat.query.get(candidat_id)
     if not c:
         return jsonify(msg="Candidat introuvable"), 404
+    if not assigned_among(ev.id, [c.id]):
+        return jsonify(msg=NOT_ASSIGNED), 403
 
     u = User.query.get(c.user_id)
     filiere = Filiere.query.get(c.filiere_id) if c.filiere_id else None
@@ -68,6 +74,9 @@ def get_candidate_details(candidat_id):
 
 @evaluateur_bp.route("/candidates", methods=["GET"])
 @role_required('EVALUATEUR')
+@replica_reads(
+    "evaluateurs", "candidats", "users", "filieres", "affectations", "note_evaluateur",
+)
 def list_candidates():
     ev = Evaluateur.query.filter_by(user_id=int(get_jwt_identity())).first()
     if not ev:
@@ -83,6 +92,14 @@ def list_candidates():
         .filter(Candidat.filiere_id.isnot(None))
     )
 
+    # Once the admin has run the assignment engine, each evaluator only
+    # sees their own queue (served by the unique_affectation index).
+    if queues_enabled():
+        q = q.join(
+            Affectation,
+            (Affectation.candidat_id == Candidat.id) & (Affectation.evaluateur_id == ev.id),
+        )
+
     if status:
         q = q.filter(Candidat.status == status)
     if filiere_id:
@@ -147,6 +164,9 @@ def submit_note():
     if candidat.status != "SUBMITTED":
         return jsonify(msg="Ce candidat n'est pas prêt pour évaluation"), 400
 
+    if not assigned_among(ev.id, [candidat.id]):
+        return jsonify(msg=NOT_ASSIGNED), 403
+
     if NoteEvaluateur.query.filter_by(evaluateur_id=ev.id, candidat_id=candidat.id).first():
         return jsonify(msg="Vous avez déjà évalué ce candidat"), 400
 
@@ -164,6 +184,109 @@ def submit_note():
         return jsonify(msg=str(e)), 400
 
 
+@evaluateur_bp.route("/notes/batch", methods=["POST"])
+@role_required('EVALUATEUR')
+def submit_notes_batch():
+    """Insert or update many notes for the current evaluator in one transaction.
+
+    Body: { "notes": [ { "candidat_id": 1, "note_eval": 14.5 }, ... ] }
+    Candidate statuses and existing notes are each loaded with a single IN
+    query; every item gets its own result entry.
+    """
+    ev = Evaluateur.query.filter_by(user_id=int(get_jwt_identity())).first()
+    if not ev:
+        return jsonify(msg="Profil évaluateur introuvable"), 404
+
+    data = request.get_json() or {}
+    items = data.get("notes")
+    if not isinstance(items, list) or not items:
+        return jsonify(msg="notes doit être une liste non vide"), 400
+    if len(items) > MAX_BATCH_NOTES:
+        return jsonify(msg=f"Maximum {MAX_BATCH_NOTES} notes par requête"), 400
+
+    results = [None] * len(items)
+    valid = {}
+
+    for i, item in enumerate(items):
+        candidat_id = item.get("candidat_id") if isinstance(item, dict) else None
+        note_eval = item.get("note_eval") if isinstance(item, dict) else None
+
+        if candidat_id is None or note_eval is None:
+            results[i] = _batch_error(candidat_id, "candidat_id et note_eval sont requis")
+            continue
+        try:
+            candidat_id = int(candidat_id)
+            note_eval = float(note_eval)
+        except (ValueError, TypeError):
+            results[i] = _batch_error(candidat_id, "candidat_id ou note_eval invalide")
+            continue
+        if not (0 <= note_eval <= 20):
+            results[i] = _batch_error(candidat_id, "La note doit être entre 0 et 20.")
+            continue
+        if candidat_id in valid:
+            results[i] = _batch_error(candidat_id, "Candidat dupliqué dans la requête")
+            continue
+
+        valid[candidat_id] = (i, note_eval)
+
+    statuses = dict(
+        db.session.query(Candidat.id, Candidat.status)
+        .filter(Candidat.id.in_(list(valid)))
+        .all()
+    ) if valid else {}
+    assigned = assigned_among(ev.id, valid)
+    existing = {
+        n.candidat_id: n
+        for n in NoteEvaluateur.query.filter(
+            NoteEvaluateur.evaluateur_id == ev.id,
+            NoteEvaluateur.candidat_id.in_(list(valid)),
+        ).all()
+    } if valid else {}
+
+    created = updated = 0
+
+    for candidat_id, (i, note_eval) in valid.items():
+        status = statuses.get(candidat_id)
+        if status is None:
+            results[i] = _batch_error(candidat_id, "Candidat introuvable")
+            continue
+        if status != "SUBMITTED":
+            results[i] = _batch_error(candidat_id, "Ce candidat n'est pas prêt pour évaluation")
+            continue
+        if candidat_id not in assigned:
+            results[i] = _batch_error(candidat_id, NOT_ASSIGNED)
+            continue
+
+        row = existing.get(candidat_id)
+        if row:
+            row.note_eval = note_eval
+            results[i] = {"candidat_id": candidat_id, "status": "updated"}
+            updated += 1
+        else:
+            db.session.add(NoteEvaluateur(
+                evaluateur_id=ev.id,
+                candidat_id=candidat_id,
+                note_eval=note_eval,
+            ))
+            results[i] = {"candidat_id": candidat_id, "status": "created"}
+            created += 1
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Batch note submission failed")
+        return jsonify(msg=str(e)), 400
+
+    return jsonify(
+        msg="Notes traitées",
+        created=created,
+        updated=updated,
+        errors=len(items) - created - updated,
+        results=results,
+    ), 200
+
+
 @evaluateur_bp.route("/notes/<int:candidat_id>", methods=["PUT"])
 @role_required('EVALUATEUR')
 def update_my_note(candidat_id):
@@ -186,6 +309,8 @@ def update_my_note(candidat_id):
     ).first()
     if not row:
         return jsonify(msg="Aucune note trouvée pour ce candidat"), 404
+    if not assigned_among(ev.id, [candidat_id]):
+        return jsonify(msg=NOT_ASSIGNED), 403
 
     try:
         row.note_eval = note_eval
@@ -214,3 +339,11 @@ def my_notes():
         {"note_id": n.id, "candidat_id": n.candidat_id, "note_eval": n.note_eval}
         for n in notes
     ]), 200
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _batch_error(candidat_id, msg: str) -> dict:
+    return {"candidat_id": candidat_id, "status": "error", "msg": msg}
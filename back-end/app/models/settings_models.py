@@ -9,6 +9,11 @@ class GlobalSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     human_weight = db.Column(db.Float, nullable=False, default=70.0)
     ai_weight = db.Column(db.Float, nullable=False, default=30.0)
+    # Score formula (app.services.formula); NULL means the weights above
+    expression = db.Column(db.Text)
+    # Incremented by every update; app.services.settings_service compares it
+    # to its cached copy
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     @validates("human_weight", "ai_weight")
     def validate_weights(self, key, value):
@@ -27,3 +32,9 @@ class ContactMessage(db.Model):
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_read = db.Column(db.Boolean, default=False, nullable=False)
+
+    # Inbox pages (all / unread only) are range scans in (created_at, id) order
+    __table_args__ = (
+        db.Index("ix_contact_messages_created_at_id", "created_at", "id"),
+        db.Index("ix_contact_messages_is_read_created_at_id", "is_read", "created_at", "id"),
+    )
@@ -22,11 +22,24 @@ class User(db.Model):
     evaluateur = db.relationship("Evaluateur", backref="user", uselist=False, cascade="all, delete-orphan")
     candidat = db.relationship("Candidat", backref="user", uselist=False, cascade="all, delete-orphan")
 
+evaluateur_filieres = db.Table(
+    "evaluateur_filieres",
+    db.Column("evaluateur_id", db.Integer, db.ForeignKey("evaluateurs.id"), primary_key=True),
+    db.Column("filiere_id", db.Integer, db.ForeignKey("filieres.id"), primary_key=True),
+)
+
 class Evaluateur(db.Model):
     __tablename__ = "evaluateurs"
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, unique=True)
     formule = db.Column(db.String(50))
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+
+    # Empty means the evaluator can grade candidates of any filiere
+    filieres = db.relationship("Filiere", secondary=evaluateur_filieres, lazy=True)
+    affectations = db.relationship(
+        "Affectation", backref="evaluateur", lazy=True, cascade="all, delete-orphan"
+    )
 
 
 class Candidat(db.Model):
@@ -53,6 +66,12 @@ class Candidat(db.Model):
     )
     scores_ai = db.relationship("ScoreAI", backref="candidat", lazy=True)
     notes_eval = db.relationship("NoteEvaluateur", backref="candidat", lazy=True)
+    features = db.relationship(
+        "CandidatFeatures",
+        backref="candidat",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
 
     @validates('moy_bac', 'm_s1', 'm_s2', 'm_s3', 'm_s4')
     def validate_grades(self, key, value):
@@ -73,6 +92,24 @@ class Documents(db.Model):
     candidat_id = db.Column(db.Integer, db.ForeignKey("candidats.id"), nullable=False, unique=True)
 
 
+# Model inputs in pipeline column order, kept in sync on flush by
+# app.services.feature_store. A row only exists for complete profiles.
+class CandidatFeatures(db.Model):
+    __tablename__ = "candidat_features"
+    candidat_id = db.Column(db.Integer, db.ForeignKey("candidats.id"), primary_key=True)
+    filiere_id = db.Column(db.Integer, db.ForeignKey("filieres.id"), nullable=False, index=True)
+    t_diplome = db.Column(db.String(50), nullable=False)
+    branche_diplome = db.Column(db.String(100), nullable=False)
+    bac_type = db.Column(db.String(50), nullable=False)
+    filiere = db.Column(db.String(100), nullable=False)
+    moy_bac = db.Column(db.Float, nullable=False)
+    m_s1 = db.Column(db.Float, nullable=False)
+    m_s2 = db.Column(db.Float, nullable=False)
+    m_s3 = db.Column(db.Float, nullable=False)
+    m_s4 = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class ScoreAI(db.Model):
     __tablename__ = "score_ai"
     id = db.Column(db.Integer, primary_key=True)
@@ -97,6 +134,53 @@ class NoteEvaluateur(db.Model):
         return value
 
 
+# Note summaries for the evaluator analytics, kept in sync on flush by
+# app.services.evaluator_analytics. A row only exists while it counts notes.
+class EvaluateurNoteStats(db.Model):
+    __tablename__ = "evaluateur_note_stats"
+    evaluateur_id = db.Column(db.Integer, db.ForeignKey("evaluateurs.id"), primary_key=True)
+    note_count = db.Column(db.Integer, nullable=False, default=0)
+    note_sum = db.Column(db.Float, nullable=False, default=0.0)
+    note_sum_sq = db.Column(db.Float, nullable=False, default=0.0)
+
+
+# One row per pair of evaluators (evaluateur_a < evaluateur_b) over the
+# candidates both noted; the "a" columns hold evaluateur_a's notes.
+class EvaluateurPairStats(db.Model):
+    __tablename__ = "evaluateur_pair_stats"
+    evaluateur_a = db.Column(db.Integer, db.ForeignKey("evaluateurs.id"), primary_key=True)
+    evaluateur_b = db.Column(db.Integer, db.ForeignKey("evaluateurs.id"), primary_key=True)
+    shared_count = db.Column(db.Integer, nullable=False, default=0)
+    a_sum = db.Column(db.Float, nullable=False, default=0.0)
+    b_sum = db.Column(db.Float, nullable=False, default=0.0)
+    a_sum_sq = db.Column(db.Float, nullable=False, default=0.0)
+    b_sum_sq = db.Column(db.Float, nullable=False, default=0.0)
+    ab_sum = db.Column(db.Float, nullable=False, default=0.0)
+    abs_diff_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class CandidatNoteStats(db.Model):
+    __tablename__ = "candidat_note_stats"
+    candidat_id = db.Column(db.Integer, db.ForeignKey("candidats.id"), primary_key=True)
+    note_count = db.Column(db.Integer, nullable=False)
+    note_mean = db.Column(db.Float, nullable=False)
+    note_std = db.Column(db.Float, nullable=False, index=True)
+    note_min = db.Column(db.Float, nullable=False)
+    note_max = db.Column(db.Float, nullable=False)
+
+
+class Affectation(db.Model):
+    __tablename__ = "affectations"
+    id = db.Column(db.Integer, primary_key=True)
+    evaluateur_id = db.Column(db.Integer, db.ForeignKey("evaluateurs.id"), nullable=False)
+    candidat_id = db.Column(db.Integer, db.ForeignKey("candidats.id"), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("evaluateur_id", "candidat_id", name="unique_affectation"),
+    )
+
+
 class FinalScore(db.Model):
     __tablename__ = "final_scores"
     id = db.Column(db.Integer, primary_key=True)
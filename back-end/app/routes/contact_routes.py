@@ -1,10 +1,11 @@
 import logging
+import math
 import re
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
-from app import db
-from app.models.settings_models import ContactMessage
+from app.services import contact_ingest, rate_limit
+from app.utils.helpers import client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -12,39 +13,64 @@ contact_bp = Blueprint("contact", __name__)
 
 EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
 
+# Column sizes of contact_messages
+NAME_MAX = 120
+EMAIL_MAX = 120
+
 
 @contact_bp.route("/api/contact", methods=["POST"])
 def submit_contact():
-    data = request.get_json() or {}
+    cfg = current_app.config
+    wait = rate_limit.hit("contact_ip", client_ip(),
+                          cfg.get("CONTACT_IP_BURST", 5), cfg.get("CONTACT_IP_PER_MINUTE", 2))
+    if wait:
+        response = jsonify(msg="Trop de messages envoyés. Réessayez plus tard.")
+        response.headers["Retry-After"] = str(math.ceil(wait))
+        return response, 429
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
 
-    name = (data.get("name") or "").strip()
-    email = (data.get("email") or "").strip().lower()
-    message = (data.get("message") or "").strip()
+    name = str(data.get("name") or "").strip()
+    email = str(data.get("email") or "").strip().lower()
+    message = str(data.get("message") or "").strip()
 
     # ── Validation ─────────────────────────────────────────────────────────
     errors = {}
     if not name:
         errors["name"] = "Le nom est requis."
+    elif len(name) > NAME_MAX:
+        errors["name"] = f"Le nom ne doit pas dépasser {NAME_MAX} caractères."
     if not email:
         errors["email"] = "L'email est requis."
-    elif not EMAIL_RE.match(email):
+    elif len(email) > EMAIL_MAX or not EMAIL_RE.match(email):
         errors["email"] = "Adresse email invalide."
     if not message:
         errors["message"] = "Le message est requis."
     elif len(message) < 10:
         errors["message"] = "Le message doit contenir au moins 10 caractères."
+    elif len(message) > cfg.get("CONTACT_MESSAGE_MAX", 5000):
+        errors["message"] = (
+            f"Le message ne doit pas dépasser {cfg.get('CONTACT_MESSAGE_MAX', 5000)} caractères."
+        )
 
     if errors:
         return jsonify(msg="Validation échouée.", errors=errors), 422
 
-    # ── Persist ────────────────────────────────────────────────────────────
+    # ── Queue ──────────────────────────────────────────────────────────────
+    # Stored in batches by app.services.contact_ingest; a duplicate of a
+    # recent message gets the same answer but is not stored again.
     try:
-        contact = ContactMessage(name=name, email=email, message=message)
-        db.session.add(contact)
-        db.session.commit()
-        logger.info("New contact message from %s (%s)", name, email)
-        return jsonify(msg="Message envoyé avec succès. Nous vous répondrons bientôt."), 201
+        result = contact_ingest.submit(name, email, message)
     except Exception:
-        db.session.rollback()
-        logger.exception("Failed to save contact message")
+        logger.exception("Failed to queue contact message")
         return jsonify(msg="Une erreur est survenue. Veuillez réessayer."), 500
+
+    if result == contact_ingest.FULL:
+        response = jsonify(msg="Service momentanément surchargé. Réessayez dans un instant.")
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    logger.info("Contact message from %s (%s): %s", name, email, result)
+    return jsonify(msg="Message envoyé avec succès. Nous vous répondrons bientôt."), 202
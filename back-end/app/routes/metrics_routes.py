@@ -0,0 +1,30 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+
+from app.utils.decorators import role_required
+from app.utils.instrumentation import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Scraped with ``Authorization: Bearer <METRICS_TOKEN>`` when a token is
+    configured; otherwise only an ADMIN access token is accepted."""
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        return _admin_metrics()
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return Response("unauthorized\n", status=401, mimetype="text/plain")
+    return _render()
+
+
+@role_required('ADMIN')
+def _admin_metrics():
+    return _render()
+
+
+def _render():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
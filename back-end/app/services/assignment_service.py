@@ -0,0 +1,158 @@
+"""
+Assignment service — distributes submitted candidates across evaluators.
+
+Each SUBMITTED candidate should be graded by ``k`` distinct active
+evaluators. Evaluators with filiere specialities only receive candidates
+from those filieres; evaluators without specialities accept any filiere.
+Slots are always filled with the least-loaded eligible evaluator, and the
+engine only creates the assignments that are missing, so re-running it
+after new submissions or after an evaluator is released is incremental.
+"""
+import heapq
+import logging
+from collections import defaultdict
+
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models.user_models import Affectation, Candidat, Evaluateur, NoteEvaluateur
+
+logger = logging.getLogger(__name__)
+
+
+def assign_candidates(k: int, candidate_ids=None) -> dict:
+    """Create the missing assignments so every candidate has ``k`` evaluators.
+
+    ``candidate_ids`` restricts the run to a subset of candidates (used
+    after a release). Does not commit; the caller owns the transaction.
+    """
+    evaluators = (
+        Evaluateur.query
+        .options(selectinload(Evaluateur.filieres))
+        .filter(Evaluateur.is_active.is_(True))
+        .all()
+    )
+
+    load = dict(
+        db.session.query(Affectation.evaluateur_id, func.count(Affectation.id))
+        .group_by(Affectation.evaluateur_id)
+        .all()
+    )
+    for ev in evaluators:
+        load.setdefault(ev.id, 0)
+
+    generalists = [ev.id for ev in evaluators if not ev.filieres]
+    pool_by_filiere = defaultdict(lambda: list(generalists))
+    for ev in evaluators:
+        for f in ev.filieres:
+            pool_by_filiere[f.id].append(ev.id)
+
+    q = Candidat.query.filter(
+        Candidat.status == "SUBMITTED",
+        Candidat.filiere_id.isnot(None),
+    )
+    if candidate_ids is not None:
+        q = q.filter(Candidat.id.in_(candidate_ids))
+    candidates = q.order_by(Candidat.id).all()
+
+    assigned = defaultdict(set)
+    for a in Affectation.query.filter(
+        Affectation.candidat_id.in_([c.id for c in candidates])
+    ).all():
+        assigned[a.candidat_id].add(a.evaluateur_id)
+
+    created = understaffed = 0
+
+    for c in candidates:
+        current = assigned[c.id]
+        needed = k - len(current)
+        if needed <= 0:
+            continue
+
+        pool = [ev_id for ev_id in pool_by_filiere[c.filiere_id] if ev_id not in current]
+        chosen = heapq.nsmallest(needed, pool, key=lambda ev_id: (load[ev_id], ev_id))
+
+        for ev_id in chosen:
+            db.session.add(Affectation(evaluateur_id=ev_id, candidat_id=c.id))
+            load[ev_id] += 1
+            current.add(ev_id)
+        created += len(chosen)
+
+        if len(chosen) < needed:
+            understaffed += 1
+
+    logger.info(
+        "Assignment run: k=%d candidates=%d created=%d understaffed=%d",
+        k, len(candidates), created, understaffed,
+    )
+    return {
+        "candidates": len(candidates),
+        "created": created,
+        "understaffed": understaffed,
+        "load": load,
+    }
+
+
+def queues_enabled() -> bool:
+    """True once the assignment engine has run: from then on evaluators only
+    see and grade the candidates assigned to them."""
+    return db.session.query(Affectation.id).first() is not None
+
+
+def assigned_among(evaluateur_id: int, candidate_ids) -> set:
+    """The subset of ``candidate_ids`` the evaluator may grade."""
+    candidate_ids = set(candidate_ids)
+    if not candidate_ids or not queues_enabled():
+        return candidate_ids
+    return {
+        cid for (cid,) in db.session.query(Affectation.candidat_id).filter(
+            Affectation.evaluateur_id == evaluateur_id,
+            Affectation.candidat_id.in_(candidate_ids),
+        )
+    }
+
+
+def release_evaluator(evaluateur: Evaluateur, k: int) -> dict:
+    """Deactivate an evaluator and hand their ungraded candidates to others.
+
+    Assignments the evaluator already graded are kept so their notes stay
+    attributable; only pending ones are removed and refilled. Does not
+    commit; the caller owns the transaction.
+    """
+    evaluateur.is_active = False
+    return _reassign_pending(evaluateur, k)
+
+
+def release_uncovered(evaluateur: Evaluateur, k: int) -> dict:
+    """After a change of specialities, hand the evaluator's ungraded
+    candidates in filieres they no longer cover to others.
+
+    Does not commit; the caller owns the transaction.
+    """
+    if not evaluateur.filieres:
+        return {"released": 0, "created": 0, "understaffed": 0}
+    return _reassign_pending(evaluateur, k, keep_filieres=[f.id for f in evaluateur.filieres])
+
+
+def _reassign_pending(evaluateur: Evaluateur, k: int, keep_filieres=None) -> dict:
+    graded = db.session.query(NoteEvaluateur.candidat_id).filter(
+        NoteEvaluateur.evaluateur_id == evaluateur.id
+    )
+    q = Affectation.query.filter(
+        Affectation.evaluateur_id == evaluateur.id,
+        Affectation.candidat_id.notin_(graded),
+    )
+    if keep_filieres is not None:
+        outside = db.session.query(Candidat.id).filter(Candidat.filiere_id.notin_(keep_filieres))
+        q = q.filter(Affectation.candidat_id.in_(outside))
+    pending = q.all()
+
+    candidate_ids = [a.candidat_id for a in pending]
+    for a in pending:
+        db.session.delete(a)
+    db.session.flush()
+
+    result = assign_candidates(k, candidate_ids=candidate_ids)
+    result["released"] = len(candidate_ids)
+    return result
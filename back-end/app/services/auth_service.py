@@ -0,0 +1,102 @@
+"""
+Auth service — credential verification for the login endpoint.
+
+``authenticate`` loads the password hash, names and role of a user in one
+joined, column-only query and verifies the password. Unknown emails are
+remembered in a short-lived negative cache (``LOGIN_NEGATIVE_CACHE_SECONDS``)
+so repeated attempts on them skip the database. A cache entry is only
+trusted while the ``users`` table version is unchanged, so a new account
+can log in right after registering, on any worker using the shared
+version store.
+
+Every failed lookup still verifies the password against a dummy hash, so
+a response takes as long for an unknown email as for a wrong password and
+does not reveal which accounts exist.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from flask import current_app
+
+from app import db
+from app.models.user_models import Role, User
+from app.services.data_versions import get_store
+from app.utils.helpers import hash_password, normalize_email, verify_password
+
+NEGATIVE_CACHE_SIZE = 10_000
+
+
+class LoginUser(NamedTuple):
+    id: int
+    nom: str
+    prenom: str
+    role_name: str
+
+
+class NegativeCache:
+    """Bounded TTL set of unknown emails, tagged with the users version."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, email: str, version: int) -> bool:
+        with self._lock:
+            entry = self._data.get(email)
+            if entry is None:
+                return False
+            expires, cached_version = entry
+            if expires < time.monotonic() or cached_version != version:
+                del self._data[email]
+                return False
+            return True
+
+    def add(self, email: str, version: int, ttl: float) -> None:
+        with self._lock:
+            self._data[email] = (time.monotonic() + ttl, version)
+            self._data.move_to_end(email)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_negative_cache = NegativeCache(NEGATIVE_CACHE_SIZE)
+_dummy_hash = None
+_dummy_lock = threading.Lock()
+
+
+def authenticate(email: str, password: str) -> Optional[LoginUser]:
+    """Return the user for valid credentials, None otherwise."""
+    ttl = current_app.config.get("LOGIN_NEGATIVE_CACHE_SECONDS", 60)
+    email = normalize_email(email)
+    users_version = get_store().get(["users"])["users"]
+
+    row = None
+    if not (ttl and _negative_cache.contains(email, users_version)):
+        row = (
+            db.session.query(User.id, User.password, User.nom, User.prenom, Role.role_name)
+            .join(Role, Role.id == User.role_id)
+            .filter(User.email == email)
+            .first()
+        )
+        if row is None and ttl:
+            _negative_cache.add(email, users_version, ttl)
+
+    if row is None:
+        verify_password(password, _get_dummy_hash())
+        return None
+    if not verify_password(password, row.password):
+        return None
+    return LoginUser(row.id, row.nom, row.prenom, row.role_name)
+
+
+def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        with _dummy_lock:
+            if _dummy_hash is None:
+                # Same algorithm and cost as real hashes, so timing matches
+                _dummy_hash = hash_password("dummy-password-for-timing")
+    return _dummy_hash
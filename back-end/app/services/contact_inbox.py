@@ -0,0 +1,93 @@
+"""
+Contact inbox — keyset pagination and a cached unread count for the admin.
+
+Messages are listed newest first by ``(created_at, id)``; ``created_at`` is
+the submission time, which with batched ingestion does not follow ``id``
+(``app.services.contact_ingest``). A page is a range scan on one of the
+composite indexes ``(created_at, id)`` or ``(is_read, created_at, id)``,
+however deep the admin pages.
+
+The unread count is shown on every admin page. It is cached per process
+together with the ``contact_messages`` table version and only recounted
+(an index-only count) after the table changed.
+"""
+import base64
+import threading
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, update
+
+from app import db
+from app.models.settings_models import ContactMessage
+from app.services.data_versions import get_store
+
+_unread_cache = (None, 0)
+_unread_lock = threading.Lock()
+
+
+def encode_cursor(message: ContactMessage) -> str:
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return ``(created_at, id)``; raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Curseur invalide") from e
+
+
+def page(cursor=None, limit=50, unread_only=False):
+    """One page of messages, newest first; returns ``(messages, next_cursor)``."""
+    query = ContactMessage.query
+    if unread_only:
+        query = query.filter(ContactMessage.is_read.is_(False))
+    if cursor:
+        created_at, message_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            ContactMessage.created_at < created_at,
+            and_(ContactMessage.created_at == created_at, ContactMessage.id < message_id),
+        ))
+    rows = (
+        query.order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def mark_read(from_id: int, to_id: int, is_read: bool = True) -> int:
+    """Set ``is_read`` on every message with ``from_id <= id <= to_id``
+    in one statement; returns how many rows changed."""
+    result = db.session.execute(
+        update(ContactMessage)
+        .where(ContactMessage.id.between(from_id, to_id), ContactMessage.is_read.isnot(is_read))
+        .values(is_read=is_read)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def unread_count() -> int:
+    global _unread_cache
+    store = get_store()
+    key = (store.token, store.get(["contact_messages"])["contact_messages"])
+    with _unread_lock:
+        cached_key, count = _unread_cache
+    if cached_key == key:
+        return count
+
+    count = (
+        db.session.query(func.count(ContactMessage.id))
+        .filter(ContactMessage.is_read.is_(False))
+        .scalar()
+    )
+    with _unread_lock:
+        _unread_cache = (key, count)
+    return count
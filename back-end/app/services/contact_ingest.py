@@ -0,0 +1,310 @@
+"""
+Contact ingestion — buffered, batched writes for the public contact form.
+
+``submit_contact`` is unauthenticated, so a burst of messages must not turn
+into one database commit each. Once the route has validated and
+rate-limited a request, ``submit`` records the message in an on-disk spool
+and hands it to a bounded in-process queue. A background thread drains the
+queue in batches of up to ``CONTACT_BATCH_MAX`` messages, waiting at most
+``CONTACT_BATCH_WAIT_MS`` for a batch to fill, inserts them in one
+statement and removes them from the spool.
+
+The spool is a SQLite file at ``CONTACT_SPOOL_PATH`` shared by all workers
+on the host. A spooled message is claimed by the worker that queued it;
+one still there after ``CONTACT_SPOOL_STALE_SECONDS`` (worker killed,
+restart, failed insert) is picked up by the next flusher to look. Every
+flusher looks each ``IDLE_POLL_SECONDS``, busy or idle, so nothing accepted
+is lost or held back while traffic lasts.
+
+The same file holds a TTL set of ``sha256(email, message)`` digests, so an
+identical message resubmitted within ``CONTACT_DEDUPE_SECONDS`` is accepted
+but not stored twice, across workers.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import insert
+
+from app import db
+from app.models.settings_models import ContactMessage
+from app.utils.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED, DUPLICATE, FULL = "queued", "duplicate", "full"
+
+# How often a flusher looks for stale spool entries, and how long an idle
+# one waits for a message before looking
+IDLE_POLL_SECONDS = 2.0
+
+_dropped = Counter()
+_dropped_lock = threading.Lock()
+
+
+class ContactSpool:
+    """Pending messages and recent digests in a SQLite file."""
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._appends = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, email TEXT NOT NULL, "
+            "message TEXT NOT NULL, created_at REAL NOT NULL, claimed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_spool_claimed_at ON spool (claimed_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS recent (digest TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, name, email, message, digest, dedupe_ttl):
+        """Spool a message; return its spool id, or None for a duplicate."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dedupe_ttl > 0:
+                seen = conn.execute(
+                    "SELECT 1 FROM recent WHERE digest = ? AND expires > ?", (digest, now)
+                ).fetchone()
+                if seen:
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.execute(
+                    "INSERT OR REPLACE INTO recent (digest, expires) VALUES (?, ?)",
+                    (digest, now + dedupe_ttl),
+                )
+            spool_id = conn.execute(
+                "INSERT INTO spool (name, email, message, created_at, claimed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, email, message, now, now),
+            ).lastrowid
+            self._appends += 1
+            if self._appends % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM recent WHERE expires < ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return spool_id
+
+    def claim_stale(self, older_than: float, limit: int) -> list:
+        """Take over messages nobody flushed in time; returns spool rows."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, name, email, message, created_at FROM spool "
+                "WHERE claimed_at < ? ORDER BY id LIMIT ?",
+                (now - older_than, limit),
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE spool SET claimed_at = ? WHERE id = ?", [(now, r[0]) for r in rows]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def remove(self, ids) -> None:
+        self._conn().executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+
+    def pending(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+
+class ContactIngestor:
+    """Bounded queue of spooled messages, flushed by one background thread."""
+
+    def __init__(self, app: Flask, spool: ContactSpool):
+        cfg = app.config
+        self.app = app
+        self.spool = spool
+        self.max_batch = cfg.get("CONTACT_BATCH_MAX", 200)
+        self.wait_s = cfg.get("CONTACT_BATCH_WAIT_MS", 500) / 1000.0
+        self.stale_s = cfg.get("CONTACT_SPOOL_STALE_SECONDS", 60)
+        self.dedupe_ttl = cfg.get("CONTACT_DEDUPE_SECONDS", 3600)
+        self._queue = queue.Queue(maxsize=cfg.get("CONTACT_QUEUE_MAX", 1000))
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, name: str, email: str, message: str) -> str:
+        """Spool and queue one message; returns QUEUED, DUPLICATE or FULL."""
+        if self._queue.full():
+            return FULL
+        digest = hashlib.sha256(f"{email}\0{message}".encode()).hexdigest()
+        spool_id = self.spool.append(name, email, message, digest, self.dedupe_ttl)
+        if spool_id is None:
+            return DUPLICATE
+        self.start()
+        try:
+            self._queue.put_nowait((spool_id, name, email, message, time.time()))
+        except queue.Full:
+            pass  # already on the spool, recovered once it goes stale
+        return QUEUED
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="contact-ingest", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is queued and stop the thread (called at exit)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _collect(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=IDLE_POLL_SECONDS)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        next_recovery = time.monotonic()
+        while True:
+            stopping = self._stop.is_set()
+            batch = self._collect() if not stopping else self._drain()
+            if batch:
+                self._flush(batch)
+            elif stopping:
+                return
+            # On a timer rather than when idle: under sustained traffic the
+            # queue never empties, and stale rows would wait for it to
+            if not stopping and time.monotonic() >= next_recovery:
+                stale = self.spool.claim_stale(self.stale_s, self.max_batch)
+                if stale:
+                    self._flush(stale)
+                next_recovery = time.monotonic() + IDLE_POLL_SECONDS
+
+    def _drain(self) -> list:
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch) -> None:
+        rows = [
+            {
+                "name": name,
+                "email": email,
+                "message": message,
+                "created_at": datetime.fromtimestamp(created, timezone.utc).replace(tzinfo=None),
+                "is_read": False,
+            }
+            for _, name, email, message, created in batch
+        ]
+        ids = [item[0] for item in batch]
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(ContactMessage), rows)
+                db.session.commit()
+                self.spool.remove(ids)
+                logger.debug("Flushed %d contact messages", len(rows))
+            except Exception:
+                db.session.rollback()
+                logger.exception("Contact batch of %d failed, retrying one by one", len(rows))
+                self._flush_each(ids, rows)
+            finally:
+                db.session.remove()
+
+    def _flush_each(self, ids, rows) -> None:
+        # A single bad row must not hold back the rest of the batch; rows
+        # that still fail stay on the spool and are retried when stale.
+        for spool_id, row in zip(ids, rows):
+            try:
+                db.session.execute(insert(ContactMessage), [row])
+                db.session.commit()
+                self.spool.remove([spool_id])
+            except Exception:
+                db.session.rollback()
+                logger.exception("Contact message %s from %s not stored", spool_id, row["email"])
+
+
+def init_contact_ingest(app: Flask) -> None:
+    spool = ContactSpool(app.config["CONTACT_SPOOL_PATH"])
+    ingestor = ContactIngestor(app, spool)
+    app.extensions["contact_ingest"] = ingestor
+    # The flusher starts with the first message, or now to recover
+    # messages spooled before a restart
+    if spool.pending():
+        ingestor.start()
+
+
+def submit(name: str, email: str, message: str) -> str:
+    result = current_app.extensions["contact_ingest"].submit(name, email, message)
+    if result != QUEUED:
+        with _dropped_lock:
+            _dropped[result] += 1
+    return result
+
+
+def _prometheus_lines() -> list:
+    lines = []
+    ingestor = _current_ingestor()
+    if ingestor is not None:
+        lines += [
+            "# TYPE contact_ingest_queue_depth gauge",
+            f"contact_ingest_queue_depth {ingestor.depth()}",
+        ]
+    with _dropped_lock:
+        items = sorted(_dropped.items())
+    if items:
+        lines.append("# TYPE contact_ingest_rejected_total counter")
+        lines += [f'contact_ingest_rejected_total{{reason="{r}"}} {n}' for r, n in items]
+    return lines
+
+
+def _current_ingestor():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("contact_ingest")
+
+
+metrics.register_collector(_prometheus_lines)
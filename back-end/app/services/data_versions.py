@@ -0,0 +1,176 @@
+"""
+Data-version service — per-table change counters used to build ETags.
+
+Every committed flush bumps the version of each table it touched, so
+read-heavy GET endpoints can derive an ETag from the versions of the
+tables they read and answer 304 without running their queries (see
+``app.utils.decorators.versioned_etag``).
+
+Two stores are available, selected with ``DATA_VERSION_STORE``:
+  - ``file`` (default): a small SQLite file at ``DATA_VERSION_PATH``
+    shared by all workers on the host. No external service is required.
+  - ``memory``: a dict in the current process. Only correct with a single
+    worker process: other workers never see its bumps, so their ETags,
+    replica routing and version-tagged caches go stale. It logs a warning
+    outside debug and testing.
+
+Stores also keep the wall-clock time of each table's last change, which
+replica routing uses to keep recently written tables on the primary
+(``app.utils.decorators.replica_reads``).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "data_versions_pending"
+
+
+class MemoryVersionStore:
+    """In-process counters. The token changes on every restart so ETags
+    handed out by a previous process never match."""
+
+    def __init__(self):
+        self.token = uuid.uuid4().hex[:8]
+        self._versions = {}
+        self._changed_at = {}
+        self._lock = threading.Lock()
+
+    def get(self, names) -> dict:
+        with self._lock:
+            return {n: self._versions.get(n, 0) for n in names}
+
+    def last_changed(self, names) -> float:
+        with self._lock:
+            return max((self._changed_at.get(n, 0.0) for n in names), default=0.0)
+
+    def bump(self, names) -> None:
+        now = time.time()
+        with self._lock:
+            for n in names:
+                self._versions[n] = self._versions.get(n, 0) + 1
+                self._changed_at[n] = now
+
+
+class FileVersionStore:
+    """Counters persisted in a SQLite file, shared across worker processes.
+    The token is random per file so recreating the file invalidates ETags."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS data_versions ("
+            "name TEXT PRIMARY KEY, version INTEGER NOT NULL, "
+            "changed_at REAL NOT NULL DEFAULT 0)"
+        )
+        try:
+            conn.execute("ALTER TABLE data_versions ADD COLUMN changed_at REAL NOT NULL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass  # already there
+        conn.execute(
+            "INSERT OR IGNORE INTO data_versions (name, version) VALUES ('__token__', ?)",
+            (uuid.uuid4().int & 0x7FFFFFFF,),
+        )
+        self.token = "%x" % self.get(["__token__"])["__token__"]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, names) -> dict:
+        names = list(names)
+        placeholders = ",".join("?" * len(names))
+        rows = self._conn().execute(
+            f"SELECT name, version FROM data_versions WHERE name IN ({placeholders})",
+            names,
+        ).fetchall()
+        found = dict(rows)
+        return {n: found.get(n, 0) for n in names}
+
+    def last_changed(self, names) -> float:
+        names = list(names)
+        placeholders = ",".join("?" * len(names))
+        row = self._conn().execute(
+            f"SELECT MAX(changed_at) FROM data_versions WHERE name IN ({placeholders})",
+            names,
+        ).fetchone()
+        return row[0] or 0.0
+
+    def bump(self, names) -> None:
+        now = time.time()
+        self._conn().executemany(
+            "INSERT INTO data_versions (name, version, changed_at) VALUES (?, 1, ?) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at",
+            [(n, now) for n in names],
+        )
+
+
+def init_data_versions(app: Flask) -> None:
+    kind = app.config.get("DATA_VERSION_STORE", "file")
+    if kind == "file":
+        store = FileVersionStore(app.config["DATA_VERSION_PATH"])
+    elif kind == "memory":
+        if not (app.debug or app.testing):
+            logger.warning(
+                "DATA_VERSION_STORE=memory is only correct with a single worker process; "
+                "use \"file\" when running several"
+            )
+        store = MemoryVersionStore()
+    else:
+        raise RuntimeError(f"Unknown DATA_VERSION_STORE: {kind}")
+
+    app.extensions["data_versions"] = store
+    logger.debug("Data version store: %s", kind)
+
+
+def get_store():
+    return current_app.extensions["data_versions"]
+
+
+def bump(*tables) -> None:
+    """Explicitly bump tables changed outside the ORM unit of work."""
+    get_store().bump(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_tables(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            pending.add(table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_dml_table(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_tables(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and has_app_context() and "data_versions" in current_app.extensions:
+        get_store().bump(sorted(pending))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_tables(session):
+    session.info.pop(_PENDING_KEY, None)
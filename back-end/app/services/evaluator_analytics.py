@@ -0,0 +1,342 @@
+"""
+Evaluator analytics — grading progress and agreement from note summaries.
+
+Three summary tables are kept in sync with ``note_evaluateur`` by a
+``before_flush`` hook, in the same transaction as the notes:
+  - ``evaluateur_note_stats``: count, sum and sum of squares per evaluator;
+  - ``evaluateur_pair_stats``: per pair of evaluators, the sums over the
+    candidates both noted (count, sums, sums of squares, cross products,
+    absolute differences);
+  - ``candidat_note_stats``: count, mean, std, min and max per candidate,
+    indexed on std to list the most disputed candidates.
+
+The hook recomputes the summaries of the candidates a flush touches from
+their notes. It first locks those candidate rows, so two evaluators
+noting the same candidate at once are applied one after the other and
+neither misses the other's note. Evaluator and pair rows are adjusted
+with atomic upserts, so concurrent notes on different candidates do not
+overwrite each other.
+
+``report`` then reads only the summary tables, never the notes. Bulk
+statements on ``note_evaluateur`` skip the hook: call ``rebuild`` after
+them (it also backfills, like ``feature_store.rebuild``).
+"""
+import logging
+from itertools import combinations
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, attributes
+
+from app import db
+from app.models.user_models import (
+    Affectation, Candidat, CandidatNoteStats, Evaluateur, EvaluateurNoteStats,
+    EvaluateurPairStats, NoteEvaluateur, User,
+)
+
+logger = logging.getLogger(__name__)
+
+_EVALUATOR_SUMS = ["note_count", "note_sum", "note_sum_sq"]
+_CONFLICT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+_PAIR_SUMS = ["shared_count", "a_sum", "b_sum", "a_sum_sq", "b_sum_sq", "ab_sum", "abs_diff_sum"]
+
+
+# ---------------------------------------------------------------------------
+# Summaries of a set of notes
+# ---------------------------------------------------------------------------
+
+def _evaluator_sums(note):
+    return (1, note, note * note)
+
+
+def _pair_sums(a, b):
+    return (1, a, b, a * a, b * b, a * b, abs(a - b))
+
+
+def _candidate_row(candidat_id, notes):
+    n = len(notes)
+    mean = sum(notes) / n
+    variance = max(sum(v * v for v in notes) / n - mean * mean, 0.0)
+    return {
+        "candidat_id": candidat_id,
+        "note_count": n,
+        "note_mean": mean,
+        "note_std": variance ** 0.5,
+        "note_min": min(notes),
+        "note_max": max(notes),
+    }
+
+
+def _add(deltas, key, sums, sign):
+    current = deltas.get(key)
+    if current is None:
+        deltas[key] = tuple(sign * v for v in sums)
+    else:
+        deltas[key] = tuple(c + sign * v for c, v in zip(current, sums))
+
+
+def _candidate_deltas(before, after, evaluator_deltas, pair_deltas):
+    """Add to the deltas the change of one candidate's notes (evaluator id -> note)."""
+    changed = {e for e in before.keys() | after.keys() if before.get(e) != after.get(e)}
+    for eid in changed:
+        if eid in before:
+            _add(evaluator_deltas, eid, _evaluator_sums(before[eid]), -1)
+        if eid in after:
+            _add(evaluator_deltas, eid, _evaluator_sums(after[eid]), +1)
+    for notes, sign in ((before, -1), (after, +1)):
+        for a, b in combinations(sorted(notes), 2):
+            if a in changed or b in changed:
+                _add(pair_deltas, (a, b), _pair_sums(notes[a], notes[b]), sign)
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def _upsert_add(conn, model, keys, columns, deltas) -> None:
+    """Add ``deltas`` (key tuple -> column values) to the rows, creating
+    missing ones, then drop rows whose count fell to zero."""
+    if not deltas:
+        return
+    table = model.__table__
+    # Key order keeps concurrent transactions from locking rows crosswise
+    rows = [
+        {**dict(zip(keys, key)), **dict(zip(columns, values))}
+        for key, values in sorted(deltas.items())
+    ]
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        conn.execute(
+            stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in columns}), rows
+        )
+    elif dialect in _CONFLICT_INSERTS:
+        stmt = _CONFLICT_INSERTS[dialect](table)
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=keys, set_={c: table.c[c] + stmt.excluded[c] for c in columns}
+            ),
+            rows,
+        )
+    else:
+        for row in rows:
+            done = conn.execute(
+                update(table)
+                .where(*[table.c[k] == row[k] for k in keys])
+                .values({c: table.c[c] + row[c] for c in columns})
+            )
+            if not done.rowcount:
+                conn.execute(insert(table), [row])
+
+    # The first key and the count column are enough to find emptied rows
+    conn.execute(
+        delete(table).where(
+            table.c[keys[0]].in_({key[0] for key in deltas}), table.c[columns[0]] <= 0
+        )
+    )
+
+
+def _committed(obj, key):
+    added, unchanged, deleted = attributes.get_history(obj, key)
+    if deleted:
+        return deleted[0]
+    return unchanged[0] if unchanged else None
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_note_summaries(session, flush_context, instances):
+    # (candidat_id, evaluateur_id) -> note after this flush, None if removed
+    changes = {}
+    for obj in session.deleted:
+        if isinstance(obj, NoteEvaluateur):
+            changes[(_committed(obj, "candidat_id"), _committed(obj, "evaluateur_id"))] = None
+    for obj in session.dirty:
+        if isinstance(obj, NoteEvaluateur) and session.is_modified(obj):
+            old = (_committed(obj, "candidat_id"), _committed(obj, "evaluateur_id"))
+            new = (obj.candidat_id, obj.evaluateur_id)
+            if old != new:
+                changes.setdefault(old, None)
+            changes[new] = obj.note_eval
+    for obj in session.new:
+        if isinstance(obj, NoteEvaluateur):
+            changes[(obj.candidat_id, obj.evaluateur_id)] = obj.note_eval
+    changes = {k: v for k, v in changes.items() if None not in k}
+    if not changes:
+        return
+
+    conn = session.connection()
+    candidat_ids = sorted({cid for cid, _ in changes})
+    # Serializes note changes per candidate across transactions; the reads
+    # below are locking reads so they see the latest committed notes
+    conn.execute(
+        select(Candidat.id).where(Candidat.id.in_(candidat_ids)).order_by(Candidat.id).with_for_update()
+    )
+    before = {cid: {} for cid in candidat_ids}
+    for cid, eid, note in conn.execute(
+        select(NoteEvaluateur.candidat_id, NoteEvaluateur.evaluateur_id, NoteEvaluateur.note_eval)
+        .where(NoteEvaluateur.candidat_id.in_(candidat_ids))
+        .with_for_update(read=True)
+    ):
+        before[cid][eid] = note
+
+    after = {cid: dict(notes) for cid, notes in before.items()}
+    for (cid, eid), note in changes.items():
+        if note is None:
+            after[cid].pop(eid, None)
+        else:
+            after[cid][eid] = float(note)
+
+    evaluator_deltas, pair_deltas, rows = {}, {}, []
+    for cid in candidat_ids:
+        _candidate_deltas(before[cid], after[cid], evaluator_deltas, pair_deltas)
+        if after[cid]:
+            rows.append(_candidate_row(cid, list(after[cid].values())))
+
+    conn.execute(delete(CandidatNoteStats).where(CandidatNoteStats.candidat_id.in_(candidat_ids)))
+    if rows:
+        conn.execute(insert(CandidatNoteStats), rows)
+    _upsert_add(conn, EvaluateurNoteStats, ["evaluateur_id"], _EVALUATOR_SUMS,
+                {(eid,): v for eid, v in evaluator_deltas.items()})
+    _upsert_add(conn, EvaluateurPairStats, ["evaluateur_a", "evaluateur_b"], _PAIR_SUMS, pair_deltas)
+
+
+def rebuild() -> dict:
+    """Recompute every summary from the notes (backfill after bulk imports)."""
+    notes = {}
+    for cid, eid, note in db.session.query(
+        NoteEvaluateur.candidat_id, NoteEvaluateur.evaluateur_id, NoteEvaluateur.note_eval
+    ):
+        notes.setdefault(cid, {})[eid] = note
+
+    evaluator_deltas, pair_deltas = {}, {}
+    for by_evaluator in notes.values():
+        _candidate_deltas({}, by_evaluator, evaluator_deltas, pair_deltas)
+
+    db.session.query(CandidatNoteStats).delete()
+    db.session.query(EvaluateurNoteStats).delete()
+    db.session.query(EvaluateurPairStats).delete()
+    if notes:
+        db.session.execute(
+            insert(CandidatNoteStats),
+            [_candidate_row(cid, list(n.values())) for cid, n in notes.items()],
+        )
+        db.session.execute(insert(EvaluateurNoteStats), [
+            {"evaluateur_id": eid, **dict(zip(_EVALUATOR_SUMS, v))} for eid, v in evaluator_deltas.items()
+        ])
+    if pair_deltas:
+        db.session.execute(insert(EvaluateurPairStats), [
+            {"evaluateur_a": a, "evaluateur_b": b, **dict(zip(_PAIR_SUMS, v))}
+            for (a, b), v in pair_deltas.items()
+        ])
+    db.session.commit()
+    logger.info("Evaluator analytics rebuilt: %d candidates, %d evaluators, %d pairs",
+                len(notes), len(evaluator_deltas), len(pair_deltas))
+    return {"candidates": len(notes), "evaluateurs": len(evaluator_deltas), "pairs": len(pair_deltas)}
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+def _std(n, total, total_sq):
+    if not n:
+        return None
+    mean = total / n
+    return max(total_sq / n - mean * mean, 0.0) ** 0.5
+
+
+def report(min_shared=1, min_std=0.0, limit=50) -> dict:
+    """Progress per evaluator, pairwise agreement and the candidates with
+    the most spread-out notes, from the summary tables only.
+
+    Pairs sharing fewer than ``min_shared`` candidates are left out; only
+    candidates with two notes or more and a std of at least ``min_std``
+    are listed, most disputed first, at most ``limit`` of them.
+    """
+    evaluators = (
+        db.session.query(
+            Evaluateur.id, Evaluateur.is_active, User.nom, User.prenom,
+            EvaluateurNoteStats.note_count, EvaluateurNoteStats.note_sum, EvaluateurNoteStats.note_sum_sq,
+        )
+        .join(User, User.id == Evaluateur.user_id)
+        .outerjoin(EvaluateurNoteStats, EvaluateurNoteStats.evaluateur_id == Evaluateur.id)
+        .order_by(Evaluateur.id)
+        .all()
+    )
+    assigned = dict(
+        db.session.query(Affectation.evaluateur_id, func.count(Affectation.id))
+        .group_by(Affectation.evaluateur_id)
+        .all()
+    )
+
+    progress = []
+    for e in evaluators:
+        n = e.note_count or 0
+        todo = assigned.get(e.id, 0)
+        progress.append({
+            "evaluateur_id": e.id,
+            "nom": e.nom,
+            "prenom": e.prenom,
+            "is_active": e.is_active,
+            "notes": n,
+            "assigned": todo,
+            "progress": _round(min(n / todo, 1.0)) if todo else None,
+            "mean": _round(e.note_sum / n) if n else None,
+            "std": _round(_std(n, e.note_sum, e.note_sum_sq)),
+        })
+
+    agreement = []
+    for p in (
+        EvaluateurPairStats.query
+        .filter(EvaluateurPairStats.shared_count >= max(min_shared, 1))
+        .order_by(EvaluateurPairStats.evaluateur_a, EvaluateurPairStats.evaluateur_b)
+    ):
+        n = p.shared_count
+        std_a = _std(n, p.a_sum, p.a_sum_sq)
+        std_b = _std(n, p.b_sum, p.b_sum_sq)
+        covariance = p.ab_sum / n - (p.a_sum / n) * (p.b_sum / n)
+        # Mean squared difference from the same sums: E[a²] - 2E[ab] + E[b²]
+        msd = max((p.a_sum_sq - 2 * p.ab_sum + p.b_sum_sq) / n, 0.0)
+        agreement.append({
+            "evaluateur_a": p.evaluateur_a,
+            "evaluateur_b": p.evaluateur_b,
+            "shared": n,
+            "mean_diff": _round((p.a_sum - p.b_sum) / n),
+            "mean_abs_diff": _round(p.abs_diff_sum / n),
+            "rmsd": _round(msd ** 0.5),
+            "correlation": _round(covariance / (std_a * std_b)) if std_a and std_b else None,
+        })
+
+    disputed = (
+        db.session.query(CandidatNoteStats, User.nom, User.prenom)
+        .join(Candidat, Candidat.id == CandidatNoteStats.candidat_id)
+        .join(User, User.id == Candidat.user_id)
+        .filter(CandidatNoteStats.note_count >= 2, CandidatNoteStats.note_std >= min_std)
+        .order_by(CandidatNoteStats.note_std.desc(), CandidatNoteStats.candidat_id)
+        .limit(limit)
+        .all()
+    )
+
+    return {
+        "evaluateurs": progress,
+        "agreement": agreement,
+        "disputed_candidates": [
+            {
+                "candidat_id": s.candidat_id,
+                "nom": nom,
+                "prenom": prenom,
+                "notes": s.note_count,
+                "mean": _round(s.note_mean),
+                "std": _round(s.note_std),
+                "min": s.note_min,
+                "max": s.note_max,
+            }
+            for s, nom, prenom in disputed
+        ],
+    }
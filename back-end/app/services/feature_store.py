@@ -0,0 +1,151 @@
+"""
+Feature store — the model inputs of every complete candidate profile.
+
+``candidat_features`` holds one typed row per candidate whose profile has
+every model input, in the exact column order the pipeline expects
+(``FEATURE_COLUMNS``). It is kept in sync by a ``before_flush`` hook
+whenever a Candidat's inputs or a Filiere's name change, so scoring and
+training exports read it in bulk with no per-row transformation, and
+serving and training see the same values.
+
+Derivation rules live here and nowhere else:
+  - ``impute_moy_bac``: a missing bac average is replaced by the mean of
+    the four semester averages. It is on the same 0-20 scale and within
+    the range the model was trained on, whereas a constant such as 0.0
+    is a value no training row has. Online rows and ``rebuild`` apply it;
+    migration 2d6f8a4c9e17 re-imputes rows stored under the old 0.0 rule.
+  - ``training_target``: the regression target, the mean of the four
+    semester averages, as in ``scripts/generate_synthetic.py``.
+    ``training_frame`` adds it to the stored rows for
+    ``scripts/export_features.py``, so training reads the exact feature
+    values serving uses.
+"""
+import logging
+
+import pandas as pd
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.user_models import Candidat, CandidatFeatures, Filiere
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = [
+    "t_diplome", "branche_diplome", "bac_type", "filiere",
+    "moy_bac", "m_s1", "m_s2", "m_s3", "m_s4",
+]
+
+_INPUT_ATTRS = [
+    "t_diplome", "branche_diplome", "bac_type", "filiere_id",
+    "moy_bac", "m_s1", "m_s2", "m_s3", "m_s4",
+]
+
+
+TARGET_COLUMN = "avg_semester_score"
+SEMESTER_COLUMNS = ["m_s1", "m_s2", "m_s3", "m_s4"]
+
+
+def impute_moy_bac(moy_bac, semesters) -> float:
+    """The bac average fed to the model; missing means the semester mean."""
+    if moy_bac is not None:
+        return float(moy_bac)
+    return sum(float(v) for v in semesters) / len(semesters)
+
+
+def training_target(df: pd.DataFrame) -> pd.Series:
+    return df[SEMESTER_COLUMNS].mean(axis=1)
+
+
+def candidate_features(c, filiere_name):
+    """Model input row for a candidate, or None when a field is missing."""
+    if not all([c.t_diplome, c.branche_diplome, c.bac_type, c.filiere_id, filiere_name]):
+        return None
+    if any(v is None for v in [c.m_s1, c.m_s2, c.m_s3, c.m_s4]):
+        return None
+    return {
+        "t_diplome": c.t_diplome,
+        "branche_diplome": c.branche_diplome,
+        "bac_type": c.bac_type,
+        "filiere": filiere_name,
+        "moy_bac": impute_moy_bac(c.moy_bac, [c.m_s1, c.m_s2, c.m_s3, c.m_s4]),
+        "m_s1": float(c.m_s1),
+        "m_s2": float(c.m_s2),
+        "m_s3": float(c.m_s3),
+        "m_s4": float(c.m_s4),
+    }
+
+
+def feature_rows(candidat_ids=None) -> list:
+    """Return (candidat_id, *FEATURE_COLUMNS) tuples straight from the table."""
+    q = db.session.query(
+        CandidatFeatures.candidat_id,
+        *[getattr(CandidatFeatures, c) for c in FEATURE_COLUMNS],
+    )
+    if candidat_ids is not None:
+        q = q.filter(CandidatFeatures.candidat_id.in_(candidat_ids))
+    return [tuple(r) for r in q.all()]
+
+
+def feature_frame(candidat_ids=None) -> pd.DataFrame:
+    """Features as a DataFrame indexed by candidat_id, in pipeline order."""
+    rows = feature_rows(candidat_ids)
+    df = pd.DataFrame(rows, columns=["candidat_id"] + FEATURE_COLUMNS)
+    return df.set_index("candidat_id")
+
+
+def training_frame() -> pd.DataFrame:
+    """Stored features plus ``TARGET_COLUMN``: the training dataset."""
+    df = feature_frame()
+    df[TARGET_COLUMN] = training_target(df)
+    return df
+
+
+def rebuild() -> int:
+    """Recompute every row from Candidat (backfill after bulk imports)."""
+    names = {f.id: f.nom_filiere for f in Filiere.query.all()}
+    CandidatFeatures.query.delete()
+    rows = []
+    for c in Candidat.query.filter(Candidat.filiere_id.isnot(None)).all():
+        f = candidate_features(c, names.get(c.filiere_id))
+        if f is not None:
+            rows.append({"candidat_id": c.id, "filiere_id": c.filiere_id, **f})
+    if rows:
+        db.session.execute(db.insert(CandidatFeatures), rows)
+    db.session.commit()
+    logger.info("Feature store rebuilt: %d rows", len(rows))
+    return len(rows)
+
+
+def _sync_candidate(session, c) -> None:
+    filiere = session.get(Filiere, c.filiere_id) if c.filiere_id else None
+    f = candidate_features(c, filiere.nom_filiere if filiere else None)
+
+    if f is None:
+        c.features = None
+        return
+    if c.features is None:
+        c.features = CandidatFeatures(filiere_id=c.filiere_id, **f)
+        return
+    c.features.filiere_id = c.filiere_id
+    for key, value in f.items():
+        setattr(c.features, key, value)
+
+
+def _inputs_changed(obj, attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_feature_store(session, flush_context, instances):
+    for obj in list(session.new):
+        if isinstance(obj, Candidat):
+            _sync_candidate(session, obj)
+
+    for obj in list(session.dirty):
+        if isinstance(obj, Candidat) and _inputs_changed(obj, _INPUT_ATTRS):
+            _sync_candidate(session, obj)
+        elif isinstance(obj, Filiere) and _inputs_changed(obj, ["nom_filiere"]):
+            for row in session.query(CandidatFeatures).filter_by(filiere_id=obj.id):
+                row.filiere = obj.nom_filiere
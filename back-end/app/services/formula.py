@@ -0,0 +1,150 @@
+"""
+Formula language for final scores, compiled to vectorized evaluators.
+
+A formula is an arithmetic expression over per-candidate variables, e.g.::
+
+    clamp(0.6 * jury_z + 0.3 * ai + 0.1 * moy_bac + 2 * trend, 0, 20)
+
+Syntax: numbers, the variables below, ``+ - * /``, parentheses and the
+functions ``clamp(x, lo, hi)``, ``min(a, b, ...)``, ``max(a, b, ...)`` and
+``abs(x)``. Nothing else is accepted: the text is parsed with ``ast`` and
+every node is checked against this grammar, never evaluated by Python.
+
+``compile_formula`` validates a formula once and returns a ``Formula``
+whose call evaluates it over NumPy arrays for all candidates at once.
+Missing inputs are NaN and propagate, so a candidate whose formula needs
+a value they lack gets NaN rather than a made-up score.
+"""
+import ast
+import operator
+from typing import Callable, FrozenSet, NamedTuple
+
+import numpy as np
+
+MAX_LENGTH = 500
+MAX_NODES = 200
+
+VARIABLES = {
+    "jury": "moyenne des notes du jury",
+    "jury_median": "médiane des notes du jury",
+    "jury_trimmed": "moyenne tronquée des notes du jury (extrêmes écartés)",
+    "jury_z": "moyenne des notes du jury normalisées par évaluateur",
+    "jury_min": "note du jury la plus basse",
+    "jury_max": "note du jury la plus haute",
+    "ai": "note IA (0 si absente)",
+    "moy_bac": "moyenne du bac",
+    "s1": "moyenne du semestre 1",
+    "s2": "moyenne du semestre 2",
+    "s3": "moyenne du semestre 3",
+    "s4": "moyenne du semestre 4",
+    "trend": "pente des moyennes S1 à S4 (points par semestre)",
+}
+
+_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+class FormulaError(ValueError):
+    """A formula that does not follow the grammar; the message is shown to admins."""
+
+
+class Formula(NamedTuple):
+    source: str
+    variables: FrozenSet[str]
+    evaluate: Callable
+
+    def __call__(self, env) -> np.ndarray:
+        """Evaluate over ``env`` (variable name -> array); returns float64."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = self.evaluate(env)
+        # A formula made of constants only still yields one value per candidate
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), np.shape(env["jury"]))
+
+
+def compile_formula(source: str) -> Formula:
+    if not isinstance(source, str) or not source.strip():
+        raise FormulaError("La formule est vide")
+    source = source.strip()
+    if len(source) > MAX_LENGTH:
+        raise FormulaError(f"La formule dépasse {MAX_LENGTH} caractères")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        where = f" près de la colonne {e.offset}" if e.offset else ""
+        raise FormulaError(f"Syntaxe invalide{where}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise FormulaError("La formule est trop longue")
+
+    used = set()
+    evaluate = _compile_node(tree.body, used)
+    return Formula(source, frozenset(used), evaluate)
+
+
+def weights_formula(human: float, ai: float) -> Formula:
+    """The linear formula of the jury/AI percentage weights."""
+    return compile_formula(f"{human / 100.0!r} * jury + {ai / 100.0!r} * ai")
+
+
+def _compile_node(node, used):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = float(node.value)
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in VARIABLES:
+            raise FormulaError(f"Variable inconnue: {node.id}")
+        name = node.id
+        used.add(name)
+        return lambda env: env[name]
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _compile_node(node.operand, used)
+        if isinstance(node.op, ast.USub):
+            return lambda env: -operand(env)
+        return operand
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        op = _BINARY[type(node.op)]
+        left = _compile_node(node.left, used)
+        right = _compile_node(node.right, used)
+        if isinstance(node.op, ast.Div) and isinstance(node.right, ast.Constant) and node.right.value == 0:
+            raise FormulaError("Division par zéro")
+        return lambda env: op(left(env), right(env))
+
+    if isinstance(node, ast.Call):
+        return _compile_call(node, used)
+
+    raise FormulaError(f"Élément non autorisé: {ast.unparse(node)}")
+
+
+def _compile_call(node, used):
+    name = node.func.id if isinstance(node.func, ast.Name) else None
+    if node.keywords or name not in ("clamp", "min", "max", "abs"):
+        raise FormulaError(f"Fonction non autorisée: {ast.unparse(node.func)}")
+    args = [_compile_node(a, used) for a in node.args]
+
+    if name == "clamp":
+        if len(args) != 3:
+            raise FormulaError("clamp attend 3 arguments: clamp(x, min, max)")
+        x, lo, hi = args
+        return lambda env: np.minimum(np.maximum(x(env), lo(env)), hi(env))
+    if name == "abs":
+        if len(args) != 1:
+            raise FormulaError("abs attend 1 argument")
+        (x,) = args
+        return lambda env: np.abs(x(env))
+
+    if len(args) < 2:
+        raise FormulaError(f"{name} attend au moins 2 arguments")
+    reduce = np.minimum if name == "min" else np.maximum
+
+    def evaluate(env):
+        result = args[0](env)
+        for arg in args[1:]:
+            result = reduce(result, arg(env))
+        return result
+    return evaluate
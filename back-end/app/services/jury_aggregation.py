@@ -0,0 +1,249 @@
+"""
+Jury aggregation — robust per-candidate aggregates of evaluator notes.
+
+Notes are handled as a sparse candidate × evaluator matrix in CSR layout:
+one row per candidate holding its (evaluator, note) entries sorted by
+note, as delivered by an ``ORDER BY candidat_id, note_eval`` query.
+``aggregate`` derives, for every candidate at once and in time linear in
+the number of notes:
+  - ``jury``: the mean;
+  - ``jury_median``;
+  - ``jury_trimmed``: the mean once ``floor(JURY_TRIM_PROPORTION * n)``
+    notes are dropped at each end (never all of them);
+  - ``jury_z``: the mean of inter-rater normalized notes. Each note is
+    turned into its evaluator's z-score and mapped back onto the scale of
+    all notes (overall mean + z × overall std, clamped to 0..20), so a
+    harsh or lenient evaluator no longer drags their candidates down or
+    up. Evaluators with fewer than ``JURY_ZSCORE_MIN_NOTES`` notes, or
+    with no spread, keep their raw notes;
+  - ``jury_min`` / ``jury_max``.
+
+Per-evaluator statistics (count, sum, sum of squares) are cached per
+process. A commit that adds, changes or deletes notes through the ORM
+applies its deltas to the cache. When the ``note_evaluateur`` version
+moved by more than that commit (another worker, a bulk statement, a
+cascade from a deleted candidate or evaluator), the cache is rebuilt with
+one grouped query on next use. A rebuild reading a commit whose version
+bump has not landed yet would count it twice, so the cache is also
+rebuilt once older than ``JURY_STATS_MAX_AGE_SECONDS``.
+"""
+import logging
+import threading
+import time
+from typing import Dict, NamedTuple
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, attributes
+
+from app import db
+from app.models.user_models import Candidat, Evaluateur, NoteEvaluateur
+from app.services.data_versions import get_store
+
+logger = logging.getLogger(__name__)
+
+_DELTAS_KEY = "jury_stats_deltas"
+_UNKNOWN = "unknown"
+
+
+class EvaluatorStat(NamedTuple):
+    count: int
+    total: float
+    total_sq: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return float("nan")
+        return max(self.total_sq / self.count - self.mean ** 2, 0.0) ** 0.5
+
+
+class EvaluatorStatsCache:
+    """Per-evaluator note statistics tagged with the table version they reflect."""
+
+    def __init__(self):
+        self._version = None
+        self._stats = {}
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict[int, EvaluatorStat]:
+        version = _note_version()
+        max_age = current_app.config.get("JURY_STATS_MAX_AGE_SECONDS", 300)
+        with self._lock:
+            if self._version == version and time.monotonic() - self._built_at < max_age:
+                return dict(self._stats)
+
+        rows = (
+            db.session.query(
+                NoteEvaluateur.evaluateur_id,
+                func.count(NoteEvaluateur.id),
+                func.sum(NoteEvaluateur.note_eval),
+                func.sum(NoteEvaluateur.note_eval * NoteEvaluateur.note_eval),
+            )
+            .group_by(NoteEvaluateur.evaluateur_id)
+            .all()
+        )
+        stats = {eid: EvaluatorStat(n, float(s), float(ss)) for eid, n, s, ss in rows}
+        with self._lock:
+            self._stats, self._version, self._built_at = stats, version, time.monotonic()
+        logger.debug("Rebuilt statistics of %d evaluators", len(stats))
+        return dict(stats)
+
+    def apply(self, deltas, version) -> None:
+        """Apply one commit's deltas if the cache was exactly one version behind."""
+        with self._lock:
+            if self._version is None:
+                return
+            token, current = version
+            if deltas is _UNKNOWN or self._version != (token, current - 1):
+                self._version = None
+                return
+            for eid, (dn, ds, dss) in deltas.items():
+                n, s, ss = self._stats.get(eid, (0, 0.0, 0.0))
+                if n + dn <= 0:
+                    self._stats.pop(eid, None)
+                else:
+                    self._stats[eid] = EvaluatorStat(n + dn, s + ds, ss + dss)
+            self._version = version
+
+
+_cache = EvaluatorStatsCache()
+
+
+def evaluator_stats() -> Dict[int, EvaluatorStat]:
+    return _cache.get()
+
+
+def _note_version():
+    store = get_store()
+    return store.token, store.get(["note_evaluateur"])["note_evaluateur"]
+
+
+class JuryAggregates(NamedTuple):
+    candidat_ids: np.ndarray
+    values: Dict[str, np.ndarray]
+
+
+def aggregate(candidat_ids, evaluateur_ids, notes) -> JuryAggregates:
+    """Aggregates per candidate from note arrays sorted by (candidate, note)."""
+    cids = np.asarray(candidat_ids, dtype=np.int64)
+    eids = np.asarray(evaluateur_ids, dtype=np.int64)
+    notes = np.asarray(notes, dtype=np.float64)
+    if not len(notes):
+        empty = np.empty(0)
+        names = ["jury", "jury_median", "jury_trimmed", "jury_z", "jury_min", "jury_max"]
+        return JuryAggregates(cids, {name: empty for name in names})
+
+    # Row boundaries of the CSR layout
+    starts = np.flatnonzero(np.r_[True, cids[1:] != cids[:-1]])
+    ends = np.r_[starts[1:], len(notes)]
+    counts = ends - starts
+    csum = np.r_[0.0, np.cumsum(notes)]
+
+    cfg = current_app.config
+    trim = np.minimum(
+        np.floor(counts * cfg.get("JURY_TRIM_PROPORTION", 0.2)).astype(np.int64), (counts - 1) // 2
+    )
+    normalized = _normalize(eids, notes, cfg.get("JURY_ZSCORE_MIN_NOTES", 5))
+
+    return JuryAggregates(cids[starts], {
+        "jury": (csum[ends] - csum[starts]) / counts,
+        "jury_median": (notes[starts + (counts - 1) // 2] + notes[starts + counts // 2]) / 2.0,
+        "jury_trimmed": (csum[ends - trim] - csum[starts + trim]) / (counts - 2 * trim),
+        "jury_z": np.add.reduceat(normalized, starts) / counts,
+        "jury_min": notes[starts],
+        "jury_max": notes[ends - 1],
+    })
+
+
+def _normalize(eids, notes, min_notes) -> np.ndarray:
+    stats = evaluator_stats()
+    total = EvaluatorStat(*(sum(col) for col in zip(*stats.values()))) if stats else None
+    if total is None or not total.std:
+        return notes
+
+    # Lookup tables indexed by evaluator id; raw notes where not normalized
+    size = int(max(eids.max(), max(stats))) + 1
+    mean = np.zeros(size)
+    std = np.zeros(size)
+    for eid, stat in stats.items():
+        if stat.count >= min_notes and stat.std > 0:
+            mean[eid], std[eid] = stat.mean, stat.std
+    note_std = std[eids]
+    scaled = np.divide(notes - mean[eids], note_std, out=np.zeros_like(notes), where=note_std > 0)
+    normalized = np.clip(total.mean + scaled * total.std, 0.0, 20.0)
+    return np.where(note_std > 0, normalized, notes)
+
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance
+# ---------------------------------------------------------------------------
+
+def _add_delta(deltas, eid, note, sign) -> None:
+    if eid is None or note is None:
+        return
+    dn, ds, dss = deltas.get(eid, (0, 0.0, 0.0))
+    deltas[eid] = (dn + sign, ds + sign * note, dss + sign * note * note)
+
+
+def _committed(obj, key):
+    added, unchanged, deleted = attributes.get_history(obj, key)
+    if deleted:
+        return deleted[0]
+    return unchanged[0] if unchanged else None
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_note_deltas(session, flush_context, instances):
+    deltas = session.info.get(_DELTAS_KEY)
+    if deltas is _UNKNOWN:
+        return
+    touched = False
+    deltas = deltas if deltas is not None else {}
+    for obj in session.deleted:
+        if isinstance(obj, (Candidat, Evaluateur)):
+            # Their notes may go with them through database cascades
+            session.info[_DELTAS_KEY] = _UNKNOWN
+            return
+        if isinstance(obj, NoteEvaluateur):
+            _add_delta(deltas, _committed(obj, "evaluateur_id"), _committed(obj, "note_eval"), -1)
+            touched = True
+    for obj in session.new:
+        if isinstance(obj, NoteEvaluateur):
+            _add_delta(deltas, obj.evaluateur_id, obj.note_eval, +1)
+            touched = True
+    for obj in session.dirty:
+        if isinstance(obj, NoteEvaluateur) and session.is_modified(obj):
+            _add_delta(deltas, _committed(obj, "evaluateur_id"), _committed(obj, "note_eval"), -1)
+            _add_delta(deltas, obj.evaluateur_id, obj.note_eval, +1)
+            touched = True
+    if touched:
+        session.info[_DELTAS_KEY] = deltas
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_note_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name == NoteEvaluateur.__tablename__:
+            orm_execute_state.session.info[_DELTAS_KEY] = _UNKNOWN
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_note_deltas(session):
+    # Runs after data_versions has bumped the table versions of this commit
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas is None or not has_app_context() or "data_versions" not in current_app.extensions:
+        return
+    _cache.apply(deltas, _note_version())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_note_deltas(session):
+    session.info.pop(_DELTAS_KEY, None)
@@ -1,29 +1,245 @@
 """
-ML service — singleton pipeline loader.
+ML service — singleton pipeline loader and memoized batch prediction.
 
 The model is loaded once on first use and cached for the lifetime of the
-process. Thread-safe for CPython's GIL; add a lock if you ever move to
-a multi-threaded/multi-process setup without forking.
+process; loading is guarded by a lock so concurrent first requests only
+load it once.
+
+Predictions are memoized in a bounded LRU keyed by the model version and
+the canonical feature tuple (categoricals as-is, grades rounded to 2
+decimals). Many candidates share identical tuples, so ``predict_scores``
+deduplicates rows, predicts only the unseen ones in a single call and
+scatters the results back to the input order. Inputs are read in bulk
+from the feature store (``app.services.feature_store``).
+
+With ``ML_REALTIME_SCORING`` enabled, ``submit_for_scoring`` hands a
+candidate id to a background micro-batcher: it waits up to
+``ML_MICROBATCH_WAIT_MS`` for more ids, scores them together and writes
+``ScoreAI`` so request threads never block on the model. Pending ids live
+in memory only; the admin batch run remains the catch-all.
 """
 import logging
 import os
+import queue
+import threading
+import time
+from collections import OrderedDict
 
 import joblib
+import pandas as pd
+
+from app import db
+from app.models.user_models import ScoreAI
+from app.services.feature_store import FEATURE_COLUMNS, feature_rows
+from app.utils.instrumentation import metrics
 
 logger = logging.getLogger(__name__)
 
+_NUMERIC_START = 4
+
 _pipeline = None
+_pipeline_version = None
+_load_lock = threading.Lock()
+
+
+class PredictionCache:
+    """Thread-safe bounded LRU with hit/miss counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys) -> dict:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items) -> None:
+        with self._lock:
+            for key, value in items:
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache = None
 
 
 def get_pipeline():
     """Return the cached sklearn pipeline, loading it on first call."""
     global _pipeline
     if _pipeline is None:
-        _pipeline = _load_pipeline()
+        with _load_lock:
+            if _pipeline is None:
+                _pipeline = _load_pipeline()
     return _pipeline
 
 
+def get_cache() -> PredictionCache:
+    global _cache
+    if _cache is None:
+        from flask import current_app
+        _cache = PredictionCache(current_app.config.get("ML_CACHE_SIZE", 50000))
+    return _cache
+
+
+def predict_scores(rows) -> list:
+    """Predict raw scores for feature rows.
+
+    Rows are dicts keyed by FEATURE_COLUMNS or tuples in that order.
+    Returns one float per input row, in input order.
+    """
+    pipe = get_pipeline()
+    cache = get_cache()
+
+    keys = [_canonical_key(r) for r in rows]
+    unique = list(dict.fromkeys(keys))
+    known = cache.get_many(unique)
+    missing = [k for k in unique if k not in known]
+
+    if missing:
+        X = pd.DataFrame([k[1:] for k in missing], columns=FEATURE_COLUMNS)
+        predicted = [float(p) for p in pipe.predict(X)]
+        fresh = dict(zip(missing, predicted))
+        cache.put_many(fresh.items())
+        known.update(fresh)
+
+    logger.debug(
+        "predict_scores: rows=%d unique=%d predicted=%d", len(rows), len(unique), len(missing)
+    )
+    return [known[k] for k in keys]
+
+
+def clamp_score(predicted: float) -> float:
+    """Clamp to the valid [0, 20] range, rounded like stored notes."""
+    return round(max(0.0, min(20.0, predicted)), 2)
+
+
+def cache_stats() -> dict:
+    stats = get_cache().stats() if _cache is not None else {}
+    stats["model_version"] = _pipeline_version
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Real-time micro-batching
+# ---------------------------------------------------------------------------
+
+class MicroBatchScorer:
+    """Background thread that scores submitted candidates in small batches."""
+
+    def __init__(self, app, wait_ms: float, max_batch: int):
+        self.app = app
+        self.wait_s = wait_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ml-microbatch", daemon=True)
+        self._thread.start()
+
+    def submit(self, candidat_id: int) -> None:
+        self._queue.put(candidat_id)
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return list(dict.fromkeys(batch))
+
+    def _run(self) -> None:
+        while True:
+            ids = self._collect()
+            with self.app.app_context():
+                try:
+                    scored = score_candidates(ids)
+                    logger.debug("Micro-batch scored %d/%d candidates", scored, len(ids))
+                except Exception:
+                    logger.exception("Micro-batch scoring failed for %d candidates", len(ids))
+                finally:
+                    db.session.remove()
+
+
+def score_candidates(candidat_ids) -> int:
+    """Score the given candidates and upsert ScoreAI; returns how many were scored."""
+    rows = feature_rows(candidat_ids)
+    if not rows:
+        return 0
+    to_score = [r[0] for r in rows]
+    features = [r[1:] for r in rows]
+
+    predictions = predict_scores(features)
+    existing = {
+        r.candidat_id: r
+        for r in ScoreAI.query.filter(ScoreAI.candidat_id.in_(to_score)).all()
+    }
+    for cid, predicted in zip(to_score, predictions):
+        row = existing.get(cid)
+        if row:
+            row.note_ai = clamp_score(predicted)
+        else:
+            db.session.add(ScoreAI(candidat_id=cid, note_ai=clamp_score(predicted)))
+    db.session.commit()
+    return len(to_score)
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def submit_for_scoring(candidat_id: int) -> None:
+    """Queue a candidate for background scoring; never blocks on the model."""
+    global _scorer
+    from flask import current_app
+
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = MicroBatchScorer(
+                    current_app._get_current_object(),
+                    current_app.config.get("ML_MICROBATCH_WAIT_MS", 20),
+                    current_app.config.get("ML_MICROBATCH_MAX", 256),
+                )
+    _scorer.submit(candidat_id)
+
+
+def _canonical_key(row) -> tuple:
+    values = [row[c] for c in FEATURE_COLUMNS] if isinstance(row, dict) else list(row)
+    numeric = tuple(round(float(v), 2) for v in values[_NUMERIC_START:])
+    return (_pipeline_version, *values[:_NUMERIC_START], *numeric)
+
+
 def _load_pipeline():
+    global _pipeline_version
     from flask import current_app
 
     model_path = current_app.config.get("MODEL_PATH") or os.getenv("MODEL_PATH")
@@ -35,4 +251,23 @@ def _load_pipeline():
         raise FileNotFoundError(f"ML model not found at: {model_path}")
 
     logger.info("Loading ML pipeline from %s", model_path)
+    stat = os.stat(model_path)
+    _pipeline_version = f"{int(stat.st_mtime)}-{stat.st_size}"
     return joblib.load(model_path)
+
+
+def _prometheus_lines() -> list:
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    return [
+        "# TYPE ml_prediction_cache_hits_total counter",
+        f"ml_prediction_cache_hits_total {stats['hits']}",
+        "# TYPE ml_prediction_cache_misses_total counter",
+        f"ml_prediction_cache_misses_total {stats['misses']}",
+        "# TYPE ml_prediction_cache_size gauge",
+        f"ml_prediction_cache_size {stats['size']}",
+    ]
+
+
+metrics.register_collector(_prometheus_lines)
@@ -0,0 +1,163 @@
+"""
+Rate-limit service — token buckets keyed by arbitrary strings.
+
+A bucket holds up to ``burst`` tokens and refills at ``per_minute`` tokens
+per minute; each hit takes one token and is rejected when none is left.
+``check`` asks the same question without taking a token, for limits that
+only charge failures (a wrong password).
+Callers check their limits before doing any expensive work (password
+hashing, writes), so floods are turned away cheaply.
+
+Two stores are available, selected with ``RATE_LIMIT_STORE``:
+  - ``memory``: a dict in the current process, so the effective limit is
+    multiplied by the number of workers.
+  - ``file``: a SQLite file at ``RATE_LIMIT_PATH`` shared by all workers on
+    the host.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, current_app
+
+from app.utils.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+_rejected = Counter()
+_rejected_lock = threading.Lock()
+
+
+class MemoryBucketStore:
+    """In-process buckets; long-idle ones are pruned as the dict grows."""
+
+    MAX_KEYS = 100_000
+    PRUNE_IDLE_SECONDS = 3600
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, per_second, consume=True) -> float:
+        """Take a token; return 0 when allowed, else seconds until one is free.
+
+        With ``consume=False`` the bucket is only checked.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1 if consume else tokens, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / per_second
+            if len(self._buckets) > self.MAX_KEYS:
+                self._buckets = {
+                    k: v for k, v in self._buckets.items()
+                    if now - v[1] < self.PRUNE_IDLE_SECONDS
+                }
+        return wait
+
+
+class FileBucketStore:
+    """Buckets in a SQLite file shared across worker processes."""
+
+    PRUNE_EVERY = 1000
+    PRUNE_IDLE_SECONDS = 3600
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, burst, per_second, consume=True) -> float:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(now - updated, 0.0) * per_second)
+            if tokens >= 1:
+                tokens, wait = (tokens - 1 if consume else tokens), 0.0
+            else:
+                wait = (1 - tokens) / per_second
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.PRUNE_IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def init_rate_limits(app: Flask) -> None:
+    kind = app.config.get("RATE_LIMIT_STORE", "memory")
+    if kind == "file":
+        store = FileBucketStore(app.config["RATE_LIMIT_PATH"])
+    elif kind == "memory":
+        store = MemoryBucketStore()
+    else:
+        raise RuntimeError(f"Unknown RATE_LIMIT_STORE: {kind}")
+
+    app.extensions["rate_limits"] = store
+    logger.debug("Rate-limit store: %s", kind)
+
+
+def hit(name: str, key: str, burst: int, per_minute: float, consume: bool = True) -> float:
+    """Consume one token from bucket ``name:key``.
+
+    Returns 0 when the hit is allowed, otherwise the number of seconds
+    after which it would be (for a Retry-After header).
+    """
+    if burst <= 0 or per_minute <= 0:
+        return 0.0
+    store = current_app.extensions["rate_limits"]
+    wait = store.take(f"{name}:{key}", burst, per_minute / 60.0, consume)
+    if wait:
+        with _rejected_lock:
+            _rejected[name] += 1
+    return wait
+
+
+def check(name: str, key: str, burst: int, per_minute: float) -> float:
+    """Like ``hit``, but leaves the token in the bucket."""
+    return hit(name, key, burst, per_minute, consume=False)
+
+
+def _prometheus_lines() -> list:
+    with _rejected_lock:
+        items = sorted(_rejected.items())
+    if not items:
+        return []
+    lines = ["# TYPE rate_limit_rejected_total counter"]
+    lines += [f'rate_limit_rejected_total{{limit="{name}"}} {n}' for name, n in items]
+    return lines
+
+
+metrics.register_collector(_prometheus_lines)
@@ -0,0 +1,230 @@
+"""
+Scoring service — final scores computed in one vectorized pass.
+
+``load_score_inputs`` reads every candidate that gets a final score (a
+filière and at least one jury note) in two ordered queries, and turns
+them into one NumPy array per formula variable
+(``app.services.formula.VARIABLES``): jury note aggregates
+(``app.services.jury_aggregation``), the AI note
+(0 when absent), bac and semester averages (NaN when absent) and the
+semester trend.
+
+``store_final_scores`` evaluates the configured formula over those arrays
+and writes every ``FinalScore`` with one bulk UPDATE and one bulk INSERT.
+Candidates missing an input the formula needs are skipped, and a final
+note they kept from an earlier formula is cleared.
+
+``simulate`` evaluates the current formula and several alternatives
+(weight pairs or expressions) over the same arrays and reports, per
+filière, how rankings and admissions would move. Nothing is written, so
+admins can try a formula before changing it with ``PUT /api/admin/formule``.
+"""
+import logging
+import time
+from typing import Dict, NamedTuple
+
+import numpy as np
+from scipy.stats import kendalltau
+from sqlalchemy import func, insert, select, update
+
+from app import db
+from app.models.user_models import Candidat, FinalScore, Filiere, NoteEvaluateur, ScoreAI
+from app.services.jury_aggregation import aggregate
+from app.services.settings_service import get_formula, get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SCENARIOS = 20
+
+# Least-squares slope of S1..S4 against the semester index
+_TREND_WEIGHTS = np.array([-1.5, -0.5, 0.5, 1.5]) / 5.0
+
+
+class ScoreInputs(NamedTuple):
+    candidat_ids: np.ndarray
+    filiere_ids: np.ndarray
+    ai_missing: np.ndarray
+    variables: Dict[str, np.ndarray]
+
+
+def load_score_inputs() -> ScoreInputs:
+    """Arrays ordered by candidate id, one entry per scored candidate."""
+    # Column tuples from select(): no Query row processing for what can be
+    # tens of thousands of rows
+    notes = db.session.execute(
+        select(NoteEvaluateur.candidat_id, NoteEvaluateur.evaluateur_id, NoteEvaluateur.note_eval)
+        .join(Candidat, Candidat.id == NoteEvaluateur.candidat_id)
+        .where(Candidat.filiere_id.isnot(None))
+        .order_by(NoteEvaluateur.candidat_id, NoteEvaluateur.note_eval)
+    ).all()
+    rows = db.session.execute(
+        select(
+            Candidat.id, Candidat.filiere_id, ScoreAI.note_ai, Candidat.moy_bac,
+            Candidat.m_s1, Candidat.m_s2, Candidat.m_s3, Candidat.m_s4,
+        )
+        .outerjoin(ScoreAI, ScoreAI.candidat_id == Candidat.id)
+        .where(
+            Candidat.filiere_id.isnot(None),
+            Candidat.id.in_(select(NoteEvaluateur.candidat_id)),
+        )
+        .order_by(Candidat.id)
+    ).all()
+
+    jury = aggregate(
+        [n[0] for n in notes], [n[1] for n in notes], [n[2] for n in notes],
+    )
+    table = np.array([r[1:] for r in rows], dtype=np.float64).reshape(len(rows), 7)
+    row_cids = np.array([r[0] for r in rows], dtype=np.int64)
+
+    # A note written between the two queries: keep candidates present in both
+    cids, in_notes, in_rows = np.intersect1d(
+        jury.candidat_ids, row_cids, assume_unique=True, return_indices=True
+    )
+    table = table[in_rows]
+
+    ai = table[:, 1]
+    semesters = table[:, 3:7]
+    variables = {
+        "ai": np.nan_to_num(ai, nan=0.0),
+        "moy_bac": table[:, 2],
+        "s1": semesters[:, 0],
+        "s2": semesters[:, 1],
+        "s3": semesters[:, 2],
+        "s4": semesters[:, 3],
+        "trend": semesters @ _TREND_WEIGHTS,
+        **{name: values[in_notes] for name, values in jury.values.items()},
+    }
+    return ScoreInputs(cids, table[:, 0].astype(np.int64), np.isnan(ai), variables)
+
+
+def final_scores(inputs: ScoreInputs, formulas) -> np.ndarray:
+    """Scores of each formula: shape (formulas, candidates), rounded to 2
+    decimals like the stored final notes; NaN where an input is missing."""
+    if not formulas:
+        return np.empty((0, len(inputs.candidat_ids)))
+    scores = np.vstack([f(inputs.variables) for f in formulas])
+    scores[~np.isfinite(scores)] = np.nan
+    return np.round(scores, 2)
+
+
+def store_final_scores() -> dict:
+    """Compute every final score with the configured formula and upsert them."""
+    settings = get_settings()
+    formula = settings.formula
+    inputs = load_score_inputs()
+    scores = final_scores(inputs, [formula])[0]
+    valid = ~np.isnan(scores)
+
+    existing = dict(db.session.query(FinalScore.candidat_id, FinalScore.id).all())
+    updates, inserts = [], []
+    for cid, ai_note, jury_note, final in zip(
+        inputs.candidat_ids.tolist(),
+        inputs.variables["ai"].tolist(),
+        np.round(inputs.variables["jury"], 2).tolist(),
+        scores.tolist(),
+    ):
+        # A score left from an earlier formula would rank a candidate the
+        # current one cannot score
+        final = None if final != final else final
+        values = {"note_ai": ai_note, "note_jury": jury_note, "note_final": final}
+        if cid in existing:
+            updates.append({"id": existing[cid], **values})
+        elif final is not None:
+            inserts.append({"candidat_id": cid, **values})
+
+    if updates:
+        db.session.execute(update(FinalScore), updates)
+    if inserts:
+        db.session.execute(insert(FinalScore), inserts)
+    db.session.commit()
+
+    with_filiere = (
+        db.session.query(func.count(Candidat.id)).filter(Candidat.filiere_id.isnot(None)).scalar()
+    )
+    result = {
+        "formule": formula.source,
+        "updated": int(valid.sum()),
+        "skipped_no_jury_notes": with_filiere - len(inputs.candidat_ids),
+        "skipped_missing_inputs": int((~valid).sum()),
+        "ai_missing": int((inputs.ai_missing & valid).sum()),
+    }
+    # Weights only describe the computation when no expression replaces them
+    if settings.expression is None:
+        result["weights"] = {"jury": settings.weights.human / 100.0, "ai": settings.weights.ai / 100.0}
+    return result
+
+
+def simulate(scenarios, places=None, threshold=10.0) -> dict:
+    """Compare formulas against the current one, writing nothing.
+
+    ``scenarios`` is a list of ``(label, Formula)`` where ``label`` is a dict
+    echoed in the result. A candidate counts as admitted when ranked within
+    ``places`` of their filière (an int for every filière, or a dict by
+    filière name); without ``places``, when their score reaches
+    ``threshold``. Ties rank the lower candidate id first and candidates
+    without a score last.
+    """
+    started = time.perf_counter()
+    inputs = load_score_inputs()
+    names = dict(db.session.query(Filiere.id, Filiere.nom_filiere).all())
+    loaded = time.perf_counter()
+
+    baseline = get_formula()
+    scores = final_scores(inputs, [baseline, *(f for _, f in scenarios)])
+    results = [
+        {**label, "formule": f.source, "admitted_gained": 0, "admitted_lost": 0,
+         "rank_changes": 0, "filieres": []}
+        for label, f in scenarios
+    ]
+
+    for filiere_id in np.unique(inputs.filiere_ids):
+        idx = np.flatnonzero(inputs.filiere_ids == filiere_id)
+        sub = scores[:, idx]
+        m = len(idx)
+
+        # Rank of every candidate under every formula (0 = best, NaN last)
+        ranks = np.argsort(np.argsort(np.where(np.isnan(sub), np.inf, -sub), axis=1, kind="stable"), axis=1)
+
+        name = names.get(int(filiere_id))
+        if places is not None:
+            quota = places.get(name, m) if isinstance(places, dict) else places
+            admitted = (ranks < quota) & ~np.isnan(sub)
+        else:
+            admitted = sub >= threshold
+
+        shift = np.abs(ranks[1:] - ranks[0])
+        gained = (admitted[1:] & ~admitted[0]).sum(axis=1)
+        lost = (admitted[0] & ~admitted[1:]).sum(axis=1)
+        moved = (shift > 0).sum(axis=1)
+
+        for j, result in enumerate(results):
+            tau = kendalltau(sub[0], sub[j + 1], nan_policy="omit")[0] if m > 1 else np.nan
+            result["filieres"].append({
+                "filiere_id": int(filiere_id),
+                "filiere": name,
+                "candidates": m,
+                "kendall_tau": None if np.isnan(tau) else round(float(tau), 4),
+                "rank_changes": int(moved[j]),
+                "max_rank_shift": int(shift[j].max()),
+                "mean_rank_shift": round(float(shift[j].mean()), 3),
+                "admitted_baseline": int(admitted[0].sum()),
+                "admitted": int(admitted[j + 1].sum()),
+                "admitted_gained": int(gained[j]),
+                "admitted_lost": int(lost[j]),
+            })
+            result["admitted_gained"] += int(gained[j])
+            result["admitted_lost"] += int(lost[j])
+            result["rank_changes"] += int(moved[j])
+
+    finished = time.perf_counter()
+    logger.debug("Simulated %d formulas over %d candidates", len(scenarios), len(inputs.candidat_ids))
+    return {
+        "baseline": baseline.source,
+        "candidates": int(len(inputs.candidat_ids)),
+        "admission": {"places": places} if places is not None else {"threshold": threshold},
+        "scenarios": results,
+        "timings_ms": {
+            "load": round((loaded - started) * 1000, 2),
+            "compute": round((finished - loaded) * 1000, 2),
+        },
+    }
@@ -0,0 +1,114 @@
+"""
+Settings service — the global score formula, cached per process.
+
+The final score is either the linear jury/AI weighting or, when one is
+set, a formula expression (``app.services.formula``). Both are read by
+every score computation but change a few times a year. ``get_weights``
+and ``get_formula`` keep them, the formula already compiled, in memory
+together with the row's ``version`` column. A read costs one primary-key
+SELECT of that column and reloads only when it moved. Every update
+increments it in the same statement that stores the new values, so the
+next read in any worker, on any host, sees the change.
+
+The single ``global_settings`` row is created by migration 6d2a9e4c7f18
+(and by seed scripts); a missing row falls back to the model defaults and
+is never inserted from a read path.
+"""
+import logging
+import threading
+from typing import NamedTuple, Optional
+
+from app import db
+from app.models.settings_models import GlobalSettings
+from app.services.formula import Formula, compile_formula, weights_formula
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HUMAN_WEIGHT = 70.0
+DEFAULT_AI_WEIGHT = 30.0
+
+
+class Weights(NamedTuple):
+    human: float
+    ai: float
+
+
+class Settings(NamedTuple):
+    weights: Weights
+    expression: Optional[str]
+    formula: Formula
+
+
+_cache = (None, None)
+_lock = threading.Lock()
+
+
+def get_weights() -> Weights:
+    """Current jury/AI weights in percent (human + ai == 100)."""
+    return get_settings().weights
+
+
+def get_formula() -> Formula:
+    """The compiled formula: the expression if one is set, else the weights."""
+    return get_settings().formula
+
+
+def get_settings() -> Settings:
+    global _cache
+    version = db.session.query(GlobalSettings.version).order_by(GlobalSettings.id).limit(1).scalar()
+    with _lock:
+        cached_version, settings = _cache
+    if settings is not None and cached_version == version:
+        return settings
+
+    row = db.session.query(
+        GlobalSettings.version, GlobalSettings.human_weight, GlobalSettings.ai_weight,
+        GlobalSettings.expression,
+    ).order_by(GlobalSettings.id).first()
+    if row is None:
+        logger.warning("No global_settings row, using default weights %s/%s",
+                       DEFAULT_HUMAN_WEIGHT, DEFAULT_AI_WEIGHT)
+        version, weights, expression = None, Weights(DEFAULT_HUMAN_WEIGHT, DEFAULT_AI_WEIGHT), None
+    else:
+        version = row.version
+        weights, expression = Weights(float(row.human_weight), float(row.ai_weight)), row.expression
+    formula = compile_formula(expression) if expression else weights_formula(*weights)
+    settings = Settings(weights, expression, formula)
+    with _lock:
+        _cache = (version, settings)
+    return settings
+
+
+def update_weights(human: float, ai: float) -> Weights:
+    """Store new weights and drop any expression; raises ValueError from
+    the model validators."""
+    row = _settings_row()
+    row.human_weight = human
+    row.ai_weight = ai
+    row.expression = None
+    _bump_version(row)
+    db.session.commit()
+    return Weights(row.human_weight, row.ai_weight)
+
+
+def update_expression(source: str) -> Formula:
+    """Validate and store a formula expression; raises FormulaError."""
+    formula = compile_formula(source)
+    row = _settings_row()
+    row.expression = formula.source
+    _bump_version(row)
+    db.session.commit()
+    return formula
+
+
+def _bump_version(row: GlobalSettings) -> None:
+    # Evaluated by the database, so concurrent updates never reuse a version
+    row.version = (GlobalSettings.version + 1) if row.id is not None else 1
+
+
+def _settings_row() -> GlobalSettings:
+    row = GlobalSettings.query.order_by(GlobalSettings.id).first()
+    if row is None:
+        row = GlobalSettings(human_weight=DEFAULT_HUMAN_WEIGHT, ai_weight=DEFAULT_AI_WEIGHT)
+        db.session.add(row)
+    return row
@@ -0,0 +1,176 @@
+"""
+Token denylist — revoked JWTs, checked on every authenticated request.
+
+Flask-JWT-Extended calls ``is_revoked`` (registered as the
+``token_in_blocklist_loader``) from ``verify_jwt_in_request``, so every
+``role_required`` and ``jwt_required`` endpoint rejects revoked tokens with
+two key lookups and no database query:
+  - a revoked JTI (logout, rotated refresh token), kept until the token
+    would have expired anyway;
+  - a per-user cutoff: every token of that user issued before it is
+    revoked (role change, account deletion, refresh-token reuse).
+
+Two stores are available, selected with ``TOKEN_DENYLIST_STORE``:
+  - ``file`` (default): a SQLite file at ``TOKEN_DENYLIST_PATH`` shared by
+    all workers on the host.
+  - ``memory``: dicts in the current process. Revocations are not seen by
+    other workers and are lost on restart, so a revoked refresh token
+    would keep working elsewhere; it is refused outside debug and testing.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import Flask, current_app, jsonify
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryDenylist:
+    """In-process denylist; expired JTIs are dropped as new ones arrive."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._jtis = {}
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def revoke_jti(self, jti: str, expires: float) -> bool:
+        """Add a JTI; return False if it was already revoked."""
+        with self._lock:
+            if jti in self._jtis:
+                return False
+            self._jtis[jti] = expires
+            if len(self._jtis) % self.PRUNE_EVERY == 0:
+                now = time.time()
+                self._jtis = {k: exp for k, exp in self._jtis.items() if exp > now}
+            return True
+
+    def revoke_user(self, user_id: str, before: float) -> None:
+        with self._lock:
+            self._users[user_id] = max(before, self._users.get(user_id, 0.0))
+
+    def has_jti(self, jti: str) -> bool:
+        with self._lock:
+            return jti in self._jtis
+
+    def is_revoked(self, jti: str, user_id: str, issued_at: float) -> bool:
+        with self._lock:
+            return jti in self._jtis or issued_at < self._users.get(user_id, 0.0)
+
+
+class FileDenylist:
+    """Denylist in a SQLite file shared across worker processes."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS revoked_jtis ("
+            "jti TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS revoked_users ("
+            "user_id TEXT PRIMARY KEY, revoked_before REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def revoke_jti(self, jti: str, expires: float) -> bool:
+        conn = self._conn()
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO revoked_jtis (jti, expires) VALUES (?, ?)", (jti, expires)
+        ).rowcount
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM revoked_jtis WHERE expires < ?", (time.time(),))
+        return inserted == 1
+
+    def revoke_user(self, user_id: str, before: float) -> None:
+        self._conn().execute(
+            "INSERT INTO revoked_users (user_id, revoked_before) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET "
+            "revoked_before = MAX(revoked_before, excluded.revoked_before)",
+            (user_id, before),
+        )
+
+    def has_jti(self, jti: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM revoked_jtis WHERE jti = ?", (jti,)
+        ).fetchone() is not None
+
+    def is_revoked(self, jti: str, user_id: str, issued_at: float) -> bool:
+        row = self._conn().execute(
+            "SELECT EXISTS(SELECT 1 FROM revoked_jtis WHERE jti = ?), "
+            "(SELECT revoked_before FROM revoked_users WHERE user_id = ?)",
+            (jti, user_id),
+        ).fetchone()
+        return bool(row[0]) or issued_at < (row[1] or 0.0)
+
+
+def init_token_denylist(app: Flask, jwt) -> None:
+    kind = app.config.get("TOKEN_DENYLIST_STORE", "file")
+    if kind == "file":
+        store = FileDenylist(app.config["TOKEN_DENYLIST_PATH"])
+    elif kind == "memory":
+        if not (app.debug or app.testing):
+            raise RuntimeError(
+                "TOKEN_DENYLIST_STORE=memory only revokes tokens in one worker; "
+                "use \"file\" outside debug and testing"
+            )
+        store = MemoryDenylist()
+    else:
+        raise RuntimeError(f"Unknown TOKEN_DENYLIST_STORE: {kind}")
+
+    app.extensions["token_denylist"] = store
+    jwt.token_in_blocklist_loader(is_revoked)
+    jwt.revoked_token_loader(_revoked_response)
+    logger.debug("Token denylist store: %s", kind)
+
+
+def get_denylist():
+    return current_app.extensions["token_denylist"]
+
+
+def is_revoked(jwt_header, jwt_payload) -> bool:
+    return get_denylist().is_revoked(
+        jwt_payload["jti"], str(jwt_payload["sub"]), jwt_payload.get("iat", 0)
+    )
+
+
+def _revoked_response(jwt_header, jwt_payload):
+    # A rotated refresh token coming back means it was copied: end every
+    # session of that user, the legitimate client logs in again. Tokens
+    # revoked by a user cutoff are just stale and need no escalation.
+    if jwt_payload.get("type") == "refresh" and get_denylist().has_jti(jwt_payload["jti"]):
+        logger.warning("Reuse of a revoked refresh token for user %s", jwt_payload["sub"])
+        revoke_user(jwt_payload["sub"])
+    return jsonify(msg="Session expirée, veuillez vous reconnecter."), 401
+
+
+def revoke_token(jwt_payload) -> bool:
+    """Revoke one decoded token; False if it had already been revoked."""
+    return get_denylist().revoke_jti(jwt_payload["jti"], jwt_payload["exp"])
+
+
+def revoke_user(user_id) -> None:
+    """Revoke every token issued to ``user_id`` up to the current second.
+
+    ``iat`` has one-second resolution, so the cutoff covers the whole
+    current second; a new login in that same second has to be repeated.
+    """
+    get_denylist().revoke_user(str(user_id), int(time.time()) + 1)
@@ -0,0 +1,176 @@
+"""
+Engine and connection-pool setup.
+
+``init_database`` replaces a bare ``db.init_app``: it derives
+``SQLALCHEMY_ENGINE_OPTIONS`` from the ``DB_*`` settings with per-dialect
+defaults, then installs connection hooks on the created engine.
+
+  - MySQL / PostgreSQL: a ``TimedQueuePool`` sized by ``DB_POOL_SIZE`` and
+    ``DB_MAX_OVERFLOW``, with ``pool_pre_ping`` (stale connections after a
+    server restart are replaced transparently), ``pool_recycle`` and an
+    optional per-session statement timeout (``DB_STATEMENT_TIMEOUT_MS``).
+  - SQLite files: WAL journal mode and a busy timeout so concurrent
+    workers wait for the write lock instead of failing with
+    "database is locked". Pool sizing keeps SQLAlchemy's defaults.
+
+With ``DB_REPLICA_URL`` set, the replica is added as the ``replica`` bind
+with the same per-dialect options (routing: ``app.utils.db_routing``).
+
+Explicit ``SQLALCHEMY_ENGINE_OPTIONS`` entries always win. Pool gauges,
+checkout wait time and timeouts are exported through the instrumentation
+``/metrics`` endpoint.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app import db
+from app.utils.db_routing import REPLICA_BIND
+from app.utils.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+_pools = weakref.WeakSet()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_seconds = 0.0
+        self.waits = 0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+        _pools.add(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.wait_seconds += time.perf_counter() - start
+                self.waits += 1
+
+
+def engine_options(uri, config) -> dict:
+    """Per-dialect engine options for ``uri`` from the DB_* settings."""
+    if not uri:
+        return {}
+    url = make_url(uri)
+
+    if url.get_backend_name() == "sqlite":
+        options = {"connect_args": {"timeout": config.get("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000.0}}
+        if url.database not in (None, "", ":memory:"):
+            # Same pool SQLAlchemy picks for SQLite files, plus wait metrics
+            options["poolclass"] = TimedQueuePool
+        return options
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 3600),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+
+
+def init_database(app: Flask) -> None:
+    explicit = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    options = engine_options(app.config.get("SQLALCHEMY_DATABASE_URI"), app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**options, **explicit}
+
+    replica_uri = app.config.get("DB_REPLICA_URL")
+    if replica_uri:
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds[REPLICA_BIND] = {
+            "url": replica_uri, **engine_options(replica_uri, app.config), **explicit,
+        }
+        app.config["SQLALCHEMY_BINDS"] = binds
+
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _install_connect_hook(engine, app.config)
+
+
+def _install_connect_hook(engine, config) -> None:
+    backend = engine.dialect.name
+    wal = config.get("SQLITE_WAL", True)
+    timeout_ms = int(config.get("DB_STATEMENT_TIMEOUT_MS", 0))
+
+    if backend == "sqlite":
+        if engine.url.database in (None, "", ":memory:"):
+            return
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            if not isinstance(dbapi_connection, sqlite3.Connection):
+                return
+            cursor = dbapi_connection.cursor()
+            if wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                # Safe with WAL and much cheaper than FULL on every commit
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+            cursor.close()
+        return
+
+    if not timeout_ms:
+        return
+    if backend == "mysql":
+        statement = f"SET SESSION max_execution_time = {timeout_ms}"
+    elif backend == "postgresql":
+        statement = f"SET statement_timeout = {timeout_ms}"
+    else:
+        logger.warning("DB_STATEMENT_TIMEOUT_MS is not supported for %s", backend)
+        return
+
+    @event.listens_for(engine, "connect")
+    def _statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(statement)
+        cursor.close()
+
+
+def _prometheus_lines() -> list:
+    pools = list(_pools)
+    if not pools:
+        return []
+    size = sum(p.size() for p in pools)
+    checked_out = sum(p.checkedout() for p in pools)
+    overflow = sum(max(p.overflow(), 0) for p in pools)
+    wait_seconds = sum(p.wait_seconds for p in pools)
+    waits = sum(p.waits for p in pools)
+    timeouts = sum(p.timeouts for p in pools)
+    return [
+        "# TYPE db_pool_size gauge",
+        f"db_pool_size {size}",
+        "# TYPE db_pool_checked_out gauge",
+        f"db_pool_checked_out {checked_out}",
+        "# TYPE db_pool_overflow gauge",
+        f"db_pool_overflow {overflow}",
+        "# TYPE db_pool_checkout_wait_seconds summary",
+        f"db_pool_checkout_wait_seconds_sum {wait_seconds:.6f}",
+        f"db_pool_checkout_wait_seconds_count {waits}",
+        "# TYPE db_pool_timeouts_total counter",
+        f"db_pool_timeouts_total {timeouts}",
+    ]
+
+
+metrics.register_collector(_prometheus_lines)
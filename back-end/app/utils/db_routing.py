@@ -0,0 +1,54 @@
+"""
+Session routing between the primary database and a read replica.
+
+When ``DB_REPLICA_URL`` is set, ``init_database`` registers it as the
+``replica`` bind and ``db.session`` (a ``RoutingSession``) sends a query to
+it only when all of the following hold:
+  - the current request opted in with ``@replica_reads`` and none of the
+    tables it reads changed within ``DB_REPLICA_MAX_LAG_SECONDS`` (the
+    staleness tolerance), so its response, and any ETag built on it,
+    cannot predate a write the replica has not applied yet;
+  - the statement is a SELECT;
+  - the session has not written anything yet. This sticks until the
+    session is removed at the end of the request, so read-after-write
+    inside a request stays on the primary even after a commit.
+
+To try it locally, point ``DB_REPLICA_URL`` at a copy of a SQLite primary
+(``sqlite3 primary.db ".backup replica.db"``) or at a second local
+Postgres instance fed by streaming replication.
+
+Everything else, including flushes, DML, background threads and CLI
+scripts, uses the primary. This module must not import ``app`` since the
+session class is needed to create ``db`` itself.
+"""
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+_WROTE_KEY = "db_routing_wrote"
+
+
+class RoutingSession(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if isinstance(clause, UpdateBase):
+                self.info[_WROTE_KEY] = True
+            elif self._use_replica(clause):
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        if self._flushing or self.info.get(_WROTE_KEY) or not isinstance(clause, Select):
+            return False
+        return has_request_context() and g.get("_db_use_replica", False)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session, flush_context):
+    session.info[_WROTE_KEY] = True
+
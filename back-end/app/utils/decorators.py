@@ -1,6 +1,10 @@
+import hashlib
+import time
 from functools import wraps
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
-from flask import jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from flask import current_app, g, jsonify, request
+
+from app.services.data_versions import get_store
 
 def role_required(*roles):
     def decorator(fn):
@@ -13,3 +17,55 @@ def role_required(*roles):
             return fn(*args, **kwargs)
         return wrapper
     return decorator
+
+
+def versioned_etag(*tables, per_user=False):
+    """Answer 304 from table versions alone when the client's ETag matches.
+
+    The ETag covers the request path and query string, the current version
+    of every table in ``tables`` and, with ``per_user``, the JWT identity.
+    Place it under ``role_required`` so authorization still runs first.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            store = get_store()
+            versions = store.get(tables)
+            key = "|".join([
+                store.token,
+                request.full_path,
+                str(get_jwt_identity()) if per_user else "",
+                ",".join(f"{t}:{versions[t]}" for t in tables),
+            ])
+            etag = hashlib.md5(key.encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def replica_reads(*tables):
+    """Serve this endpoint's SELECTs from the read replica when it is safe.
+
+    The replica is used only if ``DB_REPLICA_URL`` is configured and none of
+    ``tables`` changed within ``DB_REPLICA_MAX_LAG_SECONDS``; otherwise the
+    request reads from the primary. Place it under ``versioned_etag`` so a
+    304 never touches either database.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_app.config.get("DB_REPLICA_URL"):
+                max_lag = current_app.config.get("DB_REPLICA_MAX_LAG_SECONDS", 5)
+                g._db_use_replica = get_store().last_changed(tables) < time.time() - max_lag
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
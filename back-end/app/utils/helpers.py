@@ -1,3 +1,6 @@
+import re
+
+from flask import request
 from werkzeug.security import check_password_hash, generate_password_hash
 
 
@@ -7,3 +10,55 @@ def hash_password(password: str) -> str:
 
 def verify_password(password: str, hashed: str) -> bool:
     return check_password_hash(hashed, password)
+
+
+def normalize_email(email: str) -> str:
+    """The stored form of an email: every lookup, cache key and rate-limit
+    bucket uses it, so case and surrounding spaces never matter."""
+    return email.strip().lower()
+
+
+def client_ip() -> str:
+    """The caller's address, for per-IP limits.
+
+    ``create_app`` wraps the app in ProxyFix when ``TRUSTED_PROXY_HOPS`` is
+    set, so behind a proxy this is the client, not the proxy.
+    """
+    return request.remote_addr or "-"
+
+
+# Where each backend names the violated unique key in an IntegrityError:
+# SQLite "UNIQUE constraint failed: users.email", MySQL "Duplicate entry
+# '...' for key 'users.email'", PostgreSQL "Key (email)=(...) already exists".
+_UNIQUE_KEY_PATTERNS = [
+    re.compile(r"UNIQUE constraint failed: ([\w.]+)"),
+    re.compile(r"Duplicate entry .* for key '([\w.]+)'"),
+    re.compile(r"Key \((\w+)\)=\("),
+    re.compile(r'unique constraint "(\w+)"'),
+]
+
+
+USER_UNIQUE_MESSAGES = {
+    "email": "Email déjà utilisé",
+    "cin": "CIN déjà utilisé",
+    "phone_num": "Téléphone déjà utilisé",
+}
+
+
+def duplicate_field(exc, fields):
+    """Return which of ``fields`` a unique-constraint IntegrityError is about.
+
+    Unnamed unique constraints are named after their column on every
+    supported backend, so the key name in the driver message identifies
+    the field. Returns None for any other integrity error.
+    """
+    message = str(getattr(exc, "orig", exc))
+    for pattern in _UNIQUE_KEY_PATTERNS:
+        match = pattern.search(message)
+        if not match:
+            continue
+        key = match.group(1).rsplit(".", 1)[-1]
+        for field in fields:
+            if key == field or re.search(rf"(^|_){field}(_|$)", key):
+                return field
+    return None
@@ -0,0 +1,233 @@
+"""
+Request-level performance instrumentation.
+
+``init_instrumentation`` (called from ``create_app``) records for every
+request:
+  - wall-clock latency, as a per-endpoint histogram;
+  - the number of SQL statements and the time spent in them, via
+    SQLAlchemy cursor events;
+  - the number of ORM objects loaded, via the mapper ``load`` event.
+
+Requests slower than ``SLOW_REQUEST_MS``, statements slower than
+``SLOW_QUERY_MS`` and statements repeated at least ``N_PLUS_ONE_THRESHOLD``
+times within one request (the N+1 signature) are logged as warnings.
+The counters are exposed in Prometheus text format at ``/metrics`` when
+``METRICS_ENABLED`` is set, behind ``METRICS_TOKEN`` or the ADMIN role
+(see ``app.routes.metrics_routes``); they are per process, so each worker
+must be scraped separately.
+
+With ``PROFILE_REQUESTS`` enabled, sending ``X-Profile: 1`` dumps a
+cProfile file for that request into ``PROFILE_DIR``.
+"""
+import cProfile
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency_buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.latency_sum = defaultdict(float)
+        self.latency_count = defaultdict(int)
+        self.requests = Counter()
+        self.sql_statements = Counter()
+        self.sql_seconds = defaultdict(float)
+        self.orm_objects = Counter()
+        self.slow_requests = Counter()
+        self.n_plus_one = Counter()
+        self._collectors = []
+
+    def observe(self, endpoint, method, status, seconds, stats, slow=False, n_plus_one=False) -> None:
+        key = (endpoint, method)
+        with self._lock:
+            buckets = self.latency_buckets[key]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            self.latency_sum[key] += seconds
+            self.latency_count[key] += 1
+            self.requests[(endpoint, method, status)] += 1
+            self.sql_statements[endpoint] += stats.statements
+            self.sql_seconds[endpoint] += stats.sql_seconds
+            self.orm_objects[endpoint] += stats.orm_objects
+            if slow:
+                self.slow_requests[endpoint] += 1
+            if n_plus_one:
+                self.n_plus_one[endpoint] += 1
+
+    def register_collector(self, fn) -> None:
+        """Add a callable returning extra Prometheus lines at scrape time."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP http_request_duration_seconds Request latency.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (endpoint, method), buckets in sorted(self.latency_buckets.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for bound, n in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+                count = self.latency_count[(endpoint, method)]
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {self.latency_sum[(endpoint, method)]:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {count}")
+
+            lines += ["# TYPE http_requests_total counter"]
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {n}')
+
+            for name, series in (
+                ("db_statements_total", self.sql_statements),
+                ("db_statement_seconds_total", self.sql_seconds),
+                ("orm_objects_loaded_total", self.orm_objects),
+                ("slow_requests_total", self.slow_requests),
+                ("n_plus_one_detected_total", self.n_plus_one),
+            ):
+                lines.append(f"# TYPE {name} counter")
+                for endpoint, value in sorted(series.items()):
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} {value:g}')
+
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("statements", "sql_seconds", "orm_objects", "statement_counts")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.orm_objects = 0
+        self.statement_counts = Counter()
+
+
+metrics = MetricsRegistry()
+
+
+def _current_stats():
+    if has_request_context():
+        return g.get("_request_stats")
+    return None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append((statement, time.perf_counter()))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()[1]
+    stats = _current_stats()
+    if stats is None:
+        return
+
+    stats.statements += 1
+    stats.sql_seconds += elapsed
+    stats.statement_counts[statement] += 1
+
+    slow_ms = g.get("_slow_query_ms")
+    if slow_ms is not None and elapsed * 1000 >= slow_ms:
+        logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, request.endpoint, statement[:500])
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed_query(exception_context):
+    # after_cursor_execute never runs for a failed statement; drop its start
+    # unless it failed before before_cursor_execute pushed one
+    conn = exception_context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts and starts[-1][0] == exception_context.statement:
+        starts.pop()
+
+
+@event.listens_for(db.Model, "load", propagate=True)
+def _count_loaded(target, context):
+    stats = _current_stats()
+    if stats is not None:
+        stats.orm_objects += 1
+
+
+def init_instrumentation(app: Flask) -> None:
+    slow_request_ms = app.config.get("SLOW_REQUEST_MS", 500)
+    slow_query_ms = app.config.get("SLOW_QUERY_MS", 100)
+    n_plus_one = app.config.get("N_PLUS_ONE_THRESHOLD", 10)
+    profile_enabled = app.config.get("PROFILE_REQUESTS", False)
+    profile_dir = app.config.get("PROFILE_DIR")
+
+    @app.before_request
+    def _start_request():
+        g._request_stats = RequestStats()
+        g._slow_query_ms = slow_query_ms
+        g._request_start = time.perf_counter()
+        if profile_enabled and request.headers.get("X-Profile") == "1":
+            g._profiler = cProfile.Profile()
+            g._profiler.enable()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_request_start", None)
+        stats = g.pop("_request_stats", None)
+        if start is None or stats is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or "unmatched"
+
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _dump_profile(profiler, profile_dir, endpoint)
+
+        slow = elapsed * 1000 >= slow_request_ms
+        if slow:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d SQL statements (%.1f ms), %d ORM objects",
+                request.method, request.path, elapsed * 1000,
+                stats.statements, stats.sql_seconds * 1000, stats.orm_objects,
+            )
+
+        repeated = False
+        if stats.statement_counts:
+            statement, repeats = stats.statement_counts.most_common(1)[0]
+            repeated = repeats >= n_plus_one
+            if repeated:
+                logger.warning(
+                    "Possible N+1 on %s: statement executed %d times: %s",
+                    endpoint, repeats, statement[:300],
+                )
+
+        metrics.observe(
+            endpoint, request.method, response.status_code, elapsed, stats,
+            slow=slow, n_plus_one=repeated,
+        )
+        return response
+
+
+def _dump_profile(profiler, profile_dir, endpoint) -> None:
+    if not profile_dir:
+        return
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{endpoint}-{int(time.time() * 1000)}.prof")
+    profiler.dump_stats(path)
+    logger.info("Request profile written to %s", path)
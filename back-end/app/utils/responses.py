@@ -0,0 +1,116 @@
+"""
+App-level response layer: fast JSON provider, compression and ETags.
+
+``init_response_layer`` is called from ``create_app``. It swaps Flask's
+JSON provider for an orjson-backed one when orjson is installed, adds
+weak ETags with 304 short-circuiting to successful GET JSON responses,
+and gzip/brotli-encodes bodies above ``COMPRESS_MIN_SIZE`` when the
+client accepts it.
+"""
+import gzip
+import hashlib
+
+import numpy as np
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson.
+
+    Payloads are not byte-identical to Flask's default provider: orjson
+    writes non-ASCII characters (accented names, French messages) as raw
+    UTF-8 where Flask escapes them as ``\\uXXXX``, and NaN/Infinity as
+    ``null``. Body sizes and the ETags computed over them therefore change
+    when the provider is switched; clients see one extra 200 per resource.
+    Datetimes go through Flask's own ``default`` hook so they keep the
+    HTTP-date format the front-end already parses.
+
+    NumPy scalars and arrays are serialized natively, so a value a
+    service forgot to cast is not a 500. Arrays orjson cannot take
+    (non-contiguous, object dtype) go through ``tolist`` in ``_default``.
+    """
+
+    def _options(self, indent=False) -> int:
+        option = (
+            orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = self._options(indent=bool(kwargs.get("indent")))
+        return orjson.dumps(obj, default=self._default, option=option).decode()
+
+    def _default(self, o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        return self.default(o)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self._default, option=self._options(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def init_response_layer(app: Flask) -> None:
+    if orjson is not None and app.config.get("JSON_USE_ORJSON", True):
+        app.json = OrjsonProvider(app)
+
+    @app.after_request
+    def _finalize_response(response):
+        if (
+            response.direct_passthrough
+            or response.status_code != 200
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        if app.config.get("JSON_ETAGS", True) and request.method == "GET" and response.is_json:
+            if not response.get_etag()[0]:
+                response.set_etag(hashlib.md5(response.get_data()).hexdigest(), weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        return _compress(app, response)
+
+
+def _compress(app: Flask, response):
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 1024)
+    if response.content_length is None or response.content_length < min_size:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        body = brotli.compress(response.get_data(), quality=app.config.get("COMPRESS_BR_LEVEL", 4))
+        encoding = "br"
+    elif accepted["gzip"]:
+        body = gzip.compress(response.get_data(), compresslevel=app.config.get("COMPRESS_LEVEL", 6))
+        encoding = "gzip"
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
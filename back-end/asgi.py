@@ -0,0 +1,5 @@
+import os
+from app.asgi import create_asgi_app
+
+# uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 4
+application = create_asgi_app(os.getenv("APP_CONFIG", "config.Config"))
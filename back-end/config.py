@@ -12,15 +12,119 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DB_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Engine / pool tuning, applied per dialect by app.utils.database
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))  # 0 = no limit
+    # Read replica for @replica_reads endpoints; tables written within the
+    # lag tolerance are read from the primary
+    DB_REPLICA_URL = os.getenv("DB_REPLICA_URL")
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5))
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)
+    # Short-lived access tokens, renewed with rotating refresh tokens
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_ACCESS_MINUTES", 15)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_DAYS", 7)))
+    # "file" (SQLite file shared by all workers) or "memory" (per worker,
+    # refused outside debug and testing)
+    TOKEN_DENYLIST_STORE = os.getenv("TOKEN_DENYLIST_STORE", "file")
+    TOKEN_DENYLIST_PATH = os.getenv(
+        "TOKEN_DENYLIST_PATH", os.path.join(BASE_DIR, "var", "token_denylist.sqlite3")
+    )
 
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024
 
+    # ASGI deployment (asgi.py): threads running the Flask views per process,
+    # and request-body bytes kept in memory before spooling to disk
+    ASGI_THREADS = int(os.getenv("ASGI_THREADS", 16))
+    ASGI_SPOOL_MAX_MEMORY = int(os.getenv("ASGI_SPOOL_MAX_MEMORY", 1024 * 1024))
+
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173")
     MODEL_PATH = os.getenv(
         "MODEL_PATH",
         os.path.normpath(os.path.join(BASE_DIR, "scripts", "encoders", "rf_pipeline.pkl")),
     )
     LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "INFO")
+    ML_CACHE_SIZE = int(os.getenv("ML_CACHE_SIZE", 50000))
+    ML_REALTIME_SCORING = os.getenv("ML_REALTIME_SCORING", "0") == "1"
+    ML_MICROBATCH_WAIT_MS = float(os.getenv("ML_MICROBATCH_WAIT_MS", 20))
+    ML_MICROBATCH_MAX = int(os.getenv("ML_MICROBATCH_MAX", 256))
+
+    JSON_USE_ORJSON = os.getenv("JSON_USE_ORJSON", "1") == "1"
+    JSON_ETAGS = os.getenv("JSON_ETAGS", "1") == "1"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", 4))
+
+    # /metrics is off unless enabled; it then needs METRICS_TOKEN as a bearer
+    # token, or an ADMIN access token when no METRICS_TOKEN is set
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+    PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "var", "profiles"))
+
+    # "file" (SQLite file shared by all workers) or "memory" (single worker
+    # only: ETags, replica routing and version-tagged caches go stale)
+    DATA_VERSION_STORE = os.getenv("DATA_VERSION_STORE", "file")
+    DATA_VERSION_PATH = os.getenv(
+        "DATA_VERSION_PATH", os.path.join(BASE_DIR, "var", "data_versions.sqlite3")
+    )
+
+    # "memory" (per worker) or "file" (SQLite file shared by all workers)
+    RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+    RATE_LIMIT_PATH = os.getenv(
+        "RATE_LIMIT_PATH", os.path.join(BASE_DIR, "var", "rate_limits.sqlite3")
+    )
+    # Reverse proxies (load balancer, nginx) in front of the app. That many
+    # X-Forwarded-For/-Proto hops are trusted, so per-IP limits see the
+    # client instead of the proxy. Keep 0 when clients connect directly:
+    # a trusted hop the client controls lets it pick its own address.
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+    # Token buckets: burst size and refill per minute; 0 disables a limit.
+    # The login per-IP limit is off by default: a campus NAT, or a proxy not
+    # declared in TRUSTED_PROXY_HOPS, puts many applicants behind one
+    # address. Enable it (e.g. 100 burst, 60/min) once client IPs are real.
+    LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", 0))
+    LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", 60))
+    LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", 5))
+    LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", 3))
+    LOGIN_NEGATIVE_CACHE_SECONDS = float(os.getenv("LOGIN_NEGATIVE_CACHE_SECONDS", 60))
+    CONTACT_IP_BURST = int(os.getenv("CONTACT_IP_BURST", 5))
+    CONTACT_IP_PER_MINUTE = float(os.getenv("CONTACT_IP_PER_MINUTE", 2))
+
+    # Contact form ingestion: spool file shared by all workers, batched inserts
+    CONTACT_SPOOL_PATH = os.getenv(
+        "CONTACT_SPOOL_PATH", os.path.join(BASE_DIR, "var", "contact_spool.sqlite3")
+    )
+    CONTACT_QUEUE_MAX = int(os.getenv("CONTACT_QUEUE_MAX", 1000))
+    CONTACT_BATCH_MAX = int(os.getenv("CONTACT_BATCH_MAX", 200))
+    CONTACT_BATCH_WAIT_MS = float(os.getenv("CONTACT_BATCH_WAIT_MS", 500))
+    CONTACT_SPOOL_STALE_SECONDS = float(os.getenv("CONTACT_SPOOL_STALE_SECONDS", 60))
+    CONTACT_DEDUPE_SECONDS = float(os.getenv("CONTACT_DEDUPE_SECONDS", 3600))
+    CONTACT_MESSAGE_MAX = int(os.getenv("CONTACT_MESSAGE_MAX", 5000))
+
+    JURY_NOTES_PER_CANDIDATE = int(os.getenv("JURY_NOTES_PER_CANDIDATE", 2))
+    # Robust jury aggregates (app.services.jury_aggregation)
+    JURY_TRIM_PROPORTION = float(os.getenv("JURY_TRIM_PROPORTION", 0.2))
+    JURY_ZSCORE_MIN_NOTES = int(os.getenv("JURY_ZSCORE_MIN_NOTES", 5))
+    JURY_STATS_MAX_AGE_SECONDS = float(os.getenv("JURY_STATS_MAX_AGE_SECONDS", 300))
+
+
+class ProductionConfig(Config):
+    """Select with APP_CONFIG=config.ProductionConfig."""
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    # Below MySQL's wait_timeout and typical proxy idle limits
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
@@ -0,0 +1,32 @@
+"""re-impute candidat_features.moy_bac with the semester mean
+
+Revision ID: 2d6f8a4c9e17
+Revises: 7b3e9f1a6c84
+Create Date: 2026-10-19 21:15:37.402918
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '2d6f8a4c9e17'
+down_revision = '7b3e9f1a6c84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same rule as feature_store.impute_moy_bac; 8c4d2f6a1b93 stored 0
+    op.execute("""
+        UPDATE candidat_features
+        SET moy_bac = (m_s1 + m_s2 + m_s3 + m_s4) / 4.0
+        WHERE candidat_id IN (SELECT id FROM candidats WHERE moy_bac IS NULL)
+    """)
+
+
+def downgrade():
+    op.execute("""
+        UPDATE candidat_features
+        SET moy_bac = 0
+        WHERE candidat_id IN (SELECT id FROM candidats WHERE moy_bac IS NULL)
+    """)
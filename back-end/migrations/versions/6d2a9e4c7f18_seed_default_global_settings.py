@@ -0,0 +1,30 @@
+"""seed the default global_settings row
+
+Revision ID: 6d2a9e4c7f18
+Revises: 1f6b3c8e5a27
+Create Date: 2026-10-19 17:22:45.903116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d2a9e4c7f18'
+down_revision = '1f6b3c8e5a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Read paths no longer insert it; same defaults as settings_service
+    op.execute("""
+        INSERT INTO global_settings (id, human_weight, ai_weight)
+        SELECT 1, 70.0, 30.0
+        WHERE NOT EXISTS (SELECT 1 FROM global_settings)
+    """)
+
+
+def downgrade():
+    # The row may have been edited since; leave it in place
+    pass
@@ -0,0 +1,207 @@
+"""
+Compare connection capacity of the sync (gunicorn) and ASGI (uvicorn) tiers.
+
+For each server mode and each number of slow clients, the script starts
+the server, opens that many slow connections and, while they are held,
+measures fast probe requests:
+  - slow uploaders send a POST /api/auth/login body one byte at a time,
+    the way a candidate on a bad link uploads documents;
+  - slow downloaders fetch an uploaded PDF while reading it slowly.
+A tier that dedicates a worker per connection stops answering probes once
+the slow clients outnumber its workers.
+
+Requires gunicorn and uvicorn in the environment.
+
+Usage:
+  python scripts/bench_asgi.py --modes sync asgi --slow-clients 0 8 32 128
+  python scripts/bench_asgi.py --workers 4 --threads 16 --output scripts/data/bench/asgi.json
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(base_dir)
+sys.path.insert(0, backend_dir)
+
+BENCH_FILE = "_bench/sample.pdf"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync vs ASGI concurrent-connection benchmark.")
+    parser.add_argument("--modes", nargs="+", choices=["sync", "asgi"], default=["sync", "asgi"])
+    parser.add_argument("--slow-clients", nargs="+", type=int, default=[0, 8, 32, 128])
+    parser.add_argument("--workers", type=int, default=2, help="server processes")
+    parser.add_argument("--threads", type=int, default=8, help="ASGI_THREADS per ASGI worker")
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--probe-concurrency", type=int, default=8)
+    parser.add_argument("--probe-timeout", type=float, default=5.0)
+    parser.add_argument("--file-kb", type=int, default=512, help="size of the PDF served to downloaders")
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--output", help="JSON results path")
+    return parser.parse_args()
+
+
+def prepare(args) -> dict:
+    """Create an empty SQLite database and the PDF served by /uploads."""
+    workdir = tempfile.mkdtemp(prefix="estsb-asgi-")
+    env = dict(
+        os.environ,
+        DB_URL="sqlite:///" + os.path.join(workdir, "bench.db"),
+        SECRET_KEY="bench", JWT_SECRET_KEY="bench-" + "x" * 32,
+        LOGGING_LEVEL="WARNING", ASGI_THREADS=str(args.threads),
+    )
+    os.environ.update(env)
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        path = os.path.join(app.config["UPLOAD_FOLDER"], BENCH_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n" + os.urandom(args.file_kb * 1024))
+    return {"env": env, "workdir": workdir, "file": path}
+
+
+def start_server(mode, args, env) -> subprocess.Popen:
+    bind = f"127.0.0.1:{args.port}"
+    if mode == "sync":
+        # app.py is shadowed by the app package, so use the factory directly
+        cmd = ["gunicorn", "-w", str(args.workers), "-b", bind, "app:create_app()"]
+    else:
+        cmd = ["uvicorn", "asgi:application", "--host", "127.0.0.1", "--port", str(args.port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=backend_dir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and proc.poll() is None:
+        try:
+            socket.create_connection(("127.0.0.1", args.port), timeout=0.5).close()
+            time.sleep(0.5)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit(f"{mode} server did not start: {' '.join(cmd)}")
+
+
+def slow_client(port, kind, stop: threading.Event) -> None:
+    try:
+        sock = socket.create_connection(("127.0.0.1", port), timeout=60)
+        if kind == "upload":
+            body = json.dumps({"email": "nobody@bench", "password": "x" * 200}).encode()
+            sock.sendall(
+                b"POST /api/auth/login HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            )
+            for i in range(len(body)):
+                if stop.wait(0.25):
+                    break
+                sock.sendall(body[i:i + 1])
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.sendall(f"GET /uploads/{BENCH_FILE} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+            while not stop.wait(0.25):
+                if not sock.recv(512):
+                    break
+        sock.close()
+    except OSError:
+        pass
+
+
+def probe(port, timeout) -> float:
+    start = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        conn.request("POST", "/api/auth/login", body=b"{}", headers={"Content-Type": "application/json"})
+        status = conn.getresponse().status
+        conn.close()
+    except OSError:
+        return None
+    return time.perf_counter() - start if status == 400 else None
+
+
+def run_level(args, n_slow) -> dict:
+    stop = threading.Event()
+    holders = [
+        threading.Thread(target=slow_client, args=(args.port, "upload" if i % 2 == 0 else "download", stop),
+                         daemon=True)
+        for i in range(n_slow)
+    ]
+    for t in holders:
+        t.start()
+    time.sleep(1.0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.probe_concurrency) as pool:
+        results = list(pool.map(lambda _: probe(args.port, args.probe_timeout), range(args.probes)))
+    wall = time.perf_counter() - start
+
+    stop.set()
+    for t in holders:
+        t.join(timeout=5)
+
+    ok = sorted(r for r in results if r is not None)
+    pct = lambda p: round(ok[min(len(ok) - 1, int(p * len(ok)))] * 1000, 1) if ok else None
+    return {
+        "slow_clients": n_slow,
+        "probes": len(results),
+        "failed": len(results) - len(ok),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "throughput_rps": round(len(ok) / wall, 1),
+    }
+
+
+def main():
+    args = parse_args()
+    setup = prepare(args)
+    results = {}
+    print(f"{'mode':<6}{'slow':>6}{'probes':>8}{'failed':>8}{'p50 ms':>10}{'p95 ms':>10}{'rps':>9}")
+    try:
+        for mode in args.modes:
+            results[mode] = []
+            for n_slow in args.slow_clients:
+                proc = start_server(mode, args, setup["env"])
+                try:
+                    res = run_level(args, n_slow)
+                finally:
+                    proc.terminate()
+                    proc.wait(timeout=15)
+                results[mode].append(res)
+                print(f"{mode:<6}{n_slow:>6}{res['probes']:>8}{res['failed']:>8}"
+                      f"{str(res['p50_ms']):>10}{str(res['p95_ms']):>10}{res['throughput_rps']:>9}")
+    finally:
+        shutil.rmtree(os.path.dirname(setup["file"]), ignore_errors=True)
+        shutil.rmtree(setup["workdir"], ignore_errors=True)
+
+    output = args.output or os.path.join(
+        base_dir, "data", "bench", f"asgi_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "workers": args.workers,
+                "asgi_threads": args.threads,
+                "file_kb": args.file_kb,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
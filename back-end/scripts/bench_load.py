@@ -0,0 +1,353 @@
+"""
+End-to-end load test for the Flask API on a synthetic cohort.
+
+Seeds a database (SQLite by default, any SQLAlchemy URL works) with users,
+candidates, documents, jury notes and eligibilities derived from
+generate_synthetic.py. It then drives the real app under concurrent load,
+either in-process through the Flask test client or over HTTP against a
+local threaded WSGI server. For each scenario it reports p50/p95/p99
+latency and throughput, and writes the results to a JSON file so runs can
+be compared.
+
+Usage:
+  python scripts/bench_load.py --candidates 5000 --concurrency 8
+  python scripts/bench_load.py --server --compare scripts/data/bench/previous.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base_dir))
+sys.path.insert(0, base_dir)
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from werkzeug.serving import make_server
+
+from app import create_app, db
+from app.models.settings_models import GlobalSettings
+from app.models.user_models import (
+    Candidat, Documents, Eligibilite, Evaluateur, Filiere, NoteEvaluateur, Role, User,
+)
+from app.services import feature_store
+from app.utils.helpers import hash_password
+from config import Config
+from generate_synthetic import branch_match, diplomes, filieres, generate_rows
+
+PASSWORD = "bench-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="SQLAlchemy URL (default: a fresh SQLite file)")
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--evaluators", type=int, default=10)
+    parser.add_argument("--notes-per-candidate", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per light scenario")
+    parser.add_argument("--heavy-requests", type=int, default=5, help="requests per batch scenario")
+    parser.add_argument("--server", action="store_true", help="go through a local WSGI server")
+    parser.add_argument("--output", help="result JSON path (default: scripts/data/bench/)")
+    parser.add_argument("--compare", help="previous result JSON to diff against")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def make_config(db_url):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = db_url
+        SECRET_KEY = Config.SECRET_KEY or "bench-secret"
+        JWT_SECRET_KEY = Config.JWT_SECRET_KEY or "bench-jwt-secret-key-32-bytes-long"
+        SLOW_REQUEST_MS = float("inf")
+        # Every simulated client shares one IP
+        LOGIN_IP_BURST = 0
+
+    return BenchConfig
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    cohort, _ = generate_rows(args.candidates, seed=args.seed)
+
+    db.drop_all()
+    db.create_all()
+
+    roles = {name: Role(role_name=name) for name in ["CANDIDAT", "EVALUATEUR", "ADMIN"]}
+    db.session.add_all(roles.values())
+    filiere_objs = {name: Filiere(nom_filiere=name) for name in filieres}
+    db.session.add_all(filiere_objs.values())
+    db.session.add(GlobalSettings(human_weight=70, ai_weight=30))
+    db.session.flush()
+
+    db.session.execute(insert(Eligibilite), [
+        {"type_diplome_requis": d, "branche_source": b, "filiere_id": filiere_objs[f].id}
+        for f, branches in branch_match.items()
+        for d in diplomes
+        for b in branches
+    ])
+
+    # One hash for everyone: hashing is the expensive part and is not what
+    # the seed step measures.
+    hashed = hash_password(PASSWORD)
+
+    def user_rows(prefix, role, count):
+        return [
+            {
+                "nom": f"{prefix}{i}", "prenom": "Bench", "email": f"{prefix}{i}@bench.local",
+                "password": hashed, "cin": f"{prefix.upper()}{i}", "phone_num": f"{prefix}-{i}",
+                "role_id": roles[role].id,
+            }
+            for i in range(count)
+        ]
+
+    db.session.execute(insert(User), user_rows("admin", "ADMIN", 1))
+    db.session.execute(insert(User), user_rows("eval", "EVALUATEUR", args.evaluators))
+    db.session.execute(insert(User), user_rows("cand", "CANDIDAT", args.candidates))
+    # Fresh accounts without an academic profile, one per apply request
+    db.session.execute(insert(User), user_rows("new", "CANDIDAT", args.requests))
+
+    ids = {
+        prefix: [uid for (uid,) in db.session.query(User.id).filter(User.nom.like(f"{prefix}%")).order_by(User.id)]
+        for prefix in ["admin", "eval", "cand", "new"]
+    }
+
+    db.session.execute(insert(Evaluateur), [
+        {"user_id": uid, "formule": "DEFAULT", "is_active": True} for uid in ids["eval"]
+    ])
+
+    records = cohort.to_dict("records")
+    db.session.execute(insert(Candidat), [
+        {
+            "user_id": uid, "cne": f"BENCH{uid}", "t_diplome": r["t_diplome"],
+            "branche_diplome": r["branche_diplome"], "bac_type": r["bac_type"],
+            "moy_bac": r["moy_bac"], "m_s1": r["m_s1"], "m_s2": r["m_s2"],
+            "m_s3": r["m_s3"], "m_s4": r["m_s4"], "status": "SUBMITTED",
+            "filiere_id": filiere_objs[r["filiere"]].id,
+        }
+        for uid, r in zip(ids["cand"], records)
+    ])
+
+    cand_ids = [cid for (cid,) in db.session.query(Candidat.id).order_by(Candidat.id)]
+    ev_ids = [eid for (eid,) in db.session.query(Evaluateur.id).order_by(Evaluateur.id)]
+
+    db.session.execute(insert(Documents), [
+        {f: f"cand_{cid}/{f}.pdf" for f in ["bac", "rn_bac", "diplome", "rn_diplome", "cin_file"]}
+        | {"candidat_id": cid}
+        for cid in cand_ids
+    ])
+
+    k = min(args.notes_per_candidate, len(ev_ids))
+    db.session.execute(insert(NoteEvaluateur), [
+        {"candidat_id": cid, "evaluateur_id": eid, "note_eval": round(rng.uniform(6, 19), 2)}
+        for cid in cand_ids
+        for eid in rng.sample(ev_ids, k)
+    ])
+
+    db.session.commit()
+    # Bulk inserts bypass the ORM flush hook that maintains the feature store
+    feature_store.rebuild()
+    return ids
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        resp = client.open(path, method=method, headers=headers, json=body)
+        return resp.status_code, resp.get_data()
+
+
+class HttpTransport:
+    def __init__(self, app):
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        payload = json.dumps(body) if body is not None else None
+        headers = {**headers, "Content-Type": "application/json"} if payload else headers
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        except (http.client.HTTPException, OSError):
+            self._local.conn = None
+            raise
+
+    def close(self):
+        self.server.shutdown()
+
+
+def run_scenario(transport, name, calls, concurrency) -> dict:
+    """Run ``calls`` (method, path, headers, body) and collect latencies."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(call):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            status, _ = transport.request(*call)
+            ok = status < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, calls))
+    wall = time.perf_counter() - wall
+
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+    }
+    print(f"{name:<20}{result['requests']:>8}{errors:>8}{result['p50_ms']:>10}"
+          f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['throughput_rps']:>10}")
+    return result
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def auth_header(user_id, role) -> dict:
+    """Mint a token directly; the login scenario is what measures login."""
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_scenarios(args, ids, rng) -> list:
+    admin = auth_header(ids["admin"][0], "ADMIN")
+    evaluators = [auth_header(uid, "EVALUATEUR") for uid in ids["eval"]]
+    new_tokens = [auth_header(uid, "CANDIDAT") for uid in ids["new"]]
+    n = args.requests
+    c = args.concurrency
+
+    def apply_body(i):
+        return {
+            "cne": f"NEW{i}", "t_diplome": rng.choice(diplomes), "branche_diplome": "SMI",
+            "bac_type": "SCIENCE", "moy_bac": 14.5, "m_s1": 12, "m_s2": 13, "m_s3": 12.5, "m_s4": 14,
+        }
+
+    return [
+        ("login", [
+            ("POST", "/api/auth/login", {},
+             {"email": f"cand{rng.randrange(args.candidates)}@bench.local", "password": PASSWORD})
+            for _ in range(n)
+        ], c),
+        ("apply", [("POST", "/api/candidate/apply", new_tokens[i], apply_body(i)) for i in range(n)], c),
+        ("list_candidates", [
+            ("GET", "/api/evaluateur/candidates", rng.choice(evaluators), None) for _ in range(n)
+        ], c),
+        ("stats_overview", [("GET", "/api/admin/stats/overview", admin, None) for _ in range(n)], c),
+        ("stats_filieres", [("GET", "/api/admin/stats/filieres", admin, None) for _ in range(n)], c),
+        # Batch admin jobs are run one at a time, as they are in production
+        ("ai_score", [("POST", "/api/admin/ai/score", admin, None)] * args.heavy_requests, 1),
+        ("final_scores_compute", [("POST", "/api/admin/final-scores/compute", admin, None)] * args.heavy_requests, 1),
+    ]
+
+
+def compare(current: dict, previous_path: str) -> None:
+    with open(previous_path) as f:
+        previous = json.load(f)["results"]
+    print(f"\nComparison with {previous_path} (p95 ms / rps):")
+    for name, res in current.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        dp95 = (res["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        print(f"  {name:<20} p95 {old['p95_ms']:>9} -> {res['p95_ms']:>9} ({dp95:+.1f}%)"
+              f"   rps {old['throughput_rps']} -> {res['throughput_rps']}")
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="estsb-bench-"), "bench.db")
+    app = create_app(make_config(db_url))
+
+    with app.app_context():
+        start = time.perf_counter()
+        ids = seed(args)
+        print(f"Seeded {len(ids['cand'])} candidates, {len(ids['eval'])} evaluators "
+              f"into {db_url} in {time.perf_counter() - start:.1f}s")
+
+    transport = HttpTransport(app) if args.server else TestClientTransport(app)
+    print(f"\n{'scenario':<20}{'reqs':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}")
+
+    with app.app_context():
+        scenarios = build_scenarios(args, ids, rng)
+
+    results = {}
+    try:
+        for name, calls, concurrency in scenarios:
+            results[name] = run_scenario(transport, name, calls, concurrency)
+    finally:
+        if args.server:
+            transport.close()
+
+    output = args.output or os.path.join(
+        base_dir, "data", "bench", f"load_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "db_url": db_url.split("@")[-1],
+                "transport": "wsgi" if args.server else "test_client",
+                "candidates": args.candidates,
+                "evaluators": args.evaluators,
+                "concurrency": args.concurrency,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark JSON serialization and bytes-on-wire for large API payloads.
+
+Builds a payload shaped like GET /api/admin/final-scores and compares
+Flask's default JSON provider against the orjson provider, with and
+without gzip/brotli compression.
+
+Usage: python scripts/bench_responses.py [rows] [repeats]
+"""
+import gzip
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.responses import OrjsonProvider, brotli, orjson
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+random.seed(42)
+filieres = ["Bachelor ISITW", "Bachelor CSTC", "Bachelor BDAPA", "Bachelor CCA", "Bachelor GCF"]
+payload = [
+    {
+        "candidat_id": i,
+        "nom": f"Nom{i}",
+        "prenom": f"Prenom{i}",
+        "email": f"candidat{i}@example.ma",
+        "cin": f"AB{100000 + i}",
+        "cne": f"R{130000000 + i}",
+        "filiere": random.choice(filieres),
+        "note_ai": round(random.uniform(8, 18), 2),
+        "note_jury": round(random.uniform(8, 18), 2),
+        "note_final": round(random.uniform(8, 18), 2),
+    }
+    for i in range(rows)
+]
+
+
+def bench(provider) -> tuple[float, bytes]:
+    body = b""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        body = provider.response(payload).get_data()
+    return (time.perf_counter() - start) / repeats * 1000, body
+
+
+app = Flask(__name__)
+providers = [("flask default (debug)", DefaultJSONProvider(app), True),
+             ("flask default", DefaultJSONProvider(app), False)]
+if orjson is not None:
+    providers.append(("orjson", OrjsonProvider(app), False))
+
+print(f"Payload: {rows} rows, {repeats} repeats\n")
+print(f"{'provider':<24}{'ms/resp':>10}{'raw':>12}{'gzip':>12}{'br':>12}")
+
+for name, provider, debug in providers:
+    app.debug = debug
+    ms, body = bench(provider)
+    gz = len(gzip.compress(body, compresslevel=6))
+    br = len(brotli.compress(body, quality=4)) if brotli is not None else None
+    print(f"{name:<24}{ms:>10.2f}{len(body):>12}{gz:>12}{br if br is not None else '-':>12}")
+
+if orjson is None:
+    print("\norjson is not installed; install it to compare the fast provider.")
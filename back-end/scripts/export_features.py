@@ -0,0 +1,52 @@
+"""
+Export the candidat_features table as a training dataset.
+
+The output has the same columns as generate_synthetic.py (FEATURE_COLUMNS
+plus the ``avg_semester_score`` target), so train_model.py can be run on
+real candidates with the exact inputs the API serves. Imputation and the
+target both come from app.services.feature_store.
+
+Usage:
+  python scripts/export_features.py --format parquet --output scripts/data/candidates_real.parquet
+  python scripts/export_features.py --rebuild     # recompute the table first
+"""
+import argparse
+import os
+import sys
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base_dir))
+
+from app import create_app
+from app.services import feature_store
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the feature store for training.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", help="output path (default: scripts/data/candidates_features.<format>)")
+    parser.add_argument("--rebuild", action="store_true", help="recompute candidat_features before exporting")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    out_path = args.output or os.path.join(base_dir, "data", f"candidates_features.{args.format}")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+
+    app = create_app()
+    with app.app_context():
+        if args.rebuild:
+            print(f"Rebuilt feature store: {feature_store.rebuild()} rows")
+        df = feature_store.training_frame()
+
+    if args.format == "csv":
+        df.to_csv(out_path, index=False)
+    else:
+        df.to_parquet(out_path, index=False)
+
+    print(f"{args.format.upper()} created: {out_path} ({len(df)} rows)")
+
+
+if __name__ == "__main__":
+    main()
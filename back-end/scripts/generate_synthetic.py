@@ -1,12 +1,8 @@
-import pandas as pd
-import random
-import numpy as np
+import argparse
 import os
 
-random.seed(42)
-np.random.seed(42)
-
-num_samples = 100000
+import numpy as np
+import pandas as pd
 
 diplomes = ["DUT", "BTS", "DEUG", "DEUST", "DTS"]
 branches = [
@@ -42,95 +38,159 @@ branch_match = {
     "Bachelor GCF": {"GESTION DES ENTREPRISES", "TECHNIQUES DE MANAGEMENT", "ECONOMIE", "COMPTABILITÉ"},
 }
 
-def clip20(x):
-    return max(0, min(20, x))
+# Lookup arrays aligned with the category lists above, so every rule is a
+# single fancy-indexing operation on the sampled category indices.
+_diplomes = np.array(diplomes, dtype=object)
+_branches = np.array(branches, dtype=object)
+_bac_types = np.array(bac_types, dtype=object)
+_filieres = np.array(filieres, dtype=object)
+_diplome_bonus = np.array([diplome_bonus.get(d, 0.0) for d in diplomes])
+_bac_bonus = np.array([bac_bonus.get(b, 0.0) for b in bac_types])
+_filiere_bias = np.array([filiere_bias[f] for f in filieres])
+_branch_match = np.array([[b in branch_match.get(f, set()) for b in branches] for f in filieres])
+
+# semester noise around the candidate's base level: S1, S2, S3, S4
+_semester_sd = np.array([1.8, 1.8, 2.0, 2.0])
+
 
 def sigmoid(x):
     return 1 / (1 + np.exp(-x))
 
-rows = []
-forced_reject = 0
-selected_count = 0
 
-for _ in range(num_samples):
-    t_diplome = random.choice(diplomes)
-    branche = random.choice(branches)
-    bac_type = random.choice(bac_types)
-    filiere = random.choice(filieres)
+def generate_chunk(rng, n):
+    """Return (DataFrame of ``n`` synthetic candidates, forced rejects, selected)."""
+    d_idx = rng.integers(len(diplomes), size=n)
+    b_idx = rng.integers(len(branches), size=n)
+    bac_idx = rng.integers(len(bac_types), size=n)
+    f_idx = rng.integers(len(filieres), size=n)
 
-    moy_bac = round(random.uniform(10, 19), 2)
+    moy_bac = np.round(rng.uniform(10, 19, size=n), 2)
 
     # generate semester marks with correlation (more realistic)
-    base_level = np.random.normal(11.7, 2.4)
-    m_s1 = round(clip20(np.random.normal(base_level, 1.8)), 2)
-    m_s2 = round(clip20(np.random.normal(base_level, 1.8)), 2)
-    m_s3 = round(clip20(np.random.normal(base_level, 2.0)), 2)
-    m_s4 = round(clip20(np.random.normal(base_level, 2.0)), 2)
-
-    avg_sem = (m_s1 + m_s2 + m_s3 + m_s4) / 4
-    std_sem = np.std([m_s1, m_s2, m_s3, m_s4])
-    trend = (m_s4 - m_s1) / 20.0
-
-    if avg_sem < 10:
-        selected = 0
-        forced_reject += 1
-    else:
-        # base from average
-        base = avg_sem / 20.0
-
-        # small bonuses/penalties
-        base += diplome_bonus.get(t_diplome, 0.0)
-        base += bac_bonus.get(bac_type, 0.0)
-
-        # branch match gives small bonus
-        if branche in branch_match.get(filiere, set()):
-            base += 0.03
-        else:
-            base -= 0.02
+    base_level = rng.normal(11.7, 2.4, size=n)
+    sems = rng.normal(base_level[:, None], _semester_sd, size=(n, 4))
+    sems = np.round(np.clip(sems, 0, 20), 2)
+
+    avg_sem = sems.mean(axis=1)
+    std_sem = sems.std(axis=1)
+    trend = (sems[:, 3] - sems[:, 0]) / 20.0
+
+    # base from average, small bonuses/penalties, branch match, filiere difficulty
+    base = avg_sem / 20.0
+    base += _diplome_bonus[d_idx] + _bac_bonus[bac_idx]
+    base += np.where(_branch_match[f_idx, b_idx], 0.03, -0.02)
+    base -= _filiere_bias[f_idx]
+
+    # penalize instability, reward positive trend, slight noise
+    base -= (std_sem / 20.0) * 0.25
+    base += trend * 0.08
+    base += rng.normal(0, 0.01, size=n)
+
+    # probability curve; avg < 10 is always rejected
+    prob = sigmoid((base - 0.58) * 12)
+    forced = avg_sem < 10
+    selected = ~forced & (rng.random(n) < prob)
+
+    df = pd.DataFrame({
+        "t_diplome": _diplomes[d_idx],
+        "branche_diplome": _branches[b_idx],
+        "bac_type": _bac_types[bac_idx],
+        "filiere": _filieres[f_idx],
+        "moy_bac": moy_bac,
+        "m_s1": sems[:, 0],
+        "m_s2": sems[:, 1],
+        "m_s3": sems[:, 2],
+        "m_s4": sems[:, 3],
+        "avg_semester_score": avg_sem,  # Target for regression model
+    })
+    return df, int(forced.sum()), int(selected.sum())
 
-        # filiere difficulty
-        base -= filiere_bias[filiere]
 
-        # penalize instability, reward positive trend
-        base -= (std_sem / 20.0) * 0.25
-        base += trend * 0.08
+def generate_rows(num_samples, seed=42):
+    """Return (DataFrame of synthetic candidates, number of forced rejects)."""
+    df, forced_reject, _ = generate_chunk(np.random.default_rng(seed), num_samples)
+    return df, forced_reject
 
-        # slight noise
-        base += np.random.normal(0, 0.01)
 
-        # probability curve
-        prob = sigmoid((base - 0.58) * 12)
+def iter_chunks(num_samples, chunk_size, seed=42):
+    """Yield (DataFrame, forced rejects, selected) chunks from one seeded Generator."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_samples, chunk_size):
+        yield generate_chunk(rng, min(chunk_size, num_samples - start))
 
-        selected = 1 if random.random() < prob else 0
 
-    selected_count += selected
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
-    rows.append({
-        "t_diplome": t_diplome,
-        "branche_diplome": branche,
-        "bac_type": bac_type,
-        "filiere": filiere,
-        "moy_bac": moy_bac,
-        "m_s1": m_s1,
-        "m_s2": m_s2,
-        "m_s3": m_s3,
-        "m_s4": m_s4,
-        "avg_semester_score": avg_sem  # Target for regression model
-    })
 
-df = pd.DataFrame(rows)
-
-base_dir = os.path.dirname(os.path.abspath(__file__))
-data_dir = os.path.join(base_dir, "data")
-os.makedirs(data_dir, exist_ok=True)
-csv_path = os.path.join(data_dir, "candidates_synthetic.csv")
-df.to_csv(csv_path, index=False)
-
-print(f"CSV created: {csv_path}")
-print(df.head())
-print(f"Forced rejects (avg<10): {forced_reject}/{num_samples} = {forced_reject/num_samples:.2%}")
-print(f"Average semester score statistics:")
-print(f"  Mean: {df['avg_semester_score'].mean():.2f}")
-print(f"  Std: {df['avg_semester_score'].std():.2f}")
-print(f"  Min: {df['avg_semester_score'].min():.2f}")
-print(f"  Max: {df['avg_semester_score'].max():.2f}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic candidates for training and load tests.")
+    parser.add_argument("--rows", type=positive_int, default=100000)
+    parser.add_argument("--chunk-size", type=positive_int, default=500000, help="rows held in memory at once")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", help="output path (default: scripts/data/candidates_synthetic.<format>)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    out_path = args.output or os.path.join(base_dir, "data", f"candidates_synthetic.{args.format}")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+
+    writer = None
+    if args.format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+
+    forced_reject = selected_count = 0
+    count = total = total_sq = 0.0
+    lo, hi = np.inf, -np.inf
+    head = None
+
+    for i, (df, forced, selected) in enumerate(iter_chunks(args.rows, args.chunk_size, args.seed)):
+        if args.format == "csv":
+            df.to_csv(out_path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, table.schema)
+            writer.write_table(table)
+
+        if head is None:
+            head = df.head()
+        forced_reject += forced
+        selected_count += selected
+        target = df["avg_semester_score"].to_numpy()
+        count += len(target)
+        total += target.sum()
+        total_sq += np.square(target).sum()
+        lo, hi = min(lo, target.min()), max(hi, target.max())
+
+    if writer is not None:
+        writer.close()
+
+    mean = total / count
+    std = np.sqrt(max(total_sq - count * mean ** 2, 0.0) / (count - 1)) if count > 1 else 0.0
+
+    print(f"{args.format.upper()} created: {out_path}")
+    print(head)
+    print(f"Forced rejects (avg<10): {forced_reject}/{args.rows} = {forced_reject/args.rows:.2%}")
+    print(f"Selected: {selected_count}/{args.rows} = {selected_count/args.rows:.2%}")
+    print(f"Average semester score statistics:")
+    print(f"  Mean: {mean:.2f}")
+    print(f"  Std: {std:.2f}")
+    print(f"  Min: {lo:.2f}")
+    print(f"  Max: {hi:.2f}")
+
+
+if __name__ == "__main__":
+    main()
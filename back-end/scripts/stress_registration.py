@@ -0,0 +1,151 @@
+"""
+Concurrent-registration stress test for duplicate detection.
+
+Registration and admin user creation rely on the unique indexes on
+users.email, users.cin and users.phone_num instead of a pre-check query.
+This script fires groups of simultaneous requests that all share one of
+those fields (and nothing else) and checks that, per group, exactly one
+request is accepted and every other one gets a 400 naming the shared
+field; a 500 or a second account means the mapping is broken.
+
+Half of the groups go through /api/auth/register, the other half through
+/api/admin/users.
+
+Usage:
+  python scripts/stress_registration.py --groups 30 --per-group 8
+  python scripts/stress_registration.py --db-url mysql+pymysql://user:pw@localhost/estsb_stress
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base_dir))
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models.user_models import Role, User
+from app.utils.helpers import hash_password
+from config import Config
+
+FIELDS = ["email", "cin", "phone_num"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="SQLAlchemy URL (default: a fresh SQLite file)")
+    parser.add_argument("--groups", type=int, default=30)
+    parser.add_argument("--per-group", type=int, default=8, help="concurrent requests sharing one field")
+    return parser.parse_args()
+
+
+def make_config(db_url):
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = db_url
+        SECRET_KEY = Config.SECRET_KEY or "stress-secret"
+        JWT_SECRET_KEY = Config.JWT_SECRET_KEY or "stress-jwt-secret-key-32-bytes-long"
+        SLOW_REQUEST_MS = float("inf")
+
+    return StressConfig
+
+
+def seed() -> str:
+    """Create roles and an admin; return the admin's access token."""
+    db.drop_all()
+    db.create_all()
+    roles = {name: Role(role_name=name) for name in ["CANDIDAT", "EVALUATEUR", "ADMIN"]}
+    db.session.add_all(roles.values())
+    db.session.flush()
+    admin = User(
+        nom="Admin", prenom="Stress", email="admin@stress.test", password=hash_password("admin-password"),
+        cin="ADMIN0", phone_num="0600000000", role_id=roles["ADMIN"].id,
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return create_access_token(identity=str(admin.id), additional_claims={"role": "ADMIN"})
+
+
+def build_groups(args, admin_token):
+    """Each group: (path, headers, shared field, payloads sharing only that field)."""
+    groups = []
+    for g in range(args.groups):
+        shared = FIELDS[g % len(FIELDS)]
+        via_admin = g % 2 == 1
+        payloads = []
+        for i in range(args.per_group):
+            payload = {
+                "nom": "Stress", "prenom": f"g{g}r{i}", "password": "stress-password",
+                "email": f"g{g}r{i}@stress.test", "cin": f"S{g}R{i}", "phone_num": f"07{g:04d}{i:04d}",
+            }
+            payload[shared] = {"email": f"shared{g}@stress.test", "cin": f"SHARED{g}",
+                               "phone_num": f"08{g:08d}"}[shared]
+            if via_admin:
+                payload["role"] = "EVALUATEUR" if g % 4 == 1 else "CANDIDAT"
+            payloads.append(payload)
+        if via_admin:
+            groups.append(("/api/admin/users", {"Authorization": f"Bearer {admin_token}"}, shared, payloads))
+        else:
+            groups.append(("/api/auth/register", {}, shared, payloads))
+    return groups
+
+
+def run_group(app, path, headers, payloads):
+    """Release every request of a group at the same instant."""
+    barrier = threading.Barrier(len(payloads))
+
+    def post(payload):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post(path, json=payload, headers=headers)
+        return response.status_code, response.get_json(silent=True) or {}
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+        return list(pool.map(post, payloads))
+
+
+def main():
+    args = parse_args()
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="estsb-stress-"), "stress.db")
+    app = create_app(make_config(db_url))
+
+    with app.app_context():
+        admin_token = seed()
+        groups = build_groups(args, admin_token)
+
+    statuses = Counter()
+    failures = []
+    start = time.perf_counter()
+    for g, (path, headers, shared, payloads) in enumerate(groups):
+        results = run_group(app, path, headers, payloads)
+        statuses.update(status for status, _ in results)
+        created = sum(status == 201 for status, _ in results)
+        rejected = [body for status, body in results if status == 400]
+        if created != 1:
+            failures.append(f"group {g} ({path}, {shared}): {created} accounts created")
+        if len(rejected) != len(payloads) - created or any(body.get("field") != shared for body in rejected):
+            failures.append(f"group {g} ({path}, {shared}): {[status for status, _ in results]} "
+                            f"{[body.get('field') for body in rejected]}")
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        users = db.session.query(User).count()
+    expected = args.groups + 1
+
+    print(f"{sum(statuses.values())} requests in {elapsed:.1f}s against {db_url.split('@')[-1]}")
+    print("status codes: " + ", ".join(f"{code}={n}" for code, n in sorted(statuses.items())))
+    print(f"users in database: {users} (expected {expected})")
+    if users != expected:
+        failures.append(f"{users} users in database, expected {expected}")
+    for failure in failures:
+        print("FAIL " + failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
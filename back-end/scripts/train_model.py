@@ -1,20 +1,48 @@
+"""
+Train the candidate score regressor (0-20 scale) served by ml_service.
+
+Examples:
+  python scripts/train_model.py                          # random forest, as before
+  python scripts/train_model.py --estimator hgb          # histogram gradient boosting
+  python scripts/train_model.py --compare rf hgb         # side-by-side report, saves the best
+  python scripts/train_model.py --estimator hgb --search --time-budget 120
+  python scripts/train_model.py --sample 200000 --max-samples 0.3
+  python scripts/train_model.py --max-regression 1.2 --max-predict-1-ms 5
+
+Candidates (estimators, searched configurations) are ranked on a validation
+split carved out of the training data; the held-out test split is scored
+once, for the chosen pipeline only, so the reported accuracy is unbiased.
+
+Before publishing, the new pipeline is benchmarked against the deployed one
+(--output) on a fixed feature batch. If a budget is exceeded the artifact is
+not published. A benchmark report is written next to the model either way.
+"""
+import argparse
+import io
+import itertools
+import json
+import multiprocessing
 import os
-import pandas as pd
+import resource
+import sys
+import time
+from datetime import datetime
+
 import joblib
 import numpy as np
-
-from sklearn.model_selection import train_test_split
+import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+from threadpoolctl import threadpool_limits
 
-base_dir = os.path.dirname(os.path.abspath(__file__))
-csv_path = os.path.join(base_dir, "data", "candidates_synthetic.csv")
+from generate_synthetic import generate_rows
 
-df = pd.read_csv(csv_path)
-print("Loaded:", csv_path, df.shape)
+base_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Target: predict average semester score directly (0-20 scale)
 target = "avg_semester_score"
@@ -22,68 +50,412 @@ target = "avg_semester_score"
 cat_cols = ["t_diplome", "branche_diplome", "bac_type", "filiere"]
 num_cols = ["moy_bac", "m_s1", "m_s2", "m_s3", "m_s4"]
 
-X = df[cat_cols + num_cols]
-y = df[target]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-preprocess = ColumnTransformer(
-    transformers=[
-        ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
-        ("num", "passthrough", num_cols),
-    ]
-)
-
-# Use RandomForestRegressor to predict student performance (0-20 scale)
-rf = RandomForestRegressor(
-    n_estimators=800,
-    max_depth=14,
-    min_samples_leaf=3,
-    random_state=42,
-    n_jobs=-1
-)
-
-pipe = Pipeline([
-    ("preprocess", preprocess),
-    ("model", rf)
-])
-
-print("\nTraining RandomForestRegressor to predict average semester score...")
-pipe.fit(X_train, y_train)
-
-# Evaluate performance
-y_pred = pipe.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-mae = mean_absolute_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-rmse = np.sqrt(mse)
-
-print("\n=== Regression Model Performance ===")
-print(f"Mean Squared Error (MSE): {mse:.4f}")
-print(f"Root Mean Squared Error (RMSE): {rmse:.4f}")
-print(f"Mean Absolute Error (MAE): {mae:.4f}")
-print(f"R² Score (coefficient of determination): {r2:.4f}")
-
-# Show predictions vs actual for first 10 test samples
-print("\n=== Sample Predictions vs Actual ===")
-comparison = pd.DataFrame({
-    "Actual": y_test.iloc[:10].values,
-    "Predicted": y_pred[:10]
-})
-print(comparison)
-
-# Show prediction range
-print("\nPrediction statistics:")
-print(f"  Min predicted: {y_pred.min():.2f}")
-print(f"  Max predicted: {y_pred.max():.2f}")
-print(f"  Mean predicted: {y_pred.mean():.2f}")
-print(f"  Std predicted: {y_pred.std():.2f}")
-
-encoders_dir = os.path.join(base_dir, "encoders")
-os.makedirs(encoders_dir, exist_ok=True)
-
-model_path = os.path.join(encoders_dir, "rf_pipeline.pkl")
-joblib.dump(pipe, model_path)
-print(f"\nSaved regressor pipeline to: {model_path}")
+DEFAULT_PARAMS = {
+    "rf": {"n_estimators": 300, "max_depth": 14, "min_samples_leaf": 3},
+    "hgb": {"max_iter": 300, "learning_rate": 0.1, "max_leaf_nodes": 31, "min_samples_leaf": 20},
+}
+
+SEARCH_SPACE = {
+    "rf": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [8, 10, 12, 14],
+        "min_samples_leaf": [1, 3, 5, 10],
+        "max_samples": [0.2, 0.5, None],
+    },
+    "hgb": {
+        "max_iter": [100, 200, 300, 500],
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [10, 20, 50],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.path.join(base_dir, "data", "candidates_synthetic.csv"),
+                        help="training CSV or Parquet file")
+    parser.add_argument("--estimator", choices=sorted(DEFAULT_PARAMS), default="rf")
+    parser.add_argument("--compare", nargs="+", choices=sorted(DEFAULT_PARAMS),
+                        help="train several estimators and keep the most accurate")
+    parser.add_argument("--sample", type=int, help="train on a random subset of N rows")
+    parser.add_argument("--max-samples", type=float, help="bootstrap fraction per tree (rf only)")
+    parser.add_argument("--search", action="store_true", help="time-boxed random hyperparameter search")
+    parser.add_argument("--time-budget", type=float, default=300, help="search budget in seconds")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(base_dir, "encoders", "rf_pipeline.pkl"))
+
+    budgets = parser.add_argument_group("publish budgets")
+    budgets.add_argument("--max-regression", type=float, default=1.5,
+                         help="max ratio vs the deployed model for every benchmark metric")
+    budgets.add_argument("--min-delta-ms", type=float, default=50,
+                         help="time increases below this are noise, whatever the ratio")
+    budgets.add_argument("--min-delta-mb", type=float, default=20,
+                         help="memory and size increases below this are noise, whatever the ratio")
+    budgets.add_argument("--bench-repeats", type=int, default=5,
+                         help="benchmark runs per artifact; budgets use the median")
+    budgets.add_argument("--max-load-s", type=float)
+    budgets.add_argument("--max-predict-1-ms", type=float)
+    budgets.add_argument("--max-predict-10k-ms", type=float)
+    budgets.add_argument("--max-rss-mb", type=float)
+    budgets.add_argument("--max-size-mb", type=float)
+    budgets.add_argument("--force", action="store_true", help="publish even if budgets are exceeded")
+    return parser.parse_args()
+
+
+def load_dataset(path, sample=None, seed=42) -> pd.DataFrame:
+    """Load only the needed columns, with categoricals and float32 numerics."""
+    dtypes = {c: "category" for c in cat_cols} | {c: "float32" for c in num_cols + [target]}
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=cat_cols + num_cols + [target]).astype(dtypes)
+    else:
+        df = pd.read_csv(path, usecols=cat_cols + num_cols + [target], dtype=dtypes)
+    if sample and sample < len(df):
+        df = df.sample(n=sample, random_state=seed)
+    return df
+
+
+def build_pipeline(name, params, n_jobs=-1, seed=42) -> Pipeline:
+    if name == "rf":
+        preprocess = ColumnTransformer(
+            transformers=[
+                # Dense: a few dozen indicator columns, and trees fit
+                # an order of magnitude faster than on sparse input.
+                ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), cat_cols),
+                ("num", "passthrough", num_cols),
+            ]
+        )
+        model = RandomForestRegressor(random_state=seed, n_jobs=n_jobs, **params)
+    elif name == "hgb":
+        # Ordinal codes feed HGB's native categorical splits; unknown
+        # categories at serving time become missing values.
+        preprocess = ColumnTransformer(
+            transformers=[
+                ("cat", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan), cat_cols),
+                ("num", "passthrough", num_cols),
+            ]
+        )
+        model = HistGradientBoostingRegressor(
+            categorical_features=list(range(len(cat_cols))), random_state=seed, **params
+        )
+    else:
+        raise ValueError(f"Unknown estimator: {name}")
+
+    return Pipeline([
+        ("preprocess", preprocess),
+        ("model", model)
+    ])
+
+
+def accuracy(y_true, y_pred) -> dict:
+    return {
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "r2": float(r2_score(y_true, y_pred)),
+    }
+
+
+def fit_and_score(name, params, X_train, y_train, X_val, y_val, n_jobs=-1, seed=42) -> dict:
+    """Fit one configuration and score it on the validation split."""
+    pipe = build_pipeline(name, params, n_jobs=n_jobs, seed=seed)
+
+    # HGB has no n_jobs and sizes its OpenMP pool to every core; the limit
+    # holds it (and BLAS) to the same thread count as the forest.
+    with threadpool_limits(limits=n_jobs if n_jobs > 0 else None):
+        start = time.perf_counter()
+        pipe.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+
+        batch = X_val.iloc[:1000]
+        start = time.perf_counter()
+        pipe.predict(batch)
+        predict_ms = (time.perf_counter() - start) * 1000 * 1000 / len(batch)
+
+        y_pred = pipe.predict(X_val)
+
+    buf = io.BytesIO()
+    joblib.dump(pipe, buf)
+
+    return {
+        "estimator": name,
+        "params": params,
+        "pipeline": pipe,
+        "fit_s": fit_s,
+        "predict_ms_per_1k": predict_ms,
+        "size_mb": buf.tell() / 1024 / 1024,
+        **accuracy(y_val, y_pred),
+    }
+
+
+def summary(result) -> dict:
+    """A result without its fitted pipeline, for the report."""
+    return {k: v for k, v in result.items() if k != "pipeline"}
+
+
+def search(name, X_train, y_train, X_val, y_val, time_budget, n_jobs, seed):
+    """Evaluate random configurations in parallel until the budget runs out.
+
+    Returns (summaries of every configuration tried, best result). Only the
+    best fitted pipeline is kept, so memory does not grow with the number
+    of configurations. No configuration is started after the deadline, and
+    fits still running when it passes are killed.
+    """
+    workers = joblib.cpu_count() if n_jobs == -1 else n_jobs
+    space = SEARCH_SPACE[name]
+    n_iter = min(200, len(ParameterGrid(space)))
+    candidates = list(ParameterSampler(space, n_iter=n_iter, random_state=seed))
+    deadline = time.monotonic() + time_budget
+    results, best = [], None
+
+    # Each config fits single-threaded (fit_and_score's n_jobs=1 also caps
+    # HGB's OpenMP threads); parallelism is across configs.
+    pending = itertools.takewhile(
+        lambda item: item[0] == 0 or time.monotonic() < deadline, enumerate(candidates)
+    )
+    jobs = Parallel(n_jobs=workers, return_as="generator_unordered", timeout=max(time_budget, 1))(
+        delayed(fit_and_score)(name, p, X_train, y_train, X_val, y_val, 1, seed) for _, p in pending
+    )
+    try:
+        for result in jobs:
+            if best is None or result["rmse"] < best["rmse"]:
+                best = result
+            results.append(summary(result))
+            if len(results) % workers == 0:
+                print(f"  {len(results)} configs tried, best RMSE {best['rmse']:.4f}")
+            if time.monotonic() >= deadline:
+                break
+    except TimeoutError:
+        print("  time budget reached during a fit")
+    finally:
+        # Aborts the configs still running in the workers
+        jobs.close()
+
+    if best is None:
+        sys.exit(f"No {name} configuration finished within {time_budget:.0f}s")
+    print(f"  {len(results)} configs tried, best RMSE {best['rmse']:.4f}")
+    return results, best
+
+
+def print_report(results) -> None:
+    print("\nValidation split:")
+    print(f"{'estimator':<10}{'fit s':>9}{'ms/1k':>9}{'MB':>9}{'RMSE':>9}{'MAE':>9}{'R²':>9}  params")
+    for r in sorted(results, key=lambda r: r["rmse"]):
+        print(f"{r['estimator']:<10}{r['fit_s']:>9.1f}{r['predict_ms_per_1k']:>9.1f}{r['size_mb']:>9.1f}"
+              f"{r['rmse']:>9.4f}{r['mae']:>9.4f}{r['r2']:>9.4f}  {r['params']}")
+
+
+# ---------------------------------------------------------------------------
+# Serving benchmark and publish gate
+# ---------------------------------------------------------------------------
+
+BENCH_METRICS = ["load_s", "predict_1_ms", "predict_10k_ms", "rss_mb", "size_mb"]
+
+
+def _rss_mb() -> float:
+    """Current resident set size; falls back to peak RSS without /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _bench_worker(path, queue) -> None:
+    """Runs in a fresh process so load time and memory are measured cold."""
+    batch, _ = generate_rows(10000, seed=1234)
+    batch = batch[cat_cols + num_cols]
+    row = batch.iloc[:1]
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    pipe = joblib.load(path)
+    load_s = time.perf_counter() - start
+    pipe.predict(row)
+    rss_after = _rss_mb()
+
+    single = []
+    for _ in range(50):
+        start = time.perf_counter()
+        pipe.predict(row)
+        single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    pipe.predict(batch)
+    predict_10k = time.perf_counter() - start
+
+    queue.put({
+        "load_s": round(load_s, 4),
+        "predict_1_ms": round(float(np.median(single)) * 1000, 3),
+        "predict_10k_ms": round(predict_10k * 1000, 2),
+        "rss_mb": round(rss_after - rss_before, 1),
+        "size_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+    })
+
+
+def benchmark_artifact(path, repeats=5) -> dict:
+    """Median of ``repeats`` cold runs, each in its own process."""
+    ctx = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(max(repeats, 1)):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_bench_worker, args=(path, queue))
+        proc.start()
+        runs.append(queue.get())
+        proc.join()
+    return {metric: round(float(np.median([r[metric] for r in runs])), 4) for metric in BENCH_METRICS}
+
+
+def _min_delta(metric, args) -> float:
+    """Smallest increase over the deployed value that counts as a regression."""
+    if metric == "load_s":
+        return args.min_delta_ms / 1000
+    if metric.endswith("_ms"):
+        return args.min_delta_ms
+    return args.min_delta_mb
+
+
+def check_budgets(candidate, deployed, args) -> list:
+    """Return the list of budget violations (empty when publishable)."""
+    violations = []
+    absolute = {
+        "load_s": args.max_load_s,
+        "predict_1_ms": args.max_predict_1_ms,
+        "predict_10k_ms": args.max_predict_10k_ms,
+        "rss_mb": args.max_rss_mb,
+        "size_mb": args.max_size_mb,
+    }
+    for metric in BENCH_METRICS:
+        limit = absolute[metric]
+        if limit is not None and candidate[metric] > limit:
+            violations.append(f"{metric} {candidate[metric]} > budget {limit}")
+        if deployed and args.max_regression and deployed[metric] > 0:
+            # At ms-scale load times and MB-scale RSS a ratio alone is noise
+            if candidate[metric] - deployed[metric] < _min_delta(metric, args):
+                continue
+            ratio = candidate[metric] / deployed[metric]
+            if ratio > args.max_regression:
+                violations.append(
+                    f"{metric} {candidate[metric]} is {ratio:.2f}x the deployed "
+                    f"{deployed[metric]} (max {args.max_regression}x)"
+                )
+    return violations
+
+
+def publish(pipeline, best, args) -> bool:
+    """Benchmark against the deployed artifact and replace it if within budget."""
+    output = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    candidate_path = output + ".candidate"
+    joblib.dump(pipeline, candidate_path)
+
+    print("\nBenchmarking candidate against deployed model...")
+    candidate = benchmark_artifact(candidate_path, args.bench_repeats)
+    deployed = benchmark_artifact(output, args.bench_repeats) if os.path.exists(output) else None
+    violations = check_budgets(candidate, deployed, args)
+
+    print(f"{'metric':<16}{'deployed':>12}{'candidate':>12}")
+    for metric in BENCH_METRICS:
+        old = deployed[metric] if deployed else "-"
+        print(f"{metric:<16}{old:>12}{candidate[metric]:>12}")
+
+    published = not violations or args.force
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "estimator": best["estimator"],
+        "params": best["params"],
+        "accuracy": best["test"],
+        "validation": {"rmse": best["rmse"], "mae": best["mae"], "r2": best["r2"]},
+        "candidate": candidate,
+        "deployed": deployed,
+        "violations": violations,
+        "published": published,
+    }
+    report_path = os.path.splitext(output)[0] + ".bench.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report written to: {report_path}")
+
+    if violations:
+        print("\nBudget exceeded:")
+        for v in violations:
+            print(f"  - {v}")
+
+    if not published:
+        print(f"Not published. Candidate kept at: {candidate_path}")
+        return False
+
+    os.replace(candidate_path, output)
+    return True
+
+
+def main():
+    args = parse_args()
+
+    df = load_dataset(args.data, sample=args.sample, seed=args.seed)
+    print("Loaded:", args.data, df.shape, f"{df.memory_usage(deep=True).sum() / 1024 / 1024:.1f} MB")
+
+    X = df[cat_cols + num_cols]
+    y = df[target]
+
+    X_rest, X_test, y_rest, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=args.seed
+    )
+    X_train, X_val, y_train, y_val = train_test_split(
+        X_rest, y_rest, test_size=0.2, random_state=args.seed
+    )
+
+    results, best = [], None
+    for name in args.compare or [args.estimator]:
+        if args.search:
+            print(f"\nSearching {name} hyperparameters for {args.time_budget:.0f}s...")
+            tried, result = search(name, X_train, y_train, X_val, y_val,
+                                   args.time_budget, args.n_jobs, args.seed)
+        else:
+            params = dict(DEFAULT_PARAMS[name])
+            if name == "rf" and args.max_samples:
+                params["max_samples"] = args.max_samples
+            print(f"\nTraining {name} {params}...")
+            result = fit_and_score(name, params, X_train, y_train, X_val, y_val,
+                                   args.n_jobs, args.seed)
+            tried = [summary(result)]
+        results += tried
+        if best is None or result["rmse"] < best["rmse"]:
+            best = result
+
+    print_report(results)
+
+    # The only use of the test split
+    y_pred = best["pipeline"].predict(X_test)
+    best["test"] = accuracy(y_test, y_pred)
+
+    print(f"\n=== Regression Model Performance on test ({best['estimator']}) ===")
+    print(f"Root Mean Squared Error (RMSE): {best['test']['rmse']:.4f}")
+    print(f"Mean Absolute Error (MAE): {best['test']['mae']:.4f}")
+    print(f"R² Score (coefficient of determination): {best['test']['r2']:.4f}")
+
+    # Show predictions vs actual for first 10 test samples
+    print("\n=== Sample Predictions vs Actual ===")
+    comparison = pd.DataFrame({
+        "Actual": y_test.iloc[:10].values,
+        "Predicted": y_pred[:10]
+    })
+    print(comparison)
+
+    # Show prediction range
+    print("\nPrediction statistics:")
+    print(f"  Min predicted: {y_pred.min():.2f}")
+    print(f"  Max predicted: {y_pred.max():.2f}")
+    print(f"  Mean predicted: {y_pred.mean():.2f}")
+    print(f"  Std predicted: {y_pred.std():.2f}")
+
+    if not publish(best["pipeline"], best, args):
+        sys.exit(1)
+    print(f"\nSaved {best['estimator']} pipeline to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from app import create_app, db
+from app.models.settings_models import GlobalSettings
 from app.models.user_models import Role, Filiere, Eligibilite
+from app.services.settings_service import DEFAULT_AI_WEIGHT, DEFAULT_HUMAN_WEIGHT
 
 app = create_app()
 
@@ -68,6 +70,9 @@ def seed_data():
                                 filiere_id=f_id
                             ))
 
+        if not GlobalSettings.query.first():
+            db.session.add(GlobalSettings(human_weight=DEFAULT_HUMAN_WEIGHT, ai_weight=DEFAULT_AI_WEIGHT))
+
         try:
             db.session.commit()
             print("Base de données peuplée avec succès !")
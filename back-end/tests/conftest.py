@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.user_models import Role, User
+from app.utils.helpers import hash_password
+from config import Config
+
+PASSWORD = "password-123"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "config(**settings): Config attributes for the app fixture")
+
+
+def make_app(tmp_path, **config):
+    class TestConfig(Config):
+        TESTING = True
+        SECRET_KEY = "test-secret"
+        JWT_SECRET_KEY = "test-jwt-secret-key-32-bytes-long"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        DATA_VERSION_STORE = "memory"
+        TOKEN_DENYLIST_STORE = "memory"
+        RATE_LIMIT_STORE = "memory"
+        CONTACT_SPOOL_PATH = str(tmp_path / "contact_spool.sqlite3")
+
+    for key, value in config.items():
+        setattr(TestConfig, key, value)
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def app(request, tmp_path):
+    marker = request.node.get_closest_marker("config")
+    app = make_app(tmp_path, **(marker.kwargs if marker else {}))
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(Role(role_name=name) for name in ["CANDIDAT", "EVALUATEUR", "ADMIN"])
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    def make(email, role="CANDIDAT"):
+        n = User.query.count()
+        user = User(
+            nom="Test", prenom="User", email=email, password=hash_password(PASSWORD),
+            cin=f"CIN{n}", phone_num=f"0600{n:06d}",
+            role_id=Role.query.filter_by(role_name=role).one().id,
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
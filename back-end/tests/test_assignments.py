@@ -0,0 +1,75 @@
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models.user_models import Affectation, Candidat, Evaluateur, Filiere
+
+
+def headers(user, role):
+    token = create_access_token(identity=str(user.id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def setup_jury(client, make_user, n_evaluators, n_candidates, k):
+    """Evaluators without specialities, candidates alternating between two
+    filieres, and assignments computed with ``k``."""
+    filieres = [Filiere(nom_filiere="Bachelor ISITW"), Filiere(nom_filiere="Bachelor CCA")]
+    db.session.add_all(filieres)
+    db.session.flush()
+    evaluators = []
+    for i in range(n_evaluators):
+        user = make_user(f"eval{i}@test.ma", "EVALUATEUR")
+        ev = Evaluateur(user_id=user.id)
+        db.session.add(ev)
+        evaluators.append((user, ev))
+    for i in range(n_candidates):
+        user = make_user(f"cand{i}@test.ma")
+        db.session.add(Candidat(user_id=user.id, cne=f"CNE{i}", status="SUBMITTED",
+                                filiere_id=filieres[i % 2].id))
+    db.session.commit()
+
+    admin = make_user("admin@test.ma", "ADMIN")
+    response = client.post("/api/admin/assignments/compute", json={"k": k},
+                           headers=headers(admin, "ADMIN"))
+    assert response.status_code == 200
+    return admin, evaluators, [f.id for f in filieres]
+
+
+def assigned_to(ev_id):
+    return {a.candidat_id for a in Affectation.query.filter_by(evaluateur_id=ev_id)}
+
+
+def test_deactivating_releases_pending_candidates(client, make_user):
+    admin, evaluators, _ = setup_jury(client, make_user, 3, 4, k=2)
+    (_, gone), (user, other), _ = evaluators
+    gone_id = gone.id
+    pending = assigned_to(gone_id)
+    assert pending
+
+    response = client.put(f"/api/admin/evaluateurs/{gone_id}", json={"is_active": False},
+                          headers=headers(admin, "ADMIN"))
+
+    assert response.status_code == 200
+    assert response.get_json()["released"] == len(pending)
+    assert assigned_to(gone_id) == set()
+    for candidat_id in pending:
+        assert Affectation.query.filter_by(candidat_id=candidat_id).count() == 2
+    candidat_id = next(iter(pending & assigned_to(other.id)))
+    response = client.post("/api/evaluateur/notes", json={"candidat_id": candidat_id, "note_eval": 14},
+                           headers=headers(user, "EVALUATEUR"))
+    assert response.status_code == 201
+
+
+def test_narrowing_filieres_reassigns_uncovered_candidates(client, make_user):
+    admin, evaluators, filiere_ids = setup_jury(client, make_user, 2, 4, k=1)
+    narrowed_id, other_id = evaluators[0][1].id, evaluators[1][1].id
+    uncovered = assigned_to(narrowed_id)
+    kept_filiere = next(f for f in filiere_ids
+                        if f not in {c.filiere_id for c in Candidat.query.filter(Candidat.id.in_(uncovered))})
+
+    response = client.put(f"/api/admin/evaluateurs/{narrowed_id}",
+                          json={"filiere_ids": [kept_filiere]}, headers=headers(admin, "ADMIN"))
+
+    assert response.status_code == 200
+    assert response.get_json()["released"] == len(uncovered)
+    assert assigned_to(narrowed_id) == set()
+    assert uncovered <= assigned_to(other_id)
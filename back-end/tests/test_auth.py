@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import PASSWORD
+
+
+def login(client, email, password, ip, forwarded_for=None):
+    headers = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+    return client.post(
+        "/api/auth/login", json={"email": email, "password": password},
+        environ_base={"REMOTE_ADDR": ip}, headers=headers,
+    )
+
+
+def test_login_email_limit_does_not_lock_out_the_owner(client, make_user):
+    make_user("owner@test.ma")
+
+    attacker = [login(client, "owner@test.ma", "wrong-password", "203.0.113.9").status_code
+                for _ in range(10)]
+    assert attacker[:5] == [401] * 5
+    assert set(attacker[5:]) == {429}
+
+    assert login(client, "owner@test.ma", PASSWORD, "198.51.100.7").status_code == 200
+
+
+def test_successful_logins_are_not_charged(client, make_user):
+    make_user("daily@test.ma")
+
+    for _ in range(10):
+        assert login(client, "daily@test.ma", PASSWORD, "198.51.100.7").status_code == 200
+
+
+@pytest.mark.config(TRUSTED_PROXY_HOPS=1, LOGIN_IP_BURST=3)
+def test_login_ip_limit_keys_on_the_client_behind_a_proxy(client, make_user):
+    for i in range(10):
+        make_user(f"applicant{i}@test.ma")
+
+    codes = [login(client, f"applicant{i}@test.ma", PASSWORD, "10.0.0.1", f"198.51.100.{i}").status_code
+             for i in range(10)]
+    assert codes == [200] * 10
+
+    codes = [login(client, f"applicant{i}@test.ma", PASSWORD, "10.0.0.1", "203.0.113.9").status_code
+             for i in range(10)]
+    assert codes.count(200) == 3
+
+
+def test_login_ip_limit_is_off_by_default(client, make_user):
+    for i in range(25):
+        make_user(f"applicant{i}@test.ma")
+
+    codes = [login(client, f"applicant{i}@test.ma", PASSWORD, "10.0.0.1").status_code
+             for i in range(25)]
+    assert codes == [200] * 25
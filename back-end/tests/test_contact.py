@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from app import db
+from app.models.settings_models import ContactMessage
+from app.services import contact_ingest
+
+
+def send(client, forwarded_for, message=None):
+    return client.post(
+        "/api/contact",
+        json={"name": "Visiteur", "email": "visiteur@test.ma",
+              "message": message or f"Bonjour de {forwarded_for}"},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"}, headers={"X-Forwarded-For": forwarded_for},
+    )
+
+
+@pytest.mark.config(TRUSTED_PROXY_HOPS=1, CONTACT_IP_BURST=2)
+def test_contact_limit_keys_on_the_client_behind_a_proxy(client):
+    assert [send(client, f"198.51.100.{i}").status_code for i in range(5)] == [202] * 5
+    assert [send(client, "203.0.113.9").status_code for _ in range(3)] == [202, 202, 429]
+
+
+@pytest.mark.config(CONTACT_IP_BURST=0, CONTACT_SPOOL_STALE_SECONDS=1, CONTACT_BATCH_WAIT_MS=100)
+def test_stale_spool_rows_are_recovered_under_sustained_traffic(app, client):
+    ingestor = app.extensions["contact_ingest"]
+    conn = ingestor.spool._conn()
+    conn.execute(
+        "INSERT INTO spool (name, email, message, created_at, claimed_at) VALUES (?, ?, ?, ?, ?)",
+        ("Ancien", "ancien@test.ma", "Message d'un worker arrêté", time.time() - 600, time.time() - 600),
+    )
+
+    deadline = time.monotonic() + 2 * contact_ingest.IDLE_POLL_SECONDS + 2
+    recovered = False
+    i = 0
+    while not recovered and time.monotonic() < deadline:
+        assert send(client, f"198.51.100.{i % 250}", message=f"Message numéro {i}").status_code == 202
+        i += 1
+        time.sleep(0.05)
+        db.session.remove()
+        recovered = ContactMessage.query.filter_by(email="ancien@test.ma").count() == 1
+
+    assert recovered
@@ -0,0 +1,21 @@
+import numpy as np
+from flask import jsonify
+
+
+def test_jsonify_numpy_values(app):
+    @app.route("/_test/numpy")
+    def numpy_payload():
+        matrix = np.arange(6, dtype=np.int64).reshape(2, 3)
+        return jsonify(
+            mean=np.float64(12.5), count=np.int64(3), flag=np.bool_(True),
+            scores=np.array([1.5, 2.5]), column=matrix[:, 1],
+            labels=np.array(["DUT", "BTS"], dtype=object),
+        )
+
+    response = app.test_client().get("/_test/numpy")
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "mean": 12.5, "count": 3, "flag": True,
+        "scores": [1.5, 2.5], "column": [1, 4], "labels": ["DUT", "BTS"],
+    }
@@ -1,15 +1,64 @@
 import axios from "axios";
 
-const axiosClient = axios.create({
-  baseURL: import.meta.env.VITE_API_BASE_URL || "http://localhost:5000/api",
-});
+const baseURL = import.meta.env.VITE_API_BASE_URL || "http://localhost:5000/api";
+
+const axiosClient = axios.create({ baseURL });
 
 axiosClient.interceptors.request.use((config) => {
   const token = localStorage.getItem("token");
-  if (token) {
+  if (token && !config.headers.Authorization) {
     config.headers.Authorization = `Bearer ${token}`;
   }
   return config;
 });
 
+// Access tokens are short-lived: on a 401, exchange the refresh token once
+// (shared by all requests failing at the same time) and replay the request.
+let refreshing = null;
+
+export const refreshTokens = () => {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return Promise.reject(new Error("No refresh token"));
+
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${baseURL}/auth/refresh`, null, {
+        headers: { Authorization: `Bearer ${refreshToken}` },
+      })
+      .then(({ data }) => {
+        localStorage.setItem("token", data.access_token);
+        localStorage.setItem("refresh_token", data.refresh_token);
+        return data.access_token;
+      })
+      .catch((err) => {
+        localStorage.removeItem("token");
+        localStorage.removeItem("refresh_token");
+        throw err;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
+axiosClient.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const isAuthCall = original?.url?.startsWith("/auth/");
+
+    if (error.response?.status !== 401 || !original || original._retried || isAuthCall) {
+      throw error;
+    }
+
+    original._retried = true;
+    const token = await refreshTokens().catch(() => {
+      throw error;
+    });
+    original.headers.Authorization = `Bearer ${token}`;
+    return axiosClient(original);
+  }
+);
+
 export default axiosClient;
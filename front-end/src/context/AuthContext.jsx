@@ -1,5 +1,6 @@
 import { createContext, useEffect, useState, useCallback } from "react";
 import { services } from "../utils/services";
+import { refreshTokens } from "../api/axios";
 
 export const AuthContext = createContext();
 
@@ -26,13 +27,25 @@ export const AuthContextProvider = ({ children }) => {
     }
   };
 
-  const loadUserFromStorage = useCallback(() => {
-    const token = localStorage.getItem("token");
-    const payload = token ? parseToken(token) : null;
+  const loadUserFromStorage = useCallback(async () => {
+    let token = localStorage.getItem("token");
+    let payload = token ? parseToken(token) : null;
+
+    // Expired access token: renew it silently with the refresh token
+    if (!payload && localStorage.getItem("refresh_token")) {
+      try {
+        token = await refreshTokens();
+        payload = parseToken(token);
+      } catch {
+        payload = null;
+      }
+    }
+
     if (payload) {
       setUser({ token, ...payload });
     } else {
       localStorage.removeItem("token");
+      localStorage.removeItem("refresh_token");
       setUser(null);
     }
     setLoading(false);
@@ -51,6 +64,7 @@ export const AuthContextProvider = ({ children }) => {
       if (!payload) throw new Error("Token invalide ou expiré");
 
       localStorage.setItem("token", data.access_token);
+      localStorage.setItem("refresh_token", data.refresh_token);
       setUser({ token: data.access_token, ...payload });
 
       return data;
@@ -82,8 +96,15 @@ export const AuthContextProvider = ({ children }) => {
     }
   };
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    const refreshToken = localStorage.getItem("refresh_token");
+    try {
+      await services.auth.logout(refreshToken);
+    } catch {
+      // Token already expired or revoked: nothing left to revoke
+    }
     localStorage.removeItem("token");
+    localStorage.removeItem("refresh_token");
     setUser(null);
   };
 
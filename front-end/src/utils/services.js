@@ -10,6 +10,10 @@ export const services = {
       const { data } = await axiosClient.post("/auth/register", { ...payload, role: "CANDIDAT" });
       return data;
     },
+    logout: async (refreshToken) => {
+      const { data } = await axiosClient.post("/auth/logout", { refresh_token: refreshToken });
+      return data;
+    },
   },
 
   admin: {